@@ -0,0 +1,300 @@
+"""
+Reportes consolidados de varias sucursales (casa matriz).
+
+Lee el inventory.db de cada sucursal (o su réplica de sync.py) SIN modificarlo
+y arma los mismos reportes que la pestaña Avanzado, sumados entre sucursales:
+  - ventas del período: totales, por día y por método de pago (resúmenes diarios);
+  - pedido sugerido (reorder.py) de cada sucursal, más el total por SKU.
+
+Dos estrategias:
+  attach   Una sola conexión con las bases adjuntas (ATTACH, de a ATTACH_MAX) y
+           consultas UNION ALL. Sin costo de arranque: conviene con pocas bases.
+  process  Cada sucursal se procesa en su propio proceso (ProcessPoolExecutor)
+           con las mismas funciones de db que usa la app, y aquí se suman los
+           parciales. Escala con los núcleos: conviene con muchas bases.
+Por defecto (auto) se usa attach hasta ATTACH_MAX bases y process por encima.
+
+Uso:
+    python consolidate.py sucursales/ --desde 2026-01-01 --hasta 2026-01-31 -o reportes/
+    python consolidate.py centro.db norte.db --estrategia process
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import quote
+
+import db
+import reorder
+
+ATTACH_MAX = 10  # límite de bases adjuntas por conexión de SQLite (SQLITE_MAX_ATTACHED)
+
+STRATEGY_AUTO = "auto"
+STRATEGY_ATTACH = "attach"
+STRATEGY_PROCESS = "process"
+
+
+def store_label(path: str) -> str:
+    """Nombre de la sucursal en los reportes: el nombre del archivo sin extensión."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.basename(os.path.dirname(os.path.abspath(path))) if name == "inventory" else name
+
+
+def _store_result(path: str, summary: Dict, daily: List[Dict], payments: List[Dict],
+                  order_rows: List[Dict], plan: reorder.ReorderPlan) -> Dict[str, Any]:
+    to_order = plan.to_order()
+    return {
+        'store': store_label(path),
+        'summary': summary,
+        'daily': daily,
+        'payments': payments,
+        'orders': [reorder.order_report_line(row, to_order[row['id']]) for row in order_rows if row['id'] in to_order],
+    }
+
+
+# ------------------------------------------------------------------------------
+# ESTRATEGIA "process": una sucursal por proceso, con las funciones de db
+# ------------------------------------------------------------------------------
+
+def store_report(path: str, start: str, end: str) -> Dict[str, Any]:
+    """Reportes de una sucursal (se ejecuta en un proceso del pool)."""
+    if not os.path.exists(path):
+        # get_db_connection crearía un archivo vacío
+        raise FileNotFoundError(f"No existe la base {path}")
+    db.DB_PATH = path
+    plan = reorder.compute_plan(db.get_reorder_inputs(),
+                                db.get_sold_qty_by_window([d for d, _ in reorder.VELOCITY_WINDOWS]))
+    return _store_result(path, db.get_sales_summary(start, end), db.get_daily_sales(start, end),
+                         db.get_sales_by_payment(start, end), db.get_order_report_rows(), plan)
+
+
+def _process_reports(paths: Sequence[str], start: str, end: str, workers: Optional[int]) -> List[Dict[str, Any]]:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [(path, pool.submit(store_report, path, start, end)) for path in paths]
+        results = []
+        for path, future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # Un total con una sucursal de menos sería un total equivocado
+                raise RuntimeError(f"{store_label(path)}: {e}") from e
+        return results
+
+
+# ------------------------------------------------------------------------------
+# ESTRATEGIA "attach": bases adjuntas y UNION ALL (mismas consultas que db.py,
+# con el esquema de cada sucursal y su número como primera columna)
+# ------------------------------------------------------------------------------
+
+SUMMARY_SQL = """
+    SELECT {i}, COALESCE(SUM(revenue), 0), COALESCE(SUM(sale_count), 0),
+           COALESCE(SUM(units), 0), COALESCE(SUM(line_count), 0)
+    FROM {s}.sales_daily WHERE day >= COALESCE(?, '') AND day <= COALESCE(?, '9999-12-31')
+"""
+DAILY_SQL = """
+    SELECT {i}, day, revenue, sale_count, units, line_count
+    FROM {s}.sales_daily WHERE day >= COALESCE(?, '') AND day <= COALESCE(?, '9999-12-31')
+"""
+PAYMENT_SQL = """
+    SELECT {i}, payment_method, SUM(revenue), SUM(sale_count)
+    FROM {s}.sales_daily_payment WHERE day >= COALESCE(?, '') AND day <= COALESCE(?, '9999-12-31')
+    GROUP BY payment_method
+"""
+REORDER_INPUTS_SQL = """
+    SELECT {i}, id, COALESCE(provider_id, 0), stock, COALESCE(min_stock, 0),
+           COALESCE(max_stock, 0), price
+    FROM {s}.items WHERE active = 1
+"""
+ORDER_ROWS_SQL = """
+    SELECT {i}, i.id, i.sku, i.name, i.stock, i.min_stock, i.max_stock,
+           p.name, p.phone
+    FROM {s}.items i
+    LEFT JOIN {s}.providers p ON i.provider_id = p.id
+    WHERE i.active = 1
+"""
+
+def _sold_sql(windows: Sequence[int]) -> str:
+    columns = ", ".join("SUM(CASE WHEN s.created_at >= ? THEN si.qty ELSE 0 END)" for _ in windows)
+    return f"""
+        SELECT {{i}}, si.item_id, {columns}
+        FROM {{s}}.sales s
+        JOIN {{s}}.sale_items si ON si.sale_id = s.id
+        WHERE s.created_at >= ?
+        GROUP BY si.item_id
+    """
+
+
+def _union_all(template: str, count: int, params: Sequence = (), order_by: str = "") -> tuple:
+    sql = " UNION ALL ".join(template.format(i=i, s=f"s{i}") for i in range(count))
+    return sql + (f" ORDER BY {order_by}" if order_by else ""), list(params) * count
+
+
+def _attach_group(paths: Sequence[str], start: str, end: str) -> List[Dict[str, Any]]:
+    conn = sqlite3.connect("file::memory:", uri=True)
+    try:
+        for i, path in enumerate(paths):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No existe la base {path}")
+            # Solo lectura: el reporte nunca toca las bases de las sucursales
+            uri = "file:" + quote(os.path.abspath(path).replace(os.sep, "/")) + "?mode=ro"
+            conn.execute(f"ATTACH DATABASE ? AS s{i}", (uri,))
+        n = len(paths)
+        stores = [{'summary': None, 'daily': [], 'payments': [], 'items': [], 'sold': [], 'order_rows': []}
+                  for _ in paths]
+
+        for i, *values in conn.execute(*_union_all(SUMMARY_SQL, n, (start, end))):
+            stores[i]['summary'] = dict(zip(('revenue', 'sale_count', 'units', 'line_count'), values))
+        for i, *values in conn.execute(*_union_all(DAILY_SQL, n, (start, end), "1, 2")):
+            stores[i]['daily'].append(dict(zip(('day', 'revenue', 'sale_count', 'units', 'line_count'), values)))
+        for i, *values in conn.execute(*_union_all(PAYMENT_SQL, n, (start, end), "1, 3 DESC")):
+            stores[i]['payments'].append(dict(zip(('payment_method', 'revenue', 'sale_count'), values)))
+
+        for i, *values in conn.execute(*_union_all(REORDER_INPUTS_SQL, n, order_by="1, 2")):
+            stores[i]['items'].append(tuple(values))
+        windows = [d for d, _ in reorder.VELOCITY_WINDOWS]
+        today = date.today()
+        starts = [(today - timedelta(days=w)).isoformat() for w in windows]
+        for i, *values in conn.execute(*_union_all(_sold_sql(windows), n, (*starts, min(starts)))):
+            stores[i]['sold'].append(tuple(values))
+        order_columns = ('id', 'sku', 'name', 'stock', 'min_stock', 'max_stock', 'provider_name', 'provider_phone')
+        for i, *values in conn.execute(*_union_all(ORDER_ROWS_SQL, n, order_by="1, 8, 4")):
+            stores[i]['order_rows'].append(dict(zip(order_columns, values)))
+
+        return [
+            _store_result(path, s['summary'], s['daily'], s['payments'], s['order_rows'],
+                          reorder.compute_plan(s['items'], s['sold']))
+            for path, s in zip(paths, stores)
+        ]
+    finally:
+        conn.close()
+
+
+def _attach_reports(paths: Sequence[str], start: str, end: str) -> List[Dict[str, Any]]:
+    results = []
+    for first in range(0, len(paths), ATTACH_MAX):
+        results.extend(_attach_group(paths[first:first + ATTACH_MAX], start, end))
+    return results
+
+
+# ------------------------------------------------------------------------------
+# CONSOLIDACIÓN
+# ------------------------------------------------------------------------------
+
+def consolidate(paths: Sequence[str], start: str, end: str, strategy: str = STRATEGY_AUTO,
+                workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Reportes sumados de todas las bases. Devuelve
+    {'start', 'end', 'strategy', 'total', 'stores', 'daily', 'by_payment', 'orders', 'orders_by_sku'}.
+    """
+    paths = list(paths)
+    if strategy == STRATEGY_AUTO:
+        strategy = STRATEGY_ATTACH if len(paths) <= ATTACH_MAX else STRATEGY_PROCESS
+    if strategy == STRATEGY_ATTACH:
+        stores = _attach_reports(paths, start, end)
+    elif strategy == STRATEGY_PROCESS:
+        stores = _process_reports(paths, start, end, workers)
+    else:
+        raise ValueError(f"Estrategia desconocida: {strategy}")
+    return merge_reports(stores, start, end, strategy)
+
+
+def merge_reports(stores: List[Dict[str, Any]], start: str, end: str, strategy: str) -> Dict[str, Any]:
+    keys = ('revenue', 'sale_count', 'units', 'line_count')
+    total = dict.fromkeys(keys, 0)
+    daily: Dict[str, Dict[str, Any]] = {}
+    payments: Dict[str, Dict[str, Any]] = {}
+    by_sku: Dict[str, List] = {}  # sku -> [proveedor, producto, sucursales, cantidad]
+
+    for store in stores:
+        for key in keys:
+            total[key] += store['summary'][key]
+        for row in store['daily']:
+            acc = daily.setdefault(row['day'], dict({'day': row['day']}, **dict.fromkeys(keys, 0)))
+            for key in keys:
+                acc[key] += row[key]
+        for row in store['payments']:
+            acc = payments.setdefault(row['payment_method'], {'payment_method': row['payment_method'], 'revenue': 0, 'sale_count': 0})
+            acc['revenue'] += row['revenue']
+            acc['sale_count'] += row['sale_count']
+        for line in store['orders']:
+            acc = by_sku.setdefault(line[2], [line[0], line[3], 0, 0])
+            acc[2] += 1
+            acc[3] += line[-1]
+
+    return {
+        'start': start, 'end': end, 'strategy': strategy, 'total': total,
+        'stores': [dict({'store': s['store']}, **s['summary']) for s in stores],
+        'daily': [daily[day] for day in sorted(daily)],
+        'by_payment': sorted(payments.values(), key=lambda p: p['revenue'], reverse=True),
+        'orders': [[s['store']] + line for s in stores for line in s['orders']],
+        'orders_by_sku': sorted(([sku] + acc for sku, acc in by_sku.items()), key=lambda r: (r[1], r[2])),
+    }
+
+
+def write_reports(report: Dict[str, Any], output_dir: str) -> List[str]:
+    os.makedirs(output_dir, exist_ok=True)
+    today = datetime.now().strftime('%Y-%m-%d')
+    sales_path = os.path.join(output_dir, f"ventas_consolidadas_{report['start']}_al_{report['end']}.json")
+    orders_path = os.path.join(output_dir, f"Pedido_Consolidado_{today}.csv")
+    by_sku_path = os.path.join(output_dir, f"Pedido_Total_por_SKU_{today}.csv")
+
+    sales = {k: report[k] for k in ('start', 'end', 'total', 'stores', 'daily', 'by_payment')}
+    with open(sales_path, 'w', encoding='utf-8') as f:
+        json.dump(sales, f, indent=4, ensure_ascii=False)
+
+    with open(orders_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(["Sucursal"] + reorder.ORDER_REPORT_HEADERS)
+        writer.writerows(report['orders'])
+
+    with open(by_sku_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(["SKU", "Proveedor", "Producto", "Sucursales que piden", "CANTIDAD TOTAL A PEDIR"])
+        writer.writerows(report['orders_by_sku'])
+    return [sales_path, orders_path, by_sku_path]
+
+
+def find_databases(inputs: Sequence[str]) -> List[str]:
+    """Archivos .db indicados, o los que haya dentro de las carpetas indicadas."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, "*.db"))))
+        else:
+            paths.append(item)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reportes consolidados de varias sucursales EasyINV")
+    parser.add_argument("bases", nargs="+", help="Archivos .db de las sucursales o carpetas que los contienen")
+    parser.add_argument("--desde", default=(date.today() - timedelta(days=30)).isoformat())
+    parser.add_argument("--hasta", default=date.today().isoformat())
+    parser.add_argument("--estrategia", choices=[STRATEGY_AUTO, STRATEGY_ATTACH, STRATEGY_PROCESS], default=STRATEGY_AUTO)
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos para 'process' (por defecto, uno por núcleo)")
+    parser.add_argument("-o", "--salida", default=".")
+    args = parser.parse_args(argv)
+
+    paths = find_databases(args.bases)
+    if not paths:
+        print("No se encontraron bases de datos.")
+        return 1
+    report = consolidate(paths, args.desde, args.hasta, args.estrategia, args.procesos)
+    files = write_reports(report, args.salida)
+
+    t = report['total']
+    print(f"{len(paths)} sucursales ({report['strategy']}), {args.desde} al {args.hasta}: "
+          f"$ {t['revenue']:,.2f} en {t['sale_count']} ventas; {len(report['orders'])} líneas de pedido.")
+    for path in files:
+        print(f"  {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
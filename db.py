@@ -2,10 +2,17 @@ import sqlite3
 import os
 import sys
 import shutil
-from contextlib import closing
-from datetime import datetime
-from typing import List, Dict, Optional, Union, Any
+import time
+import threading
+import unicodedata
+import uuid
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from typing import List, Dict, Optional, Union, Any, Iterable, Sequence, Tuple
 from PyQt5.QtSql import QSqlDatabase 
+import events
 
 # ==============================================================================
 # 1. GESTIÓN DE RUTAS Y DIRECTORIOS (CRÍTICO PARA EL EXE VS DEV)
@@ -42,24 +49,230 @@ else:
 # ESTA ES LA RUTA FINAL QUE USARÁ TODO EL SISTEMA
 DB_PATH = os.path.join(USER_DATA_DIR, "inventory.db")
 
+# Dirección del servidor cuando la app corre como terminal (ver db_client.py).
+# None = esta PC abre el archivo de base de datos directamente.
+REMOTE_SERVER: Optional[str] = None
+
+# Límite seguro de parámetros '?' por consulta en SQLite
+SQL_CHUNK_SIZE = 900
+
+# Con la base en modo WAL los lectores no bloquean al escritor ni al revés.
+# EASYINV_NO_WAL=1 vuelve al diario clásico (ej. base en una carpeta compartida
+# de red, donde WAL no funciona porque necesita memoria compartida local).
+WAL_DISABLE_ENV = "EASYINV_NO_WAL"
+
 # ==============================================================================
 
-def get_db_connection() -> sqlite3.Connection:
-    """Devuelve una conexión a la base de datos en la ruta segura."""
-    conn = sqlite3.connect(DB_PATH)
+_snapshot = threading.local()
+
+def _connect(database: str = None, uri: bool = False) -> sqlite3.Connection:
+    conn = sqlite3.connect(database or DB_PATH, uri=uri)
     conn.row_factory = sqlite3.Row
+    # Disponible para consultas que recalculan la clave de búsqueda en SQL (ej. UPSERT del CSV)
+    conn.create_function("item_search_key", 3, item_search_key, deterministic=True)
     return conn
 
-def init_db():
+def get_db_connection() -> sqlite3.Connection:
+    """Devuelve una conexión a la base de datos en la ruta segura."""
+    snapshot = getattr(_snapshot, 'conn', None)
+    if snapshot is not None:
+        # Dentro de read_snapshot(): las lecturas de este hilo ven la misma foto
+        return snapshot
+    return _connect()
+
+class _SnapshotConnection:
+    """La conexión de read_snapshot() tal como la reciben las lecturas: cerrarla no la cierra."""
+
+    def __init__(self, conn: sqlite3.Connection, has_archive: bool):
+        self._conn = conn
+        self.has_archive = has_archive
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        pass
+
+@contextmanager
+def read_snapshot():
+    """
+    Para reportes largos: abre una conexión de solo lectura con una transacción
+    de lectura diferida. Dentro del bloque, todas las lecturas de db hechas por
+    este hilo (get_order_report_rows, get_sales_with_details, ...) ven la base
+    tal como estaba al entrar, aunque las cajas sigan vendiendo; en modo WAL
+    no frenan a register_sale. Entrega la conexión (ej. para conn.backup()).
+    En modo terminal (db_client) no hace nada: las lecturas van al servidor.
+    """
+    current = getattr(_snapshot, 'conn', None)
+    if REMOTE_SERVER or current is not None:
+        yield current._conn if current is not None else None
+        return
+
+    conn = _connect(Path(DB_PATH).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        has_archive = _attach_archive(conn)  # ATTACH no se permite dentro de la transacción
+        conn.execute("BEGIN")
+        # La foto se toma en la primera lectura de cada base
+        conn.execute("SELECT COUNT(*) FROM main.sqlite_master").fetchone()
+        if has_archive:
+            conn.execute("SELECT COUNT(*) FROM archive.sqlite_master").fetchone()
+        _snapshot.conn = _SnapshotConnection(conn, has_archive)
+        yield conn
+    finally:
+        if _snapshot.conn is not None:
+            _snapshot.conn = None
+            conn.rollback()
+            conn.close()
+
+# ==============================================================================
+# TRANSACCIONES DE ESCRITURA
+# Cada escritura pública (add_item, register_sale, ...) envuelve una función
+# `_..._tx(cur, ...)` que trabaja sobre un cursor SIN hacer commit. run_write()
+# la ejecuta en su propia transacción o, si hay una cola de escritura instalada
+# (write_queue.py, modo servidor), la encola para confirmarla junto con las de
+# otros hilos en un solo commit. Lo que debe ocurrir recién DESPUÉS del commit
+# (invalidar cachés, publicar eventos de cambio) se registra con after_commit(),
+# se ejecuta en el hilo que pidió la escritura y se descarta si la operación
+# se revierte.
+# ==============================================================================
+
+_write_queue = None  # write_queue.WriteQueue activa, o None
+_write_effects = threading.local()
+
+def set_write_queue(queue) -> None:
+    """Instala (o quita, con None) la cola que usará run_write()."""
+    global _write_queue
+    _write_queue = queue
+
+def after_commit(callback, *args):
+    """Ejecuta `callback(*args)` cuando se confirme la escritura en curso."""
+    pending = getattr(_write_effects, 'pending', None)
+    if pending is None:
+        callback(*args)
+    else:
+        pending.append((callback, args))
+
+@contextmanager
+def collecting_effects():
+    """Junta en una lista los after_commit() registrados dentro del bloque."""
+    previous = getattr(_write_effects, 'pending', None)
+    _write_effects.pending = effects = []
+    try:
+        yield effects
+    finally:
+        _write_effects.pending = previous
+
+def run_effects(effects: List[Tuple]):
+    for callback, args in effects:
+        callback(*args)
+
+def run_write(tx, *args, **kwargs) -> Any:
+    """Ejecuta `tx(cur, *args, **kwargs)` en una transacción y devuelve su resultado."""
+    queue = _write_queue
+    if queue is not None:
+        future = queue.submit(tx, *args, **kwargs)
+        result = future.result()
+        run_effects(future.effects)
+        return result
+
+    with closing(_connect()) as conn:  # nunca la de read_snapshot(), que es de solo lectura
+        try:
+            cur = conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            with collecting_effects() as effects:
+                result = tx(cur, *args, **kwargs)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+    run_effects(effects)
+    return result
+
+# ==============================================================================
+# CIERRE DE CONEXIONES (RESTAURAR UN RESPALDO)
+# En modo WAL la base son tres archivos: inventory.db, -wal y -shm. Si solo se
+# reemplaza el primero, al abrirlo SQLite aplica el -wal viejo sobre la copia
+# nueva y vuelven filas de la base anterior. Antes de moverla se cierran las
+# conexiones de este módulo y se vacía el WAL; los tres archivos se mueven juntos.
+# ==============================================================================
+
+DB_FILE_SUFFIXES = ("", "-wal", "-shm")
+
+def database_files(path: Optional[str] = None) -> List[str]:
+    """La base y sus archivos auxiliares de WAL (existan o no)."""
+    path = path or DB_PATH
+    return [path + suffix for suffix in DB_FILE_SUFFIXES]
+
+def close_connections() -> bool:
+    """
+    Cierra la cola de escritura y la foto de lectura de este hilo, y vuelca el
+    WAL en la base con un checkpoint TRUNCATE. Devuelve False si otra conexión
+    (otra caja, un hilo leyendo) no dejó vaciarlo.
+    """
+    queue = _write_queue
+    if queue is not None:
+        set_write_queue(None)
+        queue.close()
+
+    snapshot = getattr(_snapshot, 'conn', None)
+    if snapshot is not None:
+        _snapshot.conn = None
+        snapshot._conn.close()
+
+    if not os.path.exists(DB_PATH):
+        return True
+    with closing(_connect()) as conn:
+        conn.execute("PRAGMA busy_timeout = 0")
+        if conn.execute("PRAGMA journal_mode").fetchone()[0] != "wal":
+            return True
+        busy = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+    return not busy
+
+# ==============================================================================
+# NORMALIZACIÓN DE TEXTO PARA BÚSQUEDAS
+# ==============================================================================
+
+def normalize_text(text: Optional[str]) -> str:
+    """Minúsculas (casefold) y sin tildes: 'Canción' -> 'cancion'."""
+    if not text:
+        return ""
+    text = str(text)
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+def item_search_key(sku: Optional[str], name: Optional[str], location: Optional[str]) -> str:
+    """Clave que se guarda en items.search_key (SKU, nombre y ubicación normalizados)."""
+    return " | ".join(normalize_text(v) for v in (sku, name, location))
+
+def _ensure_column(cur: sqlite3.Cursor, table: str, column: str, definition: str):
+    """Agrega una columna a una tabla existente (migración de bases antiguas)."""
+    cur.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in cur.fetchall()]:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def _backfill_search_keys(cur: sqlite3.Cursor):
+    """Calcula la clave de búsqueda de las filas creadas antes de existir la columna."""
+    cur.execute("SELECT id, sku, name, location FROM items WHERE search_key IS NULL OR search_key = ''")
+    rows = [(item_search_key(r[1], r[2], r[3]), r[0]) for r in cur.fetchall()]
+    cur.executemany("UPDATE items SET search_key = ? WHERE id = ?", rows)
+
+    cur.execute("SELECT id, name FROM providers WHERE search_key IS NULL OR search_key = ''")
+    rows = [(normalize_text(r[1]), r[0]) for r in cur.fetchall()]
+    cur.executemany("UPDATE providers SET search_key = ? WHERE id = ?", rows)
+
+def init_db(qt_connection: bool = True, use_template: bool = True):
     """
     Inicializa la base de datos.
-    1. Si no existe en la ruta destino, intenta copiar una plantilla.
+    1. Si no existe en la ruta destino, intenta copiar una plantilla
+       (se omite con use_template=False, ej. réplicas de sync.py).
     2. Si no hay plantilla, crea las tablas desde cero.
-    3. Configura la conexión QtSql para la interfaz gráfica.
+    3. Configura la conexión QtSql para la interfaz gráfica (se omite en server.py).
     """
     
     # --- PASO 1: GESTIÓN DE ARCHIVOS ---
-    if not os.path.exists(DB_PATH):
+    if use_template and not os.path.exists(DB_PATH):
         print(f"Base de datos no encontrada en {DB_PATH}. Inicializando...")
         
         # Buscamos si existe una plantilla 'inventory.db' (útil para actualizaciones del EXE)
@@ -89,6 +302,13 @@ def init_db():
     # --- PASO 2: CREACIÓN DE TABLAS (Solo si no existen) ---
     with closing(get_db_connection()) as conn:
         cur = conn.cursor()
+
+        # Una base nueva nace con vacuum incremental; en una existente esto no
+        # cambia nada (la conversión la hace maintenance.convert_auto_vacuum)
+        cur.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+        # Modo de diario (queda guardado en el archivo; ver WAL_DISABLE_ENV)
+        cur.execute(f"PRAGMA journal_mode = {'DELETE' if os.environ.get(WAL_DISABLE_ENV) else 'WAL'}")
         
         # 1. Tabla de Productos
         cur.execute("""
@@ -146,9 +366,179 @@ def init_db():
                 active INTEGER DEFAULT 1
             )
         """)
+
+        # 5. Claves de búsqueda normalizadas (sin tildes ni mayúsculas)
+        _ensure_column(cur, "items", "search_key", "TEXT DEFAULT ''")
+        _ensure_column(cur, "providers", "search_key", "TEXT DEFAULT ''")
+        _backfill_search_keys(cur)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_items_search ON items(active, search_key)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_providers_search ON providers(active, search_key)")
+
+        # Cubre el tablero de proveedores: el GROUP BY no necesita leer la tabla
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_items_provider 
+            ON items(provider_id, active, stock, min_stock, max_stock, price)
+        """)
+
+        # 6. Versión por producto (control de concurrencia optimista entre cajas)
+        _ensure_column(cur, "items", "version", "INTEGER NOT NULL DEFAULT 0")
+        cur.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_items_version
+            AFTER UPDATE ON items
+            WHEN NEW.version = OLD.version
+            BEGIN
+                UPDATE items SET version = OLD.version + 1 WHERE id = NEW.id;
+            END
+        """)
+
+        # 7. Velocidad de ventas por producto: rango de fechas -> detalle sin leer la tabla
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_sales_created ON sales(created_at)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_sale_items_sale ON sale_items(sale_id, item_id, qty)")
+
+        # 8. Resúmenes diarios de ventas (se actualizan en register_sale)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS sales_daily (
+                day TEXT PRIMARY KEY,
+                revenue REAL NOT NULL DEFAULT 0,
+                sale_count INTEGER NOT NULL DEFAULT 0,
+                units INTEGER NOT NULL DEFAULT 0,
+                line_count INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS sales_daily_item (
+                day TEXT NOT NULL,
+                item_id INTEGER NOT NULL,
+                revenue REAL NOT NULL DEFAULT 0,
+                units INTEGER NOT NULL DEFAULT 0,
+                line_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, item_id)
+            ) WITHOUT ROWID
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS sales_daily_payment (
+                day TEXT NOT NULL,
+                payment_method TEXT NOT NULL,
+                revenue REAL NOT NULL DEFAULT 0,
+                sale_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, payment_method)
+            ) WITHOUT ROWID
+        """)
+
+        # 9. Turnos de caja: cada venta queda asociada al turno abierto
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS shifts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                opened_at TEXT NOT NULL,
+                closed_at TEXT,
+                opening_cash REAL NOT NULL DEFAULT 0,
+                counted_cash REAL,
+                notes TEXT DEFAULT ''
+            )
+        """)
+        # Solo puede haber un turno abierto a la vez
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_shifts_open ON shifts((closed_at IS NULL)) WHERE closed_at IS NULL")
+        _ensure_column(cur, "sales", "shift_id", "INTEGER REFERENCES shifts(id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_sales_shift ON sales(shift_id)")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS shift_totals (
+                shift_id INTEGER NOT NULL,
+                payment_method TEXT NOT NULL,
+                revenue REAL NOT NULL DEFAULT 0,
+                sale_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (shift_id, payment_method)
+            ) WITHOUT ROWID
+        """)
+
+        # 10. Libro de movimientos de stock (solo se agregan filas) + fotos periódicas
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS stock_movements (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id INTEGER NOT NULL,
+                delta INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                ref_id INTEGER,
+                created_at TEXT NOT NULL
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_stock_movements_item ON stock_movements(item_id, created_at)")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS stock_snapshots (
+                taken_at TEXT NOT NULL,
+                item_id INTEGER NOT NULL,
+                stock INTEGER NOT NULL,
+                last_movement_id INTEGER NOT NULL,
+                PRIMARY KEY (taken_at, item_id)
+            ) WITHOUT ROWID
+        """)
+        # Bases anteriores al libro: el stock actual entra como saldo de apertura
+        cur.execute("SELECT EXISTS(SELECT 1 FROM items) AND NOT EXISTS(SELECT 1 FROM stock_movements)")
+        if cur.fetchone()[0]:
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            cur.execute("""
+                INSERT INTO stock_movements (item_id, delta, type, created_at)
+                SELECT id, stock, ?, ? FROM items WHERE stock != 0
+            """, (MOVE_OPENING, now))
+        _take_stock_snapshot_if_due(cur)
+
+        # 11. Valorización de inventario por proveedor y ubicación (la mantienen triggers)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS inventory_valuation (
+                provider_id INTEGER NOT NULL,
+                location TEXT NOT NULL,
+                item_count INTEGER NOT NULL DEFAULT 0,
+                units INTEGER NOT NULL DEFAULT 0,
+                value REAL NOT NULL DEFAULT 0,
+                value_c1 REAL NOT NULL DEFAULT 0,
+                value_c2 REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (provider_id, location)
+            ) WITHOUT ROWID
+        """)
+        _create_valuation_triggers(cur)
+        cur.execute("SELECT EXISTS(SELECT 1 FROM items WHERE active = 1) AND NOT EXISTS(SELECT 1 FROM inventory_valuation)")
+        if cur.fetchone()[0]:
+            _rebuild_valuation(cur)
+
+        # 12. Registro de cambios para sincronizar sucursales (ver sync.py)
+        cur.execute("CREATE TABLE IF NOT EXISTS app_meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID")
+        cur.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('store_id', ?)", (uuid.uuid4().hex,))
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                row_id INTEGER NOT NULL,
+                op TEXT NOT NULL
+            )
+        """)
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_change_log_row ON change_log(table_name, row_id)")
+        cur.execute("CREATE TABLE IF NOT EXISTS cdc_pause (paused INTEGER)")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS cdc_applied (
+                source TEXT PRIMARY KEY,
+                last_seq INTEGER NOT NULL,
+                applied_at TEXT
+            ) WITHOUT ROWID
+        """)
+        _create_cdc_triggers(cur)
+        # Bases anteriores al registro: todas las filas cuentan como cambio inicial
+        cur.execute("SELECT NOT EXISTS(SELECT 1 FROM change_log)")
+        if cur.fetchone()[0]:
+            for table in CDC_TABLES:
+                cur.execute(f"INSERT INTO change_log (table_name, row_id, op) SELECT ?, id, ? FROM {table} ORDER BY id", 
+                            (table, CDC_UPSERT))
+
+        # Bases de datos con historial previo a los resúmenes: se llenan una sola vez
+        cur.execute("SELECT EXISTS(SELECT 1 FROM sales) AND NOT EXISTS(SELECT 1 FROM sales_daily)")
+        if cur.fetchone()[0]:
+            print("Generando resúmenes diarios de ventas...")
+            _rebuild_sales_rollups(cur)
         conn.commit()
 
     # --- PASO 3: INICIALIZAR CONEXIÓN QT (PARA LA GUI) ---
+    if not qt_connection:
+        print("Inicialización de DB completada.")
+        return
+
     if QSqlDatabase.contains("qt_sql_default_connection"):
         db = QSqlDatabase.database("qt_sql_default_connection")
     else:
@@ -168,14 +558,67 @@ def init_db():
 # FUNCIONES DE LÓGICA DE NEGOCIO 
 # ==============================================================================
 
-def add_provider(name: str, phone: str) -> int:
+# ------------------------------------------------------------------------------
+# CACHÉ DE PROVEEDORES
+# Los diálogos de ítems y el detalle solo necesitan id -> nombre. Se carga una vez
+# y se invalida en cada escritura de proveedores de este proceso. Como la caché de
+# ítems, se relee pasado PROVIDER_CACHE_TTL para ver los cambios de otras cajas.
+# ------------------------------------------------------------------------------
+
+PROVIDER_CACHE_TTL = 30  # segundos
+
+_provider_cache: Optional[Dict[int, Dict[str, Any]]] = None
+_provider_cache_loaded_at = 0.0
+_provider_cache_version = 0
+
+def invalidate_provider_cache():
+    global _provider_cache, _provider_cache_version
+    _provider_cache = None
+    _provider_cache_version += 1
+    # El detalle de ítems cacheado incluye provider_name
+    invalidate_item_cache()
+
+def provider_cache_version() -> int:
+    """Cambia cada vez que se invalida la caché (los modelos Qt lo usan para saber si recargar)."""
+    _get_provider_cache()  # relee si venció el TTL y cuenta los cambios de otras cajas
+    return _provider_cache_version
+
+def _get_provider_cache() -> Dict[int, Dict[str, Any]]:
+    global _provider_cache, _provider_cache_loaded_at, _provider_cache_version
+    if _provider_cache is None or time.monotonic() - _provider_cache_loaded_at >= PROVIDER_CACHE_TTL:
+        with closing(get_db_connection()) as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT id, name, phone, active FROM providers ORDER BY name ASC")
+            fresh = {row['id']: dict(row) for row in cur.fetchall()}
+        if _provider_cache is not None and fresh != _provider_cache:
+            _provider_cache_version += 1
+            invalidate_item_cache()
+        _provider_cache = fresh
+        _provider_cache_loaded_at = time.monotonic()
+    return _provider_cache
+
+def get_cached_providers() -> List[Dict[str, Any]]:
+    """Proveedores activos ordenados por nombre, desde la caché."""
+    return [p for p in _get_provider_cache().values() if p['active'] == 1]
+
+def get_provider_name(provider_id: Optional[int]) -> Optional[str]:
+    """Nombre del proveedor (incluye inactivos) o None si no existe."""
+    if not provider_id:
+        return None
+    provider = _get_provider_cache().get(int(provider_id))
+    return provider['name'] if provider else None
+
+def _add_provider_tx(cur: sqlite3.Cursor, name: str, phone: str) -> int:
     now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    with closing(get_db_connection()) as conn:
-        cur = conn.cursor()
-        cur.execute("INSERT INTO providers (name, phone, created_at, active) VALUES (?, ?, ?, 1)", 
-                    (name, phone, now))
-        conn.commit()
-        return cur.lastrowid
+    cur.execute("INSERT INTO providers (name, phone, created_at, active, search_key) VALUES (?, ?, ?, 1, ?)", 
+                (name, phone, now, normalize_text(name)))
+    provider_id = cur.lastrowid
+    after_commit(invalidate_provider_cache)
+    after_commit(events.publish, "providers", events.INSERT, [provider_id])
+    return provider_id
+
+def add_provider(name: str, phone: str) -> int:
+    return run_write(_add_provider_tx, name, phone)
 
 def get_providers() -> List[Dict[str, Any]]:
     with closing(get_db_connection()) as conn:
@@ -183,119 +626,603 @@ def get_providers() -> List[Dict[str, Any]]:
         cur.execute("SELECT * FROM providers WHERE active = 1 ORDER BY name ASC")
         return [dict(row) for row in cur.fetchall()]
 
-def update_provider(provider_id: int, name: str, phone: str) -> bool:
+def get_provider_dashboard(text: str = "") -> List[Dict[str, Any]]:
+    """
+    Una sola consulta agrupada con el resumen de cada proveedor activo:
+    productos y productos en stock mínimo (las unidades a pedir salen de reorder.py).
+    `text` filtra por nombre sin importar tildes ni mayúsculas.
+    """
+    key = normalize_text(text.strip())
+    query = """
+        SELECT 
+            p.id, p.name, p.phone,
+            COUNT(i.id) AS item_count,
+            COALESCE(SUM(CASE WHEN i.stock <= i.min_stock THEN 1 ELSE 0 END), 0) AS low_stock_count
+        FROM providers p
+        LEFT JOIN items i ON i.provider_id = p.id AND i.active = 1
+        WHERE p.active = 1 AND (? = '' OR instr(p.search_key, ?) > 0)
+        GROUP BY p.id
+        ORDER BY p.name ASC
+    """
     with closing(get_db_connection()) as conn:
         cur = conn.cursor()
-        cur.execute("UPDATE providers SET name = ?, phone = ? WHERE id = ?", (name, phone, provider_id))
-        conn.commit()
-        return cur.rowcount > 0
+        cur.execute(query, (key, key))
+        return [dict(row) for row in cur.fetchall()]
+
+def _update_provider_tx(cur: sqlite3.Cursor, provider_id: int, name: str, phone: str) -> bool:
+    cur.execute("UPDATE providers SET name = ?, phone = ?, search_key = ? WHERE id = ?", 
+                (name, phone, normalize_text(name), provider_id))
+    after_commit(invalidate_provider_cache)
+    after_commit(events.publish, "providers", events.UPDATE, [provider_id])
+    return cur.rowcount > 0
+
+def update_provider(provider_id: int, name: str, phone: str) -> bool:
+    return run_write(_update_provider_tx, provider_id, name, phone)
+
+def _delete_provider_tx(cur: sqlite3.Cursor, provider_id: int) -> bool:
+    cur.execute("UPDATE providers SET active = 0 WHERE id = ?", (provider_id,))
+    after_commit(invalidate_provider_cache)
+    after_commit(events.publish, "providers", events.DELETE, [provider_id])
+    return cur.rowcount > 0
 
 def delete_provider(provider_id: int) -> bool:
-    with closing(get_db_connection()) as conn:
-        cur = conn.cursor()
-        cur.execute("UPDATE providers SET active = 0 WHERE id = ?", (provider_id,))
-        conn.commit()
-        return cur.rowcount > 0
+    return run_write(_delete_provider_tx, provider_id)
 
 def get_items_by_provider(provider_id: int) -> List[Dict[str, Any]]:
     with closing(get_db_connection()) as conn:
         cur = conn.cursor()
         query = """
-            SELECT id, sku, name, stock, min_stock, max_stock 
-            FROM items 
+            SELECT id, sku, name, stock, min_stock, max_stock
+            FROM items
             WHERE provider_id = ? AND active = 1
             ORDER BY name ASC
         """
         cur.execute(query, (provider_id,))
-        rows = cur.fetchall()
+        return [dict(row) for row in cur.fetchall()]
+
+# ------------------------------------------------------------------------------
+# DATOS PARA SUGERENCIAS DE PEDIDO (ver reorder.py)
+# Se devuelven tuplas planas (sin sqlite3.Row) porque van directo a arreglos.
+# ------------------------------------------------------------------------------
+
+def get_reorder_inputs() -> List[Tuple]:
+    """(id, provider_id, stock, min_stock, max_stock, price) de cada ítem activo, ordenado por id."""
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute("""
+            SELECT id, COALESCE(provider_id, 0), stock, COALESCE(min_stock, 0), 
+                   COALESCE(max_stock, 0), price
+            FROM items WHERE active = 1 ORDER BY id
+        """)
+        return cur.fetchall()
+
+def get_sold_qty_by_window(windows: Sequence[int], today: Optional[date] = None) -> List[Tuple]:
+    """
+    Unidades vendidas por ítem en cada ventana (días hacia atrás desde hoy).
+    Devuelve (item_id, qty_ventana_1, qty_ventana_2, ...) en un solo recorrido.
+    """
+    today = today or date.today()
+    starts = [(today - timedelta(days=w)).isoformat() for w in windows]
+    columns = ", ".join("SUM(CASE WHEN s.created_at >= ? THEN si.qty ELSE 0 END)" for _ in windows)
+    query = f"""
+        SELECT si.item_id, {columns}
+        FROM sales s
+        JOIN sale_items si ON si.sale_id = s.id
+        WHERE s.created_at >= ?
+        GROUP BY si.item_id
+    """
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute(query, (*starts, min(starts)))
+        return cur.fetchall()
+
+def get_reorder_state() -> Tuple:
+    """Firma barata de los datos que afectan las sugerencias: última venta y cambios en ítems."""
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute("""
+            SELECT (SELECT MAX(id) FROM sales), COUNT(*), TOTAL(version) 
+            FROM items WHERE active = 1
+        """)
+        return cur.fetchone()
+
+def get_order_report_rows() -> List[Dict[str, Any]]:
+    """Ítems activos con los datos de su proveedor, para el CSV de pedidos."""
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT i.id, i.sku, i.name, i.stock, i.min_stock, i.max_stock,
+                   p.name AS provider_name, p.phone AS provider_phone
+            FROM items i
+            LEFT JOIN providers p ON i.provider_id = p.id
+            WHERE i.active = 1
+            ORDER BY p.name ASC, i.name ASC
+        """)
+        return [dict(row) for row in cur.fetchall()]
+
+def _add_item_tx(cur: sqlite3.Cursor, sku: str, name: str, description: str, price: float, stock: int, 
+                 p_c1: float = 0, p_c2: float = 0, provider_id: Optional[int] = None,
+                 min_stock: int = 0, max_stock: int = 0, location: str = "") -> int:
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    search_key = item_search_key(sku, name, location)
+    
+    cur.execute("SELECT id, active FROM items WHERE sku = ?", (sku,))
+    row = cur.fetchone()
+    
+    if row:
+        item_id = row['id']
+        if row['active'] == 1:
+            raise ValueError(f"El SKU '{sku}' ya existe y está activo.")
         
-        result = []
-        for row in rows:
-            item = dict(row)
-            needed = 0
-            if item['max_stock'] > 0:
-                needed = item['max_stock'] - item['stock']
-                if needed < 0: needed = 0
-            
-            item['restock_qty'] = needed
-            result.append(item)
-            
-        return result
+        # Reactivar ítem si estaba borrado
+        _record_stock_set(cur, item_id, stock, MOVE_ADJUST, now)
+        query = """
+            UPDATE items 
+            SET name=?, description=?, price=?, stock=?, 
+                price_c1=?, price_c2=?, provider_id=?, 
+                min_stock=?, max_stock=?, location=?,
+                active=1, created_at=?, search_key=?
+            WHERE id=?
+        """
+        cur.execute(query, (name, description, price, stock, p_c1, p_c2, provider_id, 
+                            min_stock, max_stock, location, now, search_key, item_id))
+        after_commit(invalidate_item_cache, item_id)
+        after_commit(events.publish, "items", events.INSERT, [item_id])
+        return item_id
+    
+    # Crear ítem nuevo con todas las columnas
+    query = """
+        INSERT INTO items (
+            sku, name, description, price, stock, 
+            price_c1, price_c2, provider_id, created_at, active,
+            min_stock, max_stock, location, search_key
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
+    """
+    cur.execute(query, (sku, name, description, price, stock, p_c1, p_c2, provider_id, now, 
+                        min_stock, max_stock, location, search_key))
+    item_id = cur.lastrowid
+    if stock:
+        _insert_stock_movements(cur, [(item_id, stock, MOVE_INITIAL, None, now)])
+    after_commit(events.publish, "items", events.INSERT, [item_id])
+    return item_id
 
 def add_item(sku: str, name: str, description: str, price: float, stock: int, 
              p_c1: float = 0, p_c2: float = 0, provider_id: Optional[int] = None,
              min_stock: int = 0, max_stock: int = 0, location: str = "") -> int:
+    return run_write(_add_item_tx, sku, name, description, price, stock, p_c1, p_c2, 
+                     provider_id, min_stock, max_stock, location)
+
+# Columnas que aceptan add_items_bulk / update_items_bulk (mismos nombres que get_items)
+ITEM_BULK_FIELDS = ("name", "description", "price", "stock", "price_c1", "price_c2",
+                    "provider_id", "min_stock", "max_stock", "location")
+ITEM_BULK_DEFAULTS = {"description": "", "price_c1": 0, "price_c2": 0, "provider_id": None,
+                      "min_stock": 0, "max_stock": 0, "location": ""}
+
+def _bulk_item_error(row: Dict[str, Any], key: str) -> Optional[str]:
+    """Validación previa: con executemany una fila inválida abortaría el lote entero."""
+    unknown = set(row) - set(ITEM_BULK_FIELDS) - {key}
+    if unknown:
+        return f"Campos desconocidos: {', '.join(sorted(unknown))}"
+    if 'name' in row and not str(row['name'] or '').strip():
+        return "El nombre es obligatorio."
+    # bool es subclase de int: True se guardaría como 1
+    for field in ("price", "price_c1", "price_c2"):
+        if field in row and (isinstance(row[field], bool) or not isinstance(row[field], (int, float))):
+            return f"'{field}' debe ser un número."
+    for field in ("stock", "min_stock", "max_stock"):
+        if field in row and (isinstance(row[field], bool) or not isinstance(row[field], int)):
+            return f"'{field}' debe ser un entero."
+    provider_id = row.get('provider_id')
+    if provider_id is not None and (isinstance(provider_id, bool) or not isinstance(provider_id, int)):
+        return "'provider_id' debe ser un entero o None."
+    return None
+
+def _check_bulk_providers(cur: sqlite3.Cursor, rows: List[Dict[str, Any]], results: List[Dict[str, Any]]):
+    """Marca con error las filas cuyo provider_id no existe o está dado de baja (una consulta por tramo)."""
+    wanted = list({row['provider_id'] for row, result in zip(rows, results)
+                   if result['error'] is None and row.get('provider_id') is not None})
+    active = set()
+    for start in range(0, len(wanted), SQL_CHUNK_SIZE):
+        chunk = wanted[start:start + SQL_CHUNK_SIZE]
+        cur.execute(f"SELECT id FROM providers WHERE active = 1 AND id IN ({','.join('?' * len(chunk))})", chunk)
+        active.update(row[0] for row in cur.fetchall())
+    for row, result in zip(rows, results):
+        if result['error'] is None and row.get('provider_id') is not None and row['provider_id'] not in active:
+            result['error'] = f"El proveedor {row['provider_id']} no existe o está dado de baja."
+
+def _add_items_bulk_tx(cur: sqlite3.Cursor, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    with closing(get_db_connection()) as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT id, active FROM items WHERE sku = ?", (sku,))
-        row = cur.fetchone()
-        
-        if row:
-            item_id = row['id']
-            if row['active'] == 1:
-                raise ValueError(f"El SKU '{sku}' ya existe y está activo.")
-            
-            # Reactivar ítem si estaba borrado
-            query = """
-                UPDATE items 
-                SET name=?, description=?, price=?, stock=?, 
-                    price_c1=?, price_c2=?, provider_id=?, 
-                    min_stock=?, max_stock=?, location=?,
-                    active=1, created_at=?
-                WHERE id=?
-            """
-            cur.execute(query, (name, description, price, stock, p_c1, p_c2, provider_id, 
-                                min_stock, max_stock, location, now, item_id))
-            conn.commit()
-            return item_id
-        
+    results: List[Dict[str, Any]] = []
+    valid: Dict[str, Dict[str, Any]] = {}  # sku -> fila completa, en orden de llegada
+    for row in rows:
+        sku = str(row.get('sku') or '').strip()
+        result = {'sku': sku, 'id': None, 'status': 'error', 'error': None}
+        results.append(result)
+        if not sku:
+            result['error'] = "El SKU es obligatorio."
+        elif sku in valid:
+            result['error'] = f"El SKU '{sku}' está repetido en el lote."
+        elif 'name' not in row or 'price' not in row or 'stock' not in row:
+            result['error'] = "Faltan datos: name, price y stock son obligatorios."
         else:
-            # Crear ítem nuevo con todas las columnas
-            query = """
+            result['error'] = _bulk_item_error(row, 'sku')
+        if result['error'] is None:
+            valid[sku] = {**ITEM_BULK_DEFAULTS, **row, "sku": sku}
+    _check_bulk_providers(cur, rows, results)
+    valid = {result['sku']: valid[result['sku']] for result in results if result['error'] is None}
+
+    # Un solo SELECT (por tramos) en lugar de uno por SKU
+    existing: Dict[str, Tuple[int, int]] = {}
+    skus = list(valid)
+    for start in range(0, len(skus), SQL_CHUNK_SIZE):
+        chunk = skus[start:start + SQL_CHUNK_SIZE]
+        cur.execute(f"SELECT sku, id, active FROM items WHERE sku IN ({','.join('?' * len(chunk))})", chunk)
+        existing.update((sku, (item_id, active)) for sku, item_id, active in cur.fetchall())
+
+    new_rows, reactivated = [], []
+    for result in results:
+        if result['error'] is not None:
+            continue
+        r = valid[result['sku']]
+        found = existing.get(result['sku'])
+        if found and found[1] == 1:
+            result['error'] = f"El SKU '{result['sku']}' ya existe y está activo."
+            continue
+        values = (r['name'], r['description'], r['price'], r['stock'], r['price_c1'], r['price_c2'],
+                  r['provider_id'], r['min_stock'], r['max_stock'], r['location'],
+                  item_search_key(r['sku'], r['name'], r['location']))
+        if found:
+            result['id'], result['status'] = found[0], 'reactivated'
+            reactivated.append((found[0], r['stock'], values))
+        else:
+            result['status'] = 'created'
+            new_rows.append((r['sku'],) + values)
+
+    # Reactivar ítems borrados (igual que add_item), con su ajuste en el libro
+    cur.executemany("""
+        INSERT INTO stock_movements (item_id, delta, type, created_at)
+        SELECT id, ? - stock, ?, ? FROM items WHERE id = ? AND stock != ?
+    """, [(stock, MOVE_ADJUST, now, item_id, stock) for item_id, stock, _ in reactivated])
+    cur.executemany("""
+        UPDATE items 
+        SET name=?, description=?, price=?, stock=?, 
+            price_c1=?, price_c2=?, provider_id=?, 
+            min_stock=?, max_stock=?, location=?, search_key=?,
+            active=1, created_at=?
+        WHERE id=?
+    """, [values + (now, item_id) for item_id, _, values in reactivated])
+
+    cur.executemany("""
+        INSERT INTO items (
+            sku, name, description, price, stock, price_c1, price_c2, provider_id,
+            min_stock, max_stock, location, search_key, created_at, active
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+    """, [row + (now,) for row in new_rows])
+    # executemany no devuelve los ids: se leen por SKU en bloque
+    created = [row[0] for row in new_rows]
+    new_ids: Dict[str, int] = {}
+    for start in range(0, len(created), SQL_CHUNK_SIZE):
+        chunk = created[start:start + SQL_CHUNK_SIZE]
+        cur.execute(f"SELECT sku, id FROM items WHERE sku IN ({','.join('?' * len(chunk))})", chunk)
+        new_ids.update(cur.fetchall())
+    for result in results:
+        if result['status'] == 'created':
+            result['id'] = new_ids[result['sku']]
+    _insert_stock_movements(cur, [(new_ids[row[0]], row[4], MOVE_INITIAL, None, now) for row in new_rows if row[4]])
+
+    item_ids = [result['id'] for result in results if result['id'] is not None]
+    if reactivated:
+        after_commit(invalidate_item_cache)
+    if item_ids:
+        after_commit(events.publish, "items", events.INSERT, item_ids)
+    return results
+
+def add_items_bulk(items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Alta de muchos ítems en una sola transacción. Cada ítem: sku, name, price,
+    stock y opcionalmente description, price_c1, price_c2, provider_id,
+    min_stock, max_stock, location. Devuelve, en el mismo orden, un resultado
+    por ítem: {'sku', 'id', 'status': 'created' | 'reactivated' | 'error', 'error'}.
+    Las filas con error (SKU activo o repetido, datos inválidos, proveedor
+    inexistente o dado de baja) se saltan.
+    """
+    return run_write(_add_items_bulk_tx, list(items))
+
+def _import_items_tx(cur: sqlite3.Cursor, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    processed = 0
+    new_provider_ids = []
+    errors = []
+    stock_rows = []  # (sku, unidades) para el libro de movimientos
+
+    for r in rows:
+        try:
+            provider_id = None
+            if r.get('provider_name'):
+                cur.execute("SELECT id FROM providers WHERE name = ?", (r['provider_name'],))
+                row_prov = cur.fetchone()
+                if row_prov:
+                    provider_id = row_prov[0]
+                else:
+                    cur.execute("""
+                        INSERT INTO providers (name, phone, created_at, active, search_key) 
+                        VALUES (?, ?, ?, 1, ?)
+                    """, (r['provider_name'], r.get('provider_phone', ''), now, normalize_text(r['provider_name'])))
+                    provider_id = cur.lastrowid
+                    new_provider_ids.append(provider_id)
+
+            cur.execute("""
                 INSERT INTO items (
-                    sku, name, description, price, stock, 
-                    price_c1, price_c2, provider_id, created_at, active,
-                    min_stock, max_stock, location
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?)
-            """
-            cur.execute(query, (sku, name, description, price, stock, p_c1, p_c2, provider_id, now, 
-                                min_stock, max_stock, location))
-            conn.commit()
-            return cur.lastrowid
+                    sku, name, provider_id, location, description, 
+                    price, price_c1, price_c2, 
+                    stock, min_stock, max_stock, created_at, active, search_key
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)
+                ON CONFLICT(sku) DO UPDATE SET
+                    name=excluded.name,
+                    provider_id=excluded.provider_id,
+                    price=excluded.price,
+                    price_c1=excluded.price_c1,
+                    price_c2=excluded.price_c2,
+                    stock=stock + excluded.stock,
+                    search_key=item_search_key(sku, excluded.name, location)
+            """, (
+                r['sku'], r['name'], provider_id, r.get('location', ''), r.get('description', ''),
+                r.get('price', 0.0), r.get('price_c1', 0.0), r.get('price_c2', 0.0),
+                r.get('stock', 0), r.get('min_stock', 0), r.get('max_stock', 0), now,
+                item_search_key(r['sku'], r['name'], r.get('location', ''))
+            ))
+            stock_rows.append((r['sku'], r.get('stock', 0)))
+            processed += 1
+        except Exception as row_e:
+            errors.append(f"Fila {r.get('row', '?')}: {str(row_e)}")
+
+    record_stock_movements_by_sku(cur, stock_rows, MOVE_IMPORT, now)
+    # Los creados en esta importación tienen created_at = now; el resto se actualizó
+    new_ids, updated_ids = [], []
+    for start in range(0, len(stock_rows), SQL_CHUNK_SIZE):
+        chunk = [sku for sku, _ in stock_rows[start:start + SQL_CHUNK_SIZE]]
+        cur.execute(f"SELECT id, created_at = ? FROM items WHERE sku IN ({','.join('?' * len(chunk))})", 
+                    [now] + chunk)
+        for item_id, is_new in cur.fetchall():
+            (new_ids if is_new else updated_ids).append(item_id)
+    after_commit(invalidate_item_cache)
+    after_commit(events.publish, "items", events.INSERT, new_ids)
+    after_commit(events.publish, "items", events.UPDATE, updated_ids)
+    if new_provider_ids:
+        after_commit(invalidate_provider_cache)
+        after_commit(events.publish, "providers", events.INSERT, new_provider_ids)
+    return {'processed': processed, 'providers_created': len(new_provider_ids), 'errors': errors}
+
+def import_items(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Importación masiva (CSV). Cada fila: sku, name, provider_name, provider_phone,
+    location, description, price, price_c1, price_c2, stock, min_stock, max_stock
+    y 'row' (número de línea para los mensajes). Si el SKU existe se actualizan
+    nombre, proveedor y precios y el stock se SUMA. Los proveedores que no existen
+    se crean. Todo va en una sola transacción; las filas con error se saltan.
+    """
+    return run_write(_import_items_tx, rows)
+
+def _update_item_tx(cur: sqlite3.Cursor, item_id: int, name: str, description: str, price: float, stock: int,
+                    p_c1: float, p_c2: float, provider_id: Optional[int],
+                    min_stock: int, max_stock: int, location: str) -> bool:
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    _record_stock_set(cur, item_id, stock, MOVE_ADJUST, now)
+    query = """
+        UPDATE items 
+        SET name=?, description=?, price=?, stock=?, 
+            price_c1=?, price_c2=?, provider_id=?,
+            min_stock=?, max_stock=?, location=?,
+            search_key=item_search_key(sku, ?, ?)
+        WHERE id=?
+    """
+    cur.execute(query, (name, description, price, stock, p_c1, p_c2, provider_id, 
+                        min_stock, max_stock, location, name, location, item_id))
+    after_commit(invalidate_item_cache, item_id)
+    after_commit(events.publish, "items", events.UPDATE, [item_id])
+    return cur.rowcount > 0
 
 def update_item(item_id: int, name: str, description: str, price: float, stock: int,
                 p_c1: float, p_c2: float, provider_id: Optional[int],
                 min_stock: int, max_stock: int, location: str) -> bool:
+    return run_write(_update_item_tx, item_id, name, description, price, stock, p_c1, p_c2, 
+                     provider_id, min_stock, max_stock, location)
+
+def _update_items_bulk_tx(cur: sqlite3.Cursor, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    results: List[Dict[str, Any]] = []
+    valid: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        item_id = row.get('id')
+        result = {'id': item_id, 'status': 'error', 'error': None}
+        results.append(result)
+        if isinstance(item_id, bool) or not isinstance(item_id, int):
+            result['error'] = "Falta el id del ítem."
+        elif item_id in valid:
+            result['error'] = f"El ítem {item_id} está repetido en el lote."
+        elif len(row) == 1:
+            result['error'] = "No hay campos para actualizar."
+        else:
+            result['error'] = _bulk_item_error(row, 'id')
+        if result['error'] is None:
+            valid[item_id] = row
+    _check_bulk_providers(cur, rows, results)
+    valid = {result['id']: valid[result['id']] for result in results if result['error'] is None}
+
+    ids = list(valid)
+    found = set()
+    for start in range(0, len(ids), SQL_CHUNK_SIZE):
+        chunk = ids[start:start + SQL_CHUNK_SIZE]
+        cur.execute(f"SELECT id FROM items WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+        found.update(row[0] for row in cur.fetchall())
+
+    # Un UPDATE por combinación de campos (los que no vienen no se tocan)
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for result in results:
+        if result['error'] is not None:
+            continue
+        if result['id'] not in found:
+            result['status'] = 'not_found'
+            continue
+        row = valid[result['id']]
+        groups.setdefault(tuple(f for f in ITEM_BULK_FIELDS if f in row), []).append(row)
+        result['status'] = 'updated'
+
+    for fields, group in groups.items():
+        if 'stock' in fields:
+            cur.executemany("""
+                INSERT INTO stock_movements (item_id, delta, type, created_at)
+                SELECT id, ? - stock, ?, ? FROM items WHERE id = ? AND stock != ?
+            """, [(row['stock'], MOVE_ADJUST, now, row['id'], row['stock']) for row in group])
+        assignments = [f"{field}=?" for field in fields]
+        params = [[row[field] for field in fields] for row in group]
+        if 'name' in fields or 'location' in fields:
+            # Lo que no cambia se toma de la fila actual
+            assignments.append(f"search_key=item_search_key(sku, {'?' if 'name' in fields else 'name'}, "
+                               f"{'?' if 'location' in fields else 'location'})")
+            for values, row in zip(params, group):
+                values.extend(row[field] for field in ('name', 'location') if field in fields)
+        cur.executemany(f"UPDATE items SET {', '.join(assignments)} WHERE id=?",
+                        [values + [row['id']] for values, row in zip(params, group)])
+
+    updated = [result['id'] for result in results if result['status'] == 'updated']
+    if updated:
+        after_commit(invalidate_item_cache)
+        after_commit(events.publish, "items", events.UPDATE, updated)
+    return results
+
+def update_items_bulk(updates: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Modifica muchos ítems en una sola transacción. Cada elemento trae 'id' y solo
+    los campos a cambiar (ver ITEM_BULK_FIELDS); el stock se fija como en
+    update_item, registrando la diferencia en el libro. Devuelve, en el mismo
+    orden, {'id', 'status': 'updated' | 'not_found' | 'error', 'error'}.
+    """
+    return run_write(_update_items_bulk_tx, list(updates))
+
+# ------------------------------------------------------------------------------
+# CACHÉ DE LECTURA DE get_item_by_id (LRU)
+# Se alimenta con las filas que ya se mostraron en la tabla (get_items/search_items)
+# y se invalida en cada escritura de ítems. El TTL acota el tiempo que puede quedar
+# desactualizada por escrituras de otras cajas sobre el mismo archivo.
+# ------------------------------------------------------------------------------
+
+ITEM_CACHE_SIZE = 1000
+ITEM_CACHE_TTL = 30  # segundos
+
+_item_cache: "OrderedDict[int, tuple]" = OrderedDict()
+_item_cache_lock = threading.Lock()
+
+def _remember_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    now = time.monotonic()
+    with _item_cache_lock:
+        for item in items:
+            _item_cache[item['id']] = (now, dict(item))
+            _item_cache.move_to_end(item['id'])
+        while len(_item_cache) > ITEM_CACHE_SIZE:
+            _item_cache.popitem(last=False)
+    return items
+
+def invalidate_item_cache(item_id: Optional[int] = None):
+    """Descarta un ítem de la caché, o toda la caché si no se indica id."""
+    with _item_cache_lock:
+        if item_id is None:
+            _item_cache.clear()
+        else:
+            _item_cache.pop(int(item_id), None)
+
+def get_items(limit: int = 500) -> List[Dict[str, Any]]:
     with closing(get_db_connection()) as conn:
         cur = conn.cursor()
         query = """
-            UPDATE items 
-            SET name=?, description=?, price=?, stock=?, 
-                price_c1=?, price_c2=?, provider_id=?,
-                min_stock=?, max_stock=?, location=?
-            WHERE id=?
+            SELECT i.*, p.name as provider_name 
+            FROM items i 
+            LEFT JOIN providers p ON i.provider_id = p.id
+            WHERE i.active = 1 
+            ORDER BY i.id DESC LIMIT ?
         """
-        cur.execute(query, (name, description, price, stock, p_c1, p_c2, provider_id, 
-                            min_stock, max_stock, location, item_id))
-        conn.commit()
-        return cur.rowcount > 0
+        cur.execute(query, (limit,))
+        return _remember_items([dict(row) for row in cur.fetchall()])
 
-def get_items(limit: int = 500) -> List[Dict[str, Any]]:
+def get_items_by_ids(ids: List[int]) -> List[Dict[str, Any]]:
+    """Mismas columnas que get_items, solo para esos productos activos (refresco por eventos)."""
+    query = """
+        SELECT i.*, p.name as provider_name 
+        FROM items i 
+        LEFT JOIN providers p ON i.provider_id = p.id
+        WHERE i.active = 1 AND i.id IN ({})
+    """
+    result = []
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        for start in range(0, len(ids), SQL_CHUNK_SIZE):
+            chunk = ids[start:start + SQL_CHUNK_SIZE]
+            cur.execute(query.format(','.join('?' * len(chunk))), chunk)
+            result.extend(dict(row) for row in cur.fetchall())
+    return _remember_items(result)
+
+def get_sale_catalog(ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Catálogo activo, solo con las columnas que usa el punto de venta.
+    Con `ids` devuelve únicamente esos productos (refresco incremental).
+    """
+    query = """
+        SELECT id, sku, name, price, price_c1, price_c2, stock, version 
+        FROM items 
+        WHERE active = 1
+    """
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        if ids is None:
+            cur.execute(query)
+            return [dict(row) for row in cur.fetchall()]
+
+        result = []
+        for start in range(0, len(ids), SQL_CHUNK_SIZE):
+            chunk = ids[start:start + SQL_CHUNK_SIZE]
+            cur.execute(query + f" AND id IN ({','.join('?' * len(chunk))})", chunk)
+            result.extend(dict(row) for row in cur.fetchall())
+        return result
+
+def get_catalog_versions() -> Dict[int, int]:
+    """{id: versión} de los productos activos; barato de leer para detectar cambios."""
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id, version FROM items WHERE active = 1")
+        return dict(cur.fetchall())
+
+def search_items(text: str, limit: int = 500) -> List[Dict[str, Any]]:
+    """
+    Busca por SKU, nombre o ubicación sin importar tildes ni mayúsculas.
+    La comparación se hace contra items.search_key (ya normalizada al escribir),
+    así que no hay normalización en Python por cada fila.
+    """
+    key = normalize_text(text.strip())
+    if not key:
+        return get_items(limit)
     with closing(get_db_connection()) as conn:
         cur = conn.cursor()
         query = """
             SELECT i.*, p.name as provider_name 
             FROM items i 
             LEFT JOIN providers p ON i.provider_id = p.id
-            WHERE i.active = 1 
+            WHERE i.active = 1 AND instr(i.search_key, ?) > 0
             ORDER BY i.id DESC LIMIT ?
         """
-        cur.execute(query, (limit,))
-        return [dict(row) for row in cur.fetchall()]
+        cur.execute(query, (key, limit))
+        return _remember_items([dict(row) for row in cur.fetchall()])
 
 def get_item_by_id(item_id: int) -> Optional[Dict[str, Any]]:
+    item_id = int(item_id)
+    with _item_cache_lock:
+        entry = _item_cache.get(item_id)
+        if entry and time.monotonic() - entry[0] < ITEM_CACHE_TTL:
+            _item_cache.move_to_end(item_id)
+            return dict(entry[1])
+
     with closing(get_db_connection()) as conn:
         cur = conn.cursor()
         query = """
@@ -306,58 +1233,1119 @@ def get_item_by_id(item_id: int) -> Optional[Dict[str, Any]]:
         """
         cur.execute(query, (item_id,))
         row = cur.fetchone()
-        return dict(row) if row else None
+        if not row:
+            return None
+        item = dict(row)
+        _remember_items([item])
+        return dict(item)
+
+def _item_ids_by_sku(cur: sqlite3.Cursor, skus: List[str]) -> List[int]:
+    ids = []
+    for start in range(0, len(skus), SQL_CHUNK_SIZE):
+        chunk = skus[start:start + SQL_CHUNK_SIZE]
+        cur.execute(f"SELECT id FROM items WHERE sku IN ({','.join('?' * len(chunk))})", chunk)
+        ids.extend(row[0] for row in cur.fetchall())
+    return ids
+
+def _delete_item_by_sku_tx(cur: sqlite3.Cursor, sku: str) -> bool:
+    item_ids = _item_ids_by_sku(cur, [sku])
+    cur.execute("UPDATE items SET active = 0 WHERE sku = ?", (sku,))
+    for item_id in item_ids:
+        after_commit(invalidate_item_cache, item_id)
+    after_commit(events.publish, "items", events.DELETE, item_ids)
+    return cur.rowcount > 0
 
 def delete_item_by_sku(sku: str) -> bool:
+    return run_write(_delete_item_by_sku_tx, sku)
+
+def revalidate_cart(versions: Dict[int, int]) -> Dict[int, Optional[Dict[str, Any]]]:
+    """
+    Recibe {item_id: versión vista al armar el carrito} y relee solo esos productos.
+    Devuelve los que cambiaron desde entonces con sus datos actuales
+    (o None si ya no existen).
+    """
+    stale = {}
+    ids = list(versions)
     with closing(get_db_connection()) as conn:
         cur = conn.cursor()
-        cur.execute("UPDATE items SET active = 0 WHERE sku = ?", (sku,))
-        conn.commit()
-        return cur.rowcount > 0
+        for start in range(0, len(ids), SQL_CHUNK_SIZE):
+            chunk = ids[start:start + SQL_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cur.execute(f"""
+                SELECT id, version, stock, active, name, price, price_c1, price_c2 
+                FROM items WHERE id IN ({placeholders})
+            """, chunk)
+            found = set()
+            for row in cur.fetchall():
+                found.add(row['id'])
+                if row['version'] != versions[row['id']]:
+                    stale[row['id']] = dict(row)
+            for item_id in chunk:
+                if item_id not in found:
+                    stale[item_id] = None
+    return stale
 
-def register_sale(title: str, client_id: Optional[int], items_list: List[Dict], payment_method: str) -> int:
+class StockConflictError(ValueError):
+    """Otra caja vendió o cambió un producto del carrito antes del commit."""
+
+def _register_sale_tx(cur: sqlite3.Cursor, title: str, client_id: Optional[int], 
+                      items_list: List[Dict], payment_method: str) -> int:
     created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    total_sale = sum(item['qty'] * item['price'] for item in items_list)
+    
+    cur.execute("SELECT id FROM shifts WHERE closed_at IS NULL")
+    row = cur.fetchone()
+    shift_id = row['id'] if row else None
+    
+    cur.execute("""
+        INSERT INTO sales (title, client_id, total, payment_method, created_at, shift_id) 
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (title, client_id, total_sale, payment_method, created_at, shift_id))
+    
+    sale_id = cur.lastrowid
+    
+    # Control optimista dentro de la transacción: revalidate_cart lee antes, pero
+    # otra caja puede vender las mismas unidades entre esa lectura y este commit
+    qty_by_item: Dict[int, int] = {}
+    for item in items_list:
+        qty_by_item[item['id']] = qty_by_item.get(item['id'], 0) + item['qty']
+    for item_id, qty in qty_by_item.items():
+        cur.execute("UPDATE items SET stock = stock - ? WHERE id = ? AND active = 1 AND stock >= ?", 
+                    (qty, item_id, qty))
+        if cur.rowcount == 0:
+            cur.execute("SELECT name, stock, active FROM items WHERE id = ?", (item_id,))
+            row = cur.fetchone()
+            if row is None or not row['active']:
+                raise StockConflictError(f"• {row['name'] if row else item_id}: ya no está disponible")
+            raise StockConflictError(f"• {row['name']}: quedan {row['stock']}, en carrito {qty}")
+    cur.executemany("""
+        INSERT INTO sale_items (sale_id, item_id, item_name, qty, unit_price) 
+        VALUES (?, ?, ?, ?, ?)
+    """, [(sale_id, item['id'], item.get('name', 'Producto Desconocido'), item['qty'], item['price']) 
+          for item in items_list])
+    _insert_stock_movements(cur, [(item['id'], -item['qty'], MOVE_SALE, sale_id, created_at) 
+                                  for item in items_list])
+    
+    _apply_sale_rollups(cur, created_at[:10], payment_method, total_sale, items_list)
+    if shift_id is not None:
+        cur.execute("""
+            INSERT INTO shift_totals (shift_id, payment_method, revenue, sale_count) VALUES (?, ?, ?, 1)
+            ON CONFLICT(shift_id, payment_method) DO UPDATE SET 
+                revenue = revenue + excluded.revenue, sale_count = sale_count + 1
+        """, (shift_id, payment_method or '', total_sale))
+    for item in items_list:
+        after_commit(invalidate_item_cache, item['id'])
+    after_commit(events.publish, "items", events.UPDATE, list(dict.fromkeys(item['id'] for item in items_list)))
+    after_commit(events.publish, "sales", events.INSERT, [sale_id])
+    return sale_id
+
+def register_sale(title: str, client_id: Optional[int], items_list: List[Dict], payment_method: str) -> int:
+    return run_write(_register_sale_tx, title, client_id, items_list, payment_method)
+
+# ------------------------------------------------------------------------------
+# LIBRO DE MOVIMIENTOS DE STOCK
+# Cada cambio de items.stock deja una fila en stock_movements (delta, tipo y
+# referencia, ej. el id de la venta) dentro de la misma transacción. Nunca se
+# editan ni borran: la suma de deltas de un ítem es su stock actual.
+# stock_snapshots guarda fotos periódicas de todo el stock para consultar el
+# stock a una fecha sin recorrer el libro completo.
+# ------------------------------------------------------------------------------
+
+MOVE_OPENING = "opening"      # saldo al crear el libro en una base existente
+MOVE_INITIAL = "initial"      # alta de producto
+MOVE_SALE = "sale"            # ref_id = sales.id
+MOVE_ADJUST = "adjust"        # edición manual o reactivación
+MOVE_IMPORT = "import"        # importación CSV
+
+STOCK_SNAPSHOT_INTERVAL_DAYS = 7
+
+def _insert_stock_movements(cur: sqlite3.Cursor, rows: List[Tuple]):
+    """rows: (item_id, delta, type, ref_id, created_at). Se escriben en un solo lote."""
+    cur.executemany("""
+        INSERT INTO stock_movements (item_id, delta, type, ref_id, created_at) VALUES (?, ?, ?, ?, ?)
+    """, rows)
+
+def _record_stock_set(cur: sqlite3.Cursor, item_id: int, new_stock: int, movement_type: str, created_at: str):
+    """Registra la diferencia antes de fijar items.stock a un valor absoluto (ejecutar antes del UPDATE)."""
+    cur.execute("""
+        INSERT INTO stock_movements (item_id, delta, type, created_at)
+        SELECT id, ? - stock, ?, ? FROM items WHERE id = ? AND stock != ?
+    """, (new_stock, movement_type, created_at, item_id, new_stock))
+
+def record_stock_movements_by_sku(cur: sqlite3.Cursor, rows: List[Tuple[str, int]], 
+                                  movement_type: str = MOVE_IMPORT, created_at: Optional[str] = None):
+    """Igual que _insert_stock_movements pero identificando el ítem por SKU (importaciones)."""
+    created_at = created_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    cur.executemany("""
+        INSERT INTO stock_movements (item_id, delta, type, created_at)
+        SELECT id, ?, ?, ? FROM items WHERE sku = ?
+    """, [(delta, movement_type, created_at, sku) for sku, delta in rows if delta])
+
+def _take_stock_snapshot(cur: sqlite3.Cursor, taken_at: str) -> int:
+    cur.execute("""
+        INSERT OR REPLACE INTO stock_snapshots (taken_at, item_id, stock, last_movement_id)
+        SELECT ?, id, stock, (SELECT COALESCE(MAX(id), 0) FROM stock_movements) FROM items
+    """, (taken_at,))
+    return cur.rowcount
+
+def _take_stock_snapshot_if_due(cur: sqlite3.Cursor):
+    cur.execute("SELECT MAX(taken_at) FROM stock_snapshots")
+    last = cur.fetchone()[0]
+    due = (datetime.now() - timedelta(days=STOCK_SNAPSHOT_INTERVAL_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+    if last is None or last <= due:
+        _take_stock_snapshot(cur, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+def take_stock_snapshot() -> int:
+    """Guarda una foto del stock de todos los ítems. Devuelve la cantidad de filas."""
+    return run_write(_take_stock_snapshot, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+def get_stock_as_of(when: str, item_ids: Optional[List[int]] = None) -> Dict[int, int]:
+    """
+    Stock de cada ítem en el momento `when` ('YYYY-MM-DD' = fin de ese día, o
+    'YYYY-MM-DD HH:MM:SS'). Parte de la última foto anterior y suma solo los
+    movimientos posteriores a ella. Incluye los ítems ya borrados por
+    compact_catalog que tienen movimientos hasta esa fecha.
+    """
+    if len(when) == 10:
+        when += " 23:59:59"
     with closing(get_db_connection()) as conn:
-        try:
-            cur = conn.cursor()
-            cur.execute("BEGIN")
-            
-            total_sale = sum(item['qty'] * item['price'] for item in items_list)
-            
-            cur.execute("""
-                INSERT INTO sales (title, client_id, total, payment_method, created_at) 
-                VALUES (?, ?, ?, ?, ?)
-            """, (title, client_id, total_sale, payment_method, created_at))
-            
-            sale_id = cur.lastrowid
-            
-            for item in items_list:
-                cur.execute("UPDATE items SET stock = stock - ? WHERE id = ?", (item['qty'], item['id']))
-                
-                item_name = item.get('name', 'Producto Desconocido')
-                
+        cur = conn.cursor()
+        cur.execute("SELECT MAX(taken_at) FROM stock_snapshots WHERE taken_at <= ?", (when,))
+        snapshot_at = cur.fetchone()[0]
+        last_movement_id = 0
+        if snapshot_at is not None:
+            cur.execute("SELECT last_movement_id FROM stock_snapshots WHERE taken_at = ? LIMIT 1", (snapshot_at,))
+            last_movement_id = cur.fetchone()[0]
+
+        query = """
+            SELECT i.id, COALESCE(s.stock, 0) + COALESCE(m.delta, 0) AS stock
+            FROM ({ids}) i
+            LEFT JOIN stock_snapshots s ON s.taken_at = ? AND s.item_id = i.id
+            LEFT JOIN (
+                SELECT item_id, SUM(delta) AS delta FROM stock_movements
+                WHERE id > ? AND created_at <= ?
+                GROUP BY item_id
+            ) m ON m.item_id = i.id
+        """
+        params: List[Any] = [snapshot_at, last_movement_id, when]
+        result: Dict[int, int] = {}
+        if item_ids is None:
+            ids = "SELECT id FROM items UNION SELECT item_id FROM stock_movements WHERE created_at <= ?"
+            cur.execute(query.format(ids=ids), [when] + params)
+            result.update((row[0], row[1]) for row in cur.fetchall())
+        else:
+            for start in range(0, len(item_ids), SQL_CHUNK_SIZE):
+                chunk = item_ids[start:start + SQL_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                ids = (f"SELECT id FROM items WHERE id IN ({placeholders}) "
+                       f"UNION SELECT item_id FROM stock_movements WHERE item_id IN ({placeholders}) AND created_at <= ?")
+                cur.execute(query.format(ids=ids), chunk + chunk + [when] + params)
+                result.update((row[0], row[1]) for row in cur.fetchall())
+        return result
+
+def get_stock_movements(item_id: int, limit: int = 200) -> List[Dict[str, Any]]:
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id, delta, type, ref_id, created_at FROM stock_movements 
+            WHERE item_id = ? ORDER BY id DESC LIMIT ?
+        """, (item_id, limit))
+        return [dict(row) for row in cur.fetchall()]
+
+# ------------------------------------------------------------------------------
+# VALORIZACIÓN DE INVENTARIO
+# inventory_valuation guarda, por (proveedor, ubicación), cantidad de ítems
+# activos, unidades y su valor a precio público / c1 / c2. Triggers sobre items
+# restan la fila vieja y suman la nueva en la misma transacción de cada
+# escritura (add_item, update_item, register_sale, importación CSV...), así el
+# reporte lee unas pocas filas. verify_valuation / rebuild_valuation comparan
+# y regeneran desde el catálogo.
+# ------------------------------------------------------------------------------
+
+def _valuation_delta_sql(row: str, sign: str) -> str:
+    """UPDATE que suma (sign='+') o resta (sign='-') la fila OLD/NEW de items."""
+    return f"""
+        UPDATE inventory_valuation SET
+            item_count = item_count {sign} 1,
+            units = units {sign} {row}.stock,
+            value = value {sign} {row}.stock * {row}.price,
+            value_c1 = value_c1 {sign} {row}.stock * COALESCE({row}.price_c1, 0),
+            value_c2 = value_c2 {sign} {row}.stock * COALESCE({row}.price_c2, 0)
+        WHERE {row}.active = 1
+          AND provider_id = COALESCE({row}.provider_id, 0) AND location = COALESCE({row}.location, '');
+    """
+
+def _valuation_key_sql(row: str) -> str:
+    # Primero aseguramos que exista la fila y luego el UPDATE la ajusta. No usamos
+    # INSERT OR IGNORE: si la sentencia externa trae su propio ON CONFLICT (la
+    # importación CSV hace UPSERT), SQLite aplica esa política dentro del trigger.
+    return f"""
+        INSERT INTO inventory_valuation (provider_id, location)
+        SELECT COALESCE({row}.provider_id, 0), COALESCE({row}.location, '') 
+        WHERE {row}.active = 1 AND NOT EXISTS (
+            SELECT 1 FROM inventory_valuation 
+            WHERE provider_id = COALESCE({row}.provider_id, 0) AND location = COALESCE({row}.location, '')
+        );
+    """
+
+def _create_valuation_triggers(cur: sqlite3.Cursor):
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_valuation_insert AFTER INSERT ON items
+        BEGIN
+            {_valuation_key_sql('NEW')}
+            {_valuation_delta_sql('NEW', '+')}
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_valuation_delete AFTER DELETE ON items
+        BEGIN
+            {_valuation_delta_sql('OLD', '-')}
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_valuation_update 
+        AFTER UPDATE OF stock, price, price_c1, price_c2, provider_id, location, active ON items
+        BEGIN
+            {_valuation_delta_sql('OLD', '-')}
+            {_valuation_key_sql('NEW')}
+            {_valuation_delta_sql('NEW', '+')}
+        END
+    """)
+
+VALUATION_LIVE_SQL = """
+    SELECT COALESCE(provider_id, 0) AS provider_id, COALESCE(location, '') AS location,
+           COUNT(*) AS item_count, SUM(stock) AS units, SUM(stock * price) AS value,
+           SUM(stock * COALESCE(price_c1, 0)) AS value_c1, SUM(stock * COALESCE(price_c2, 0)) AS value_c2
+    FROM items WHERE active = 1
+    GROUP BY 1, 2
+"""
+
+def _rebuild_valuation(cur: sqlite3.Cursor):
+    cur.execute("DELETE FROM inventory_valuation")
+    cur.execute(f"""
+        INSERT INTO inventory_valuation (provider_id, location, item_count, units, value, value_c1, value_c2)
+        {VALUATION_LIVE_SQL}
+    """)
+
+def rebuild_valuation():
+    run_write(_rebuild_valuation)
+
+def verify_valuation(tolerance: float = 0.01) -> List[Dict[str, Any]]:
+    """
+    Compara los totales guardados con un recálculo desde items.
+    Devuelve las filas (proveedor, ubicación) que no coinciden; vacío = todo bien.
+    """
+    fields = ('item_count', 'units', 'value', 'value_c1', 'value_c2')
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM inventory_valuation WHERE item_count != 0")
+        stored = {(r['provider_id'], r['location']): dict(r) for r in cur.fetchall()}
+        cur.execute(VALUATION_LIVE_SQL)
+        live = {(r['provider_id'], r['location']): dict(r) for r in cur.fetchall()}
+
+    mismatches = []
+    for key in stored.keys() | live.keys():
+        s, l = stored.get(key), live.get(key)
+        if s is None or l is None or any(abs((s[f] or 0) - (l[f] or 0)) > tolerance for f in fields):
+            mismatches.append({'provider_id': key[0], 'location': key[1], 'stored': s, 'live': l})
+    return mismatches
+
+def get_inventory_valuation(group_by: str = "provider") -> List[Dict[str, Any]]:
+    """Valorización agrupada por 'provider' o por 'location', de mayor a menor valor."""
+    if group_by == "location":
+        label_sql, group_sql = "CASE WHEN v.location = '' THEN NULL ELSE v.location END", "v.location"
+    else:
+        label_sql, group_sql = "p.name", "v.provider_id"
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT {label_sql} AS label, SUM(v.item_count) AS item_count, SUM(v.units) AS units,
+                   SUM(v.value) AS value, SUM(v.value_c1) AS value_c1, SUM(v.value_c2) AS value_c2
+            FROM inventory_valuation v
+            LEFT JOIN providers p ON p.id = v.provider_id
+            WHERE v.item_count != 0
+            GROUP BY {group_sql}
+            ORDER BY value DESC
+        """)
+        return [dict(row) for row in cur.fetchall()]
+
+def get_valuation_totals() -> Dict[str, Any]:
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT COALESCE(SUM(item_count), 0) AS item_count, COALESCE(SUM(units), 0) AS units,
+                   COALESCE(SUM(value), 0) AS value, COALESCE(SUM(value_c1), 0) AS value_c1,
+                   COALESCE(SUM(value_c2), 0) AS value_c2
+            FROM inventory_valuation
+        """)
+        return dict(cur.fetchone())
+
+# ------------------------------------------------------------------------------
+# RESÚMENES DIARIOS DE VENTAS
+# sales_daily / sales_daily_item / sales_daily_payment guardan ingresos, unidades
+# y cantidad de líneas por día. Se actualizan dentro de la misma transacción de
+# register_sale, así los reportes de meses o años leen unas pocas filas por día
+# en lugar de recorrer todas las ventas. rebuild_sales_rollups() los regenera.
+# ------------------------------------------------------------------------------
+
+def _apply_sale_rollups(cur: sqlite3.Cursor, day: str, payment_method: str, total: float, items_list: List[Dict]):
+    per_item: Dict[int, List] = {}
+    for item in items_list:
+        acc = per_item.setdefault(item['id'], [0.0, 0, 0])
+        acc[0] += item['qty'] * item['price']
+        acc[1] += item['qty']
+        acc[2] += 1
+
+    cur.execute("""
+        INSERT INTO sales_daily (day, revenue, sale_count, units, line_count) VALUES (?, ?, 1, ?, ?)
+        ON CONFLICT(day) DO UPDATE SET 
+            revenue = revenue + excluded.revenue, sale_count = sale_count + 1,
+            units = units + excluded.units, line_count = line_count + excluded.line_count
+    """, (day, total, sum(acc[1] for acc in per_item.values()), len(items_list)))
+    cur.executemany("""
+        INSERT INTO sales_daily_item (day, item_id, revenue, units, line_count) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(day, item_id) DO UPDATE SET 
+            revenue = revenue + excluded.revenue, units = units + excluded.units,
+            line_count = line_count + excluded.line_count
+    """, [(day, item_id, *acc) for item_id, acc in per_item.items()])
+    cur.execute("""
+        INSERT INTO sales_daily_payment (day, payment_method, revenue, sale_count) VALUES (?, ?, ?, 1)
+        ON CONFLICT(day, payment_method) DO UPDATE SET 
+            revenue = revenue + excluded.revenue, sale_count = sale_count + 1
+    """, (day, payment_method or '', total))
+
+def _rebuild_sales_rollups_tx(cur: sqlite3.Cursor) -> int:
+    days = _rebuild_sales_rollups(cur)
+    after_commit(clear_abc_cache)
+    return days
+
+def _rebuild_sales_rollups(cur: sqlite3.Cursor) -> int:
+    # Las ventas anteriores al corte del archivo ya no están en `sales`:
+    # esos días (y los turnos abiertos antes del corte) conservan sus totales.
+    since = _get_archive_cutoff(cur) or ''
+    cur.execute("DELETE FROM sales_daily WHERE day >= ?", (since,))
+    cur.execute("DELETE FROM sales_daily_item WHERE day >= ?", (since,))
+    cur.execute("DELETE FROM sales_daily_payment WHERE day >= ?", (since,))
+    cur.execute("""
+        INSERT INTO sales_daily (day, revenue, sale_count, units, line_count)
+        SELECT substr(s.created_at, 1, 10), SUM(s.total), COUNT(*), 
+               COALESCE(SUM(l.units), 0), COALESCE(SUM(l.lines), 0)
+        FROM sales s
+        LEFT JOIN (
+            SELECT sale_id, SUM(qty) AS units, COUNT(*) AS lines FROM sale_items GROUP BY sale_id
+        ) l ON l.sale_id = s.id
+        WHERE s.created_at >= ?
+        GROUP BY 1
+    """, (since,))
+    cur.execute("""
+        INSERT INTO sales_daily_item (day, item_id, revenue, units, line_count)
+        SELECT substr(s.created_at, 1, 10), si.item_id, SUM(si.qty * si.unit_price), SUM(si.qty), COUNT(*)
+        FROM sale_items si
+        JOIN sales s ON s.id = si.sale_id
+        WHERE si.item_id IS NOT NULL AND s.created_at >= ?
+        GROUP BY 1, 2
+    """, (since,))
+    cur.execute("""
+        INSERT INTO sales_daily_payment (day, payment_method, revenue, sale_count)
+        SELECT substr(created_at, 1, 10), COALESCE(payment_method, ''), SUM(total), COUNT(*)
+        FROM sales
+        WHERE created_at >= ?
+        GROUP BY 1, 2
+    """, (since,))
+    kept_shifts = "SELECT id FROM shifts WHERE opened_at < ?"
+    cur.execute(f"DELETE FROM shift_totals WHERE shift_id NOT IN ({kept_shifts})", (since,))
+    cur.execute(f"""
+        INSERT INTO shift_totals (shift_id, payment_method, revenue, sale_count)
+        SELECT shift_id, COALESCE(payment_method, ''), SUM(total), COUNT(*)
+        FROM sales
+        WHERE shift_id IS NOT NULL AND shift_id NOT IN ({kept_shifts})
+        GROUP BY 1, 2
+    """, (since,))
+    cur.execute("SELECT COUNT(*) FROM sales_daily")
+    return cur.fetchone()[0]
+
+def rebuild_sales_rollups() -> int:
+    """Regenera los resúmenes diarios desde el historial completo. Devuelve la cantidad de días."""
+    return run_write(_rebuild_sales_rollups_tx)
+
+def get_sales_summary(start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+    """Totales del período (fechas 'YYYY-MM-DD', inclusivas; None = sin límite) desde los resúmenes."""
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT COALESCE(SUM(revenue), 0) AS revenue, COALESCE(SUM(sale_count), 0) AS sale_count,
+                   COALESCE(SUM(units), 0) AS units, COALESCE(SUM(line_count), 0) AS line_count
+            FROM sales_daily
+            WHERE day >= COALESCE(?, '') AND day <= COALESCE(?, '9999-12-31')
+        """, (start, end))
+        return dict(cur.fetchone())
+
+def get_daily_sales(start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT day, revenue, sale_count, units, line_count FROM sales_daily
+            WHERE day >= COALESCE(?, '') AND day <= COALESCE(?, '9999-12-31')
+            ORDER BY day
+        """, (start, end))
+        return [dict(row) for row in cur.fetchall()]
+
+def get_sales_by_payment(start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT payment_method, SUM(revenue) AS revenue, SUM(sale_count) AS sale_count
+            FROM sales_daily_payment
+            WHERE day >= COALESCE(?, '') AND day <= COALESCE(?, '9999-12-31')
+            GROUP BY payment_method
+            ORDER BY revenue DESC
+        """, (start, end))
+        return [dict(row) for row in cur.fetchall()]
+
+# ------------------------------------------------------------------------------
+# TURNOS DE CAJA (CORTE DE CAJA)
+# register_sale suma cada venta en shift_totals del turno abierto, así el
+# corte solo lee unas pocas filas por método de pago.
+# ------------------------------------------------------------------------------
+
+CASH_PAYMENT_METHOD = "Efectivo"
+
+def get_open_shift() -> Optional[Dict[str, Any]]:
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM shifts WHERE closed_at IS NULL")
+        row = cur.fetchone()
+        return dict(row) if row else None
+
+def _open_shift_tx(cur: sqlite3.Cursor, opening_cash: float = 0.0, notes: str = "") -> int:
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        cur.execute("INSERT INTO shifts (opened_at, opening_cash, notes) VALUES (?, ?, ?)", 
+                    (now, opening_cash, notes))
+    except sqlite3.IntegrityError:
+        raise ValueError("Ya hay un turno abierto. Ciérralo antes de abrir otro.")
+    shift_id = cur.lastrowid
+    after_commit(events.publish, "shifts", events.INSERT, [shift_id])
+    return shift_id
+
+def open_shift(opening_cash: float = 0.0, notes: str = "") -> int:
+    return run_write(_open_shift_tx, opening_cash, notes)
+
+def _close_shift_tx(cur: sqlite3.Cursor, shift_id: int, counted_cash: float):
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    cur.execute("""
+        UPDATE shifts SET closed_at = ?, counted_cash = ? 
+        WHERE id = ? AND closed_at IS NULL
+    """, (now, counted_cash, shift_id))
+    if cur.rowcount == 0:
+        raise ValueError(f"El turno #{shift_id} no existe o ya fue cerrado.")
+    after_commit(events.publish, "shifts", events.UPDATE, [shift_id])
+
+def close_shift(shift_id: int, counted_cash: float) -> Dict[str, Any]:
+    """Cierra el turno con el efectivo contado y devuelve su reporte final."""
+    run_write(_close_shift_tx, shift_id, counted_cash)
+    return get_shift_report(shift_id)
+
+def get_shift_report(shift_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Datos del turno + totales por método de pago, total general,
+    efectivo esperado en caja y diferencia con lo contado (si ya cerró).
+    """
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM shifts WHERE id = ?", (shift_id,))
+        row = cur.fetchone()
+        if not row:
+            return None
+        report = dict(row)
+        cur.execute("""
+            SELECT payment_method, revenue, sale_count FROM shift_totals 
+            WHERE shift_id = ? ORDER BY revenue DESC
+        """, (shift_id,))
+        report['by_payment'] = [dict(r) for r in cur.fetchall()]
+
+    report['total'] = sum(p['revenue'] for p in report['by_payment'])
+    report['sale_count'] = sum(p['sale_count'] for p in report['by_payment'])
+    cash_sales = sum(p['revenue'] for p in report['by_payment'] if p['payment_method'] == CASH_PAYMENT_METHOD)
+    report['expected_cash'] = report['opening_cash'] + cash_sales
+    report['difference'] = (report['counted_cash'] - report['expected_cash'] 
+                            if report['counted_cash'] is not None else None)
+    return report
+
+def get_recent_shifts(limit: int = 30) -> List[Dict[str, Any]]:
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM shifts ORDER BY id DESC LIMIT ?", (limit,))
+        return [dict(row) for row in cur.fetchall()]
+
+# ------------------------------------------------------------------------------
+# REGISTRO DE CAMBIOS (CDC) PARA SINCRONIZAR SUCURSALES
+# Triggers sobre providers / items / sales / sale_items anotan en change_log
+# qué fila cambió, con un número de secuencia creciente. change_log guarda una
+# sola entrada por fila (la última): exportar "desde N" lee las filas cambiadas
+# después de N tal como están ahora, sin repetir los cambios intermedios.
+# apply_changes() aplica ese paquete sobre una réplica de la sucursal (una base
+# por sucursal en la casa matriz); mientras aplica, una fila en cdc_pause apaga
+# los triggers dentro de la misma transacción.
+# ------------------------------------------------------------------------------
+
+CDC_TABLES = ("providers", "items", "sales", "sale_items")  # orden de aplicación
+CDC_FORMAT = 1
+CDC_UPSERT = "U"
+CDC_DELETE = "D"
+
+def _create_cdc_triggers(cur: sqlite3.Cursor):
+    for table in CDC_TABLES:
+        for event, row, op in (("INSERT", "NEW", CDC_UPSERT), ("UPDATE", "NEW", CDC_UPSERT), ("DELETE", "OLD", CDC_DELETE)):
+            # DELETE + INSERT en lugar de INSERT OR REPLACE: un UPSERT externo
+            # (ej. importación CSV) impondría su propio manejo de conflictos.
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_cdc_{table}_{event.lower()}
+                AFTER {event} ON {table}
+                WHEN NOT EXISTS (SELECT 1 FROM cdc_pause)
+                BEGIN
+                    DELETE FROM change_log WHERE table_name = '{table}' AND row_id = {row}.id;
+                    INSERT INTO change_log (table_name, row_id, op) VALUES ('{table}', {row}.id, '{op}');
+                END
+            """)
+
+def get_store_id() -> str:
+    with closing(get_db_connection()) as conn:
+        return conn.execute("SELECT value FROM app_meta WHERE key = 'store_id'").fetchone()[0]
+
+def get_applied_sources() -> List[Dict[str, Any]]:
+    """Sucursales aplicadas sobre esta base y hasta qué secuencia."""
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT source, last_seq, applied_at FROM cdc_applied ORDER BY source")
+        return [dict(row) for row in cur.fetchall()]
+
+def export_changes(since_seq: int = 0) -> Dict[str, Any]:
+    """
+    Paquete con las filas cambiadas después de `since_seq`:
+    {'format', 'store_id', 'from_seq', 'to_seq', 'created_at',
+     'tables': {tabla: {'columns': [...], 'rows': [[...], ...], 'deleted': [ids]}}}
+    """
+    # El registro y las filas se leen de la misma foto. Si quien llama ya abrió
+    # read_snapshot(), se usa la suya (sin BEGIN ni rollback propios)
+    with read_snapshot(), closing(get_db_connection()) as conn:
+        has_archive = _attach_archive(conn)
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute("SELECT value FROM app_meta WHERE key = 'store_id'")
+        store_id = cur.fetchone()[0]
+        cur.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log")
+        to_seq = cur.fetchone()[0]
+
+        changed = {table: ([], []) for table in CDC_TABLES}  # (ids a copiar, ids borrados)
+        cur.execute("SELECT table_name, row_id, op FROM change_log WHERE seq > ? AND seq <= ? ORDER BY seq", 
+                    (since_seq, to_seq))
+        for table, row_id, op in cur.fetchall():
+            if table in changed:
+                changed[table][op == CDC_DELETE].append(row_id)
+
+        tables = {}
+        for table, (ids, deleted) in changed.items():
+            if not ids and not deleted:
+                continue
+            cur.execute(f"PRAGMA table_info({table})")
+            columns = [col[1] for col in cur.fetchall()]
+            rows = []
+            # Una venta que pasó al archivo sigue existiendo: se lee de allí
+            schemas = ["main", "archive"] if has_archive and table in ARCHIVE_TABLES else ["main"]
+            pending = ids
+            for schema in schemas:
+                for start in range(0, len(pending), SQL_CHUNK_SIZE):
+                    chunk = pending[start:start + SQL_CHUNK_SIZE]
+                    cur.execute(f"SELECT {', '.join(columns)} FROM {schema}.{table} WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                    rows.extend(list(row) for row in cur.fetchall())
+                found = {row[columns.index('id')] for row in rows}
+                pending = [row_id for row_id in pending if row_id not in found]
+            # Si la fila ya no está, viaja como borrada
+            deleted = deleted + [row_id for row_id in ids if row_id not in found]
+            tables[table] = {'columns': columns, 'rows': rows, 'deleted': deleted}
+
+    return {
+        'format': CDC_FORMAT, 'store_id': store_id, 'from_seq': since_seq, 'to_seq': to_seq,
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'tables': tables,
+    }
+
+def _apply_changes_tx(cur: sqlite3.Cursor, changes: Dict[str, Any]) -> Dict[str, Any]:
+    if changes.get('format') != CDC_FORMAT:
+        raise ValueError(f"Formato de paquete no soportado: {changes.get('format')}")
+    source = changes['store_id']
+    cur.execute("SELECT value FROM app_meta WHERE key = 'store_id'")
+    if cur.fetchone()[0] == source:
+        raise ValueError("El paquete salió de esta misma base; se aplica sobre la réplica de la sucursal.")
+
+    cur.execute("SELECT last_seq FROM cdc_applied WHERE source = ?", (source,))
+    row = cur.fetchone()
+    last_seq = row[0] if row else 0
+    if changes['from_seq'] > last_seq:
+        raise ValueError(f"Faltan cambios: esta réplica llegó hasta la secuencia {last_seq} "
+                         f"y el paquete empieza en {changes['from_seq']}. Exporta desde {last_seq}.")
+    result = {'source': source, 'last_seq': max(last_seq, changes['to_seq']), 'rows': 0, 'deleted': 0}
+    if changes['to_seq'] <= last_seq:
+        return result
+
+    cur.execute("INSERT INTO cdc_pause (paused) VALUES (1)")
+    tables = changes.get('tables', {})
+
+    # Primero los borrados (un SKU borrado puede reaparecer con otro id)
+    for table in reversed(CDC_TABLES):
+        deleted = tables.get(table, {}).get('deleted', [])
+        for start in range(0, len(deleted), SQL_CHUNK_SIZE):
+            chunk = deleted[start:start + SQL_CHUNK_SIZE]
+            cur.execute(f"DELETE FROM {table} WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+            result['deleted'] += cur.rowcount
+
+    new_sale_ids = []
+    for table in CDC_TABLES:
+        data = tables.get(table)
+        if not data or not data['rows']:
+            continue
+        # Solo columnas que existen aquí (la sucursal puede tener otra versión del esquema)
+        cur.execute(f"PRAGMA table_info({table})")
+        local_columns = {col[1] for col in cur.fetchall()}
+        columns = [col for col in data['columns'] if col in local_columns]
+        positions = [data['columns'].index(col) for col in columns]
+        rows = [[row[p] for p in positions] for row in data['rows']]
+
+        if table == "sales":
+            # Las ventas nuevas se suman a los resúmenes diarios más abajo
+            ids = [row[columns.index('id')] for row in rows]
+            for start in range(0, len(ids), SQL_CHUNK_SIZE):
+                chunk = ids[start:start + SQL_CHUNK_SIZE]
+                cur.execute(f"SELECT id FROM sales WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                existing = {r[0] for r in cur.fetchall()}
+                new_sale_ids.extend(sale_id for sale_id in chunk if sale_id not in existing)
+
+        updates = ", ".join(f"{col} = excluded.{col}" for col in columns if col != 'id')
+        cur.executemany(f"""
+            INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
+            ON CONFLICT(id) DO UPDATE SET {updates}
+        """, rows)
+        result['rows'] += len(rows)
+
+    _apply_rollups_for_sales(cur, new_sale_ids)
+
+    cur.execute("DELETE FROM cdc_pause")
+    cur.execute("""
+        INSERT INTO cdc_applied (source, last_seq, applied_at) VALUES (?, ?, ?)
+        ON CONFLICT(source) DO UPDATE SET last_seq = excluded.last_seq, applied_at = excluded.applied_at
+    """, (source, result['last_seq'], datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+
+    after_commit(invalidate_item_cache)
+    after_commit(invalidate_provider_cache)
+    for table in ("providers", "items", "sales"):
+        if table in tables:
+            after_commit(events.publish, table, events.UPDATE, None)
+    return result
+
+def _apply_rollups_for_sales(cur: sqlite3.Cursor, sale_ids: List[int]):
+    for start in range(0, len(sale_ids), SQL_CHUNK_SIZE):
+        chunk = sale_ids[start:start + SQL_CHUNK_SIZE]
+        placeholders = ','.join('?' * len(chunk))
+        lines: Dict[int, List[Dict]] = {}
+        cur.execute(f"SELECT sale_id, item_id, qty, unit_price FROM sale_items WHERE sale_id IN ({placeholders})", chunk)
+        for sale_id, item_id, qty, price in cur.fetchall():
+            lines.setdefault(sale_id, []).append({'id': item_id, 'qty': qty, 'price': price})
+        cur.execute(f"SELECT id, created_at, payment_method, total FROM sales WHERE id IN ({placeholders})", chunk)
+        for sale_id, created_at, payment_method, total in cur.fetchall():
+            _apply_sale_rollups(cur, (created_at or '')[:10], payment_method, total or 0, lines.get(sale_id, []))
+
+def apply_changes(changes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aplica un paquete de export_changes() de otra base. Se puede aplicar dos veces
+    (lo ya aplicado se ignora); si falta un paquete intermedio lanza ValueError.
+    """
+    return run_write(_apply_changes_tx, changes)
+
+# ------------------------------------------------------------------------------
+# ANÁLISIS ABC (qué productos generan los ingresos)
+# A = productos que juntos suman el primer 80% de los ingresos del rango,
+# B = hasta el 95%, C = el resto. Se guardan los últimos ABC_CACHE_SIZE rangos
+# de fechas consultados y se descartan cuando entra una venta nueva.
+# ------------------------------------------------------------------------------
+
+ABC_A_SHARE = 0.80
+ABC_B_SHARE = 0.95
+ABC_CACHE_SIZE = 8
+
+_abc_cache: "OrderedDict[Tuple[str, str], List[Dict[str, Any]]]" = OrderedDict()
+_abc_cache_sale_id: Optional[int] = None
+# El servidor atiende consultas desde varios hilos a la vez
+_abc_cache_lock = threading.Lock()
+
+def clear_abc_cache():
+    with _abc_cache_lock:
+        _abc_cache.clear()
+
+def get_abc_report(start: str, end: str) -> List[Dict[str, Any]]:
+    """
+    Ranking por ingresos y por unidades de los productos vendidos entre
+    `start` y `end` ('YYYY-MM-DD', inclusivas), con participación
+    acumulada y clase A/B/C. Una sola consulta sobre sales_daily_item.
+    """
+    global _abc_cache_sale_id
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT MAX(id) FROM sales")
+        last_sale_id = cur.fetchone()[0]
+        with _abc_cache_lock:
+            if last_sale_id != _abc_cache_sale_id:
+                _abc_cache.clear()
+                _abc_cache_sale_id = last_sale_id
+            cached = _abc_cache.get((start, end))
+            if cached is not None:
+                _abc_cache.move_to_end((start, end))
+        if cached is not None:
+            # Copias: quien ordene o modifique el resultado no toca la caché
+            return [dict(row) for row in cached]
+
+        cur.execute("""
+            WITH per_item AS (
+                SELECT item_id, SUM(revenue) AS revenue, SUM(units) AS units
+                FROM sales_daily_item
+                WHERE day >= ? AND day <= ?
+                GROUP BY item_id
+            ),
+            ranked AS (
+                SELECT 
+                    p.item_id, i.sku, COALESCE(i.name, 'Producto Desconocido') AS name,
+                    p.revenue, p.units,
+                    RANK() OVER (ORDER BY p.revenue DESC) AS revenue_rank,
+                    RANK() OVER (ORDER BY p.units DESC) AS units_rank,
+                    p.revenue / NULLIF(SUM(p.revenue) OVER (), 0) AS share,
+                    SUM(p.revenue) OVER (ORDER BY p.revenue DESC, p.item_id ROWS UNBOUNDED PRECEDING)
+                        / NULLIF(SUM(p.revenue) OVER (), 0) AS cumulative_share
+                FROM per_item p
+                LEFT JOIN items i ON i.id = p.item_id
+            )
+            SELECT *,
+                CASE 
+                    WHEN share IS NULL THEN 'C'
+                    WHEN cumulative_share - share < ? THEN 'A'
+                    WHEN cumulative_share - share < ? THEN 'B'
+                    ELSE 'C'
+                END AS tier
+            FROM ranked
+            ORDER BY revenue DESC, item_id
+        """, (start, end, ABC_A_SHARE, ABC_B_SHARE))
+        rows = [dict(row) for row in cur.fetchall()]
+        with _abc_cache_lock:
+            # Si entró una venta mientras consultábamos, el resultado ya no se guarda
+            if last_sale_id == _abc_cache_sale_id:
+                _abc_cache[(start, end)] = rows
+                while len(_abc_cache) > ABC_CACHE_SIZE:
+                    _abc_cache.popitem(last=False)
+        return [dict(row) for row in rows]
+
+# ------------------------------------------------------------------------------
+# ARCHIVO DE VENTAS ANTIGUAS
+# archive_sales() mueve las ventas anteriores a una fecha de corte (con su
+# detalle) a archive.db, junto a la base, en lotes de ARCHIVE_CHUNK ventas por
+# transacción. La base activa queda chica: respaldos, VACUUM y caché rápidos.
+# Los resúmenes diarios, los turnos y el libro de stock no se tocan, así que los
+# reportes por período siguen completos. Las consultas de ventas sueltas
+# (historial, detalle, exportación JSON) adjuntan el archivo solo cuando el
+# rango pedido llega a fechas anteriores al corte, guardado en app_meta.
+# ------------------------------------------------------------------------------
+
+ARCHIVE_FILE = "archive.db"
+ARCHIVE_TABLES = ("sales", "sale_items")
+ARCHIVE_MIN_DAYS = 365   # nunca se archiva lo que usa el cálculo de pedidos (reorder.py)
+ARCHIVE_CHUNK = 5000     # ventas por transacción: el bloqueo de escritura dura poco
+
+# archive_sales y compact_catalog no corren a la vez en este proceso: compactar
+# mira qué ítems figuran en archive.db antes de su transacción de borrado
+_archive_lock = threading.Lock()
+
+def get_archive_path() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), ARCHIVE_FILE)
+
+def _get_archive_cutoff(cur: sqlite3.Cursor) -> Optional[str]:
+    cur.execute("SELECT value FROM app_meta WHERE key = 'archive_before'")
+    row = cur.fetchone()
+    return row[0] if row else None
+
+def get_archive_cutoff() -> Optional[str]:
+    """Fecha 'YYYY-MM-DD': las ventas anteriores están en archive.db. None si nunca se archivó."""
+    with closing(get_db_connection()) as conn:
+        return _get_archive_cutoff(conn.cursor())
+
+def _attach_archive(conn: sqlite3.Connection, since: Optional[str] = None) -> bool:
+    """
+    Adjunta archive.db como `archive` si existe y hace falta para leer desde
+    `since` ('YYYY-MM-DD'; None = cualquier fecha). Fuera de una transacción.
+    """
+    cutoff = _get_archive_cutoff(conn.cursor())
+    if not cutoff or (since is not None and since >= cutoff):
+        return False
+    if isinstance(conn, _SnapshotConnection):
+        return conn.has_archive  # ya adjuntado por read_snapshot()
+    path = get_archive_path()
+    if not os.path.exists(path):
+        return False
+    conn.execute("ATTACH DATABASE ? AS archive", (path,))
+    return True
+
+def _sync_archive_schema(cur: sqlite3.Cursor):
+    """Crea (o completa con columnas nuevas) las tablas del archivo con el esquema de la base activa."""
+    for table in ARCHIVE_TABLES:
+        cur.execute(f"PRAGMA main.table_info({table})")
+        columns = [(col[1], col[2], col[5]) for col in cur.fetchall()]
+        definitions = ", ".join(f"{name} {decl}{' PRIMARY KEY' if pk else ''}" for name, decl, pk in columns)
+        cur.execute(f"CREATE TABLE IF NOT EXISTS archive.{table} ({definitions})")
+        cur.execute(f"PRAGMA archive.table_info({table})")
+        existing = {col[1] for col in cur.fetchall()}
+        for name, decl, _ in columns:
+            if name not in existing:
+                cur.execute(f"ALTER TABLE archive.{table} ADD COLUMN {name} {decl}")
+    cur.execute("CREATE INDEX IF NOT EXISTS archive.idx_sales_created ON sales(created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS archive.idx_sale_items_sale ON sale_items(sale_id)")
+
+def _set_archive_cutoff_tx(cur: sqlite3.Cursor, before: str):
+    cur.execute("""
+        INSERT INTO app_meta (key, value) VALUES ('archive_before', ?)
+        ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)
+    """, (before,))
+
+def _delete_archived_sales_tx(cur: sqlite3.Cursor, sale_ids: List[int]) -> int:
+    # Mover no es borrar: las réplicas de sync.py conservan su historial
+    cur.execute("INSERT INTO cdc_pause (paused) VALUES (1)")
+    for start in range(0, len(sale_ids), SQL_CHUNK_SIZE):
+        chunk = sale_ids[start:start + SQL_CHUNK_SIZE]
+        placeholders = ",".join("?" * len(chunk))
+        cur.execute(f"DELETE FROM sale_items WHERE sale_id IN ({placeholders})", chunk)
+        cur.execute(f"DELETE FROM sales WHERE id IN ({placeholders})", chunk)
+    cur.execute("DELETE FROM cdc_pause")
+    return len(sale_ids)
+
+def archive_sales(before: str) -> Dict[str, Any]:
+    """
+    Mueve a archive.db las ventas con fecha anterior a `before` ('YYYY-MM-DD').
+    Devuelve {'sales', 'lines', 'archive_before', 'path'}. Cada lote se copia
+    en una transacción que solo escribe archive.db y se borra de la base activa
+    en otra, por run_write (la cola de escritura en modo servidor): en modo WAL
+    un commit sobre dos archivos no es atómico entre ellos, así un corte deja a
+    lo sumo ventas repetidas (las lecturas las ignoran) y volver a ejecutarla
+    termina el trabajo (las filas ya copiadas se reemplazan).
+    """
+    date.fromisoformat(before)
+    limit = (date.today() - timedelta(days=ARCHIVE_MIN_DAYS)).isoformat()
+    if before > limit:
+        raise ValueError(f"Solo se archivan ventas de hace más de {ARCHIVE_MIN_DAYS} días (anteriores al {limit}).")
+
+    path = get_archive_path()
+    result = {'sales': 0, 'lines': 0, 'archive_before': before, 'path': path}
+    with _archive_lock, closing(_connect()) as conn:
+        cur = conn.cursor()
+        cur.execute("ATTACH DATABASE ? AS archive", (path,))
+        _sync_archive_schema(cur)
+        conn.commit()
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS archive_batch (id INTEGER PRIMARY KEY)")
+        columns = {}
+        for table in ARCHIVE_TABLES:
+            cur.execute(f"PRAGMA main.table_info({table})")
+            columns[table] = ", ".join(col[1] for col in cur.fetchall())
+
+        # El corte se guarda antes de mover: las lecturas ya miran el archivo
+        run_write(_set_archive_cutoff_tx, before)
+        while True:
+            try:
+                # BEGIN diferido: la copia solo lee la base activa y no toma su bloqueo de escritura
+                cur.execute("BEGIN")
+                cur.execute("DELETE FROM archive_batch")
                 cur.execute("""
-                    INSERT INTO sale_items (sale_id, item_id, item_name, qty, unit_price) 
-                    VALUES (?, ?, ?, ?, ?)
-                """, (sale_id, item['id'], item_name, item['qty'], item['price']))
-            
-            conn.commit()
-            return sale_id
-        except Exception as e:
-            conn.rollback()
-            raise e
+                    INSERT INTO archive_batch (id)
+                    SELECT id FROM main.sales WHERE created_at < ? ORDER BY created_at LIMIT ?
+                """, (before, ARCHIVE_CHUNK))
+                sale_ids = [row[0] for row in cur.execute("SELECT id FROM archive_batch").fetchall()]
+                if sale_ids:
+                    cur.execute(f"""
+                        INSERT OR REPLACE INTO archive.sales ({columns['sales']})
+                        SELECT {columns['sales']} FROM main.sales WHERE id IN (SELECT id FROM archive_batch)
+                    """)
+                    cur.execute(f"""
+                        INSERT OR REPLACE INTO archive.sale_items ({columns['sale_items']})
+                        SELECT {columns['sale_items']} FROM main.sale_items WHERE sale_id IN (SELECT id FROM archive_batch)
+                    """)
+                    result['lines'] += cur.rowcount
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                raise e
+
+            if sale_ids:
+                result['sales'] += run_write(_delete_archived_sales_tx, sale_ids)
+            if len(sale_ids) < ARCHIVE_CHUNK:
+                break
+
+    if result['sales']:
+        events.publish("sales", events.DELETE, None)
+    return result
+
+# ------------------------------------------------------------------------------
+# COMPACTACIÓN DEL CATÁLOGO
+# delete_item_by_sku / delete_provider solo marcan active = 0 para no romper el
+# historial, así que las bajas siguen ocupando lugar en cada recorrido y en el
+# índice único de SKU. compact_catalog() borra de verdad lo que ya no hace falta:
+# ítems inactivos que ninguna venta menciona (tampoco en archive.db) y
+# proveedores inactivos sin ítems. El libro de stock (movimientos y fotos) se
+# conserva: get_stock_as_of sigue contando esos ítems en fechas pasadas. Después
+# reconstruye los índices de esas tablas y libera el espacio, todo en una
+# transacción de run_write. Los triggers de change_log anotan los borrados: las
+# réplicas de sync.py también los quitan.
+# ------------------------------------------------------------------------------
+
+COMPACT_REINDEX = ("items", "providers")
+
+def _archived_item_ids() -> List[int]:
+    """Ítems que figuran en ventas de archive.db (se leen fuera de la transacción: ATTACH no puede ir dentro)."""
+    with closing(_connect()) as conn:
+        if not _attach_archive(conn):
+            return []
+        cur = conn.execute("SELECT DISTINCT item_id FROM archive.sale_items WHERE item_id IS NOT NULL")
+        return [row[0] for row in cur.fetchall()]
+
+def _compact_catalog_tx(cur: sqlite3.Cursor, archived_ids: List[int]) -> Dict[str, Any]:
+    result = {'items': 0, 'providers': 0}
+    page_size = cur.execute("PRAGMA main.page_size").fetchone()[0]
+    result['pages_before'] = cur.execute("PRAGMA main.page_count").fetchone()[0]
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS compact_keep (id INTEGER PRIMARY KEY)")
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS purge_ids (id INTEGER PRIMARY KEY)")
+    cur.execute("DELETE FROM compact_keep")
+    cur.executemany("INSERT OR IGNORE INTO compact_keep (id) VALUES (?)", [(item_id,) for item_id in archived_ids])
+
+    cur.execute("DELETE FROM purge_ids")
+    cur.execute("""
+        INSERT INTO purge_ids (id) SELECT id FROM main.items 
+        WHERE active = 0 
+          AND id NOT IN (SELECT item_id FROM main.sale_items WHERE item_id IS NOT NULL)
+          AND id NOT IN (SELECT id FROM compact_keep)
+    """)
+    item_ids = [row[0] for row in cur.execute("SELECT id FROM purge_ids").fetchall()]
+    if item_ids:
+        cur.execute("DELETE FROM main.items WHERE id IN (SELECT id FROM purge_ids)")
+        result['items'] = cur.rowcount
+
+    cur.execute("DELETE FROM purge_ids")
+    cur.execute("""
+        INSERT INTO purge_ids (id) SELECT id FROM main.providers 
+        WHERE active = 0 AND id NOT IN (SELECT provider_id FROM main.items WHERE provider_id IS NOT NULL)
+    """)
+    provider_ids = [row[0] for row in cur.execute("SELECT id FROM purge_ids").fetchall()]
+    if provider_ids:
+        cur.execute("DELETE FROM main.providers WHERE id IN (SELECT id FROM purge_ids)")
+        result['providers'] = cur.rowcount
+
+    if item_ids or provider_ids:
+        for table in COMPACT_REINDEX:
+            cur.execute(f"REINDEX main.{table}")
+    # Con vacuum incremental (ver maintenance.py) las páginas vuelven al disco al
+    # confirmar. Cada execute() del PRAGMA libera una página (executescript
+    # confirmaría la transacción), así que se repite por cada página libre.
+    if cur.execute("PRAGMA main.auto_vacuum").fetchone()[0] == 2:
+        for _ in range(cur.execute("PRAGMA main.freelist_count").fetchone()[0]):
+            cur.execute("PRAGMA main.incremental_vacuum")
+    result['pages_after'] = cur.execute("PRAGMA main.page_count").fetchone()[0]
+    result['free_pages'] = cur.execute("PRAGMA main.freelist_count").fetchone()[0]
+    result['reclaimed_bytes'] = max(result['pages_before'] - result['pages_after'], 0) * page_size
+
+    if item_ids:
+        after_commit(invalidate_item_cache)
+        after_commit(events.publish, "items", events.DELETE, item_ids)
+    if provider_ids:
+        after_commit(invalidate_provider_cache)
+        after_commit(events.publish, "providers", events.DELETE, provider_ids)
+    return result
+
+def compact_catalog() -> Dict[str, Any]:
+    """
+    Devuelve {'items', 'providers', 'pages_before', 'pages_after',
+    'reclaimed_bytes', 'free_pages'}. free_pages es espacio que queda libre dentro
+    del archivo (se reutiliza) si la base todavía no usa vacuum incremental.
+    """
+    with _archive_lock:
+        result = run_write(_compact_catalog_tx, _archived_item_ids())
+    # Checkpoint pasivo: achica el archivo sin frenar a las cajas (política en maintenance.py)
+    with closing(_connect()) as conn:
+        if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+    return result
+
+def get_sales_with_details(start: str, end: str) -> List[Dict[str, Any]]:
+    """Ventas entre `start` y `end` ('YYYY-MM-DD', inclusivas), cada una con su lista 'items_sold'."""
+    # Rango sobre created_at tal cual (usa el índice), fin de día inclusivo
+    range_sql = "created_at >= ? AND created_at < date(?, '+1 day')"
+    with closing(get_db_connection()) as conn:
+        schemas = ["main", "archive"] if _attach_archive(conn, start) else ["main"]
+        cur = conn.cursor()
+        sales = []
+        sales_by_id = {}
+        for schema in schemas:
+            cur.execute(f"SELECT * FROM {schema}.sales WHERE {range_sql} ORDER BY id", (start, end))
+            schema_ids = set()
+            for row in cur.fetchall():
+                sale = dict(row)
+                if sale['id'] in sales_by_id:
+                    continue  # archivada a medias: ya se leyó de la base activa
+                sale['items_sold'] = []
+                sales_by_id[sale['id']] = sale
+                schema_ids.add(sale['id'])
+                sales.append(sale)
+
+            # Todos los detalles del rango en una sola consulta
+            cur.execute(f"""
+                SELECT sale_id, item_name, qty, unit_price 
+                FROM {schema}.sale_items 
+                WHERE sale_id IN (SELECT id FROM {schema}.sales WHERE {range_sql})
+                ORDER BY id
+            """, (start, end))
+            for row in cur.fetchall():
+                line = dict(row)
+                sale_id = line.pop('sale_id')
+                if sale_id not in schema_ids:
+                    continue
+                line['subtotal'] = line['qty'] * line['unit_price']
+                sales_by_id[sale_id]['items_sold'].append(line)
+        if len(schemas) > 1:
+            sales.sort(key=lambda sale: sale['id'])
+        return sales
 
 def get_all_sales(limit: int = 1000) -> List[Dict[str, Any]]:
     with closing(get_db_connection()) as conn:
         cur = conn.cursor()
         query = """
             SELECT id, title, client_id, total, payment_method, created_at 
-            FROM sales 
+            FROM {schema}.sales 
             ORDER BY created_at DESC 
             LIMIT ?
         """
-        cur.execute(query, (limit,))
-        return [dict(row) for row in cur.fetchall()]
+        cur.execute(query.format(schema="main"), (limit,))
+        sales = [dict(row) for row in cur.fetchall()]
+        # Lo archivado es siempre anterior: solo se lee si no alcanzan las recientes
+        if len(sales) < limit and _attach_archive(conn):
+            seen = {sale['id'] for sale in sales}
+            cur.execute(query.format(schema="archive"), (limit - len(sales),))
+            sales.extend(dict(row) for row in cur.fetchall() if row['id'] not in seen)
+        return sales
+
+def get_sales_by_ids(ids: List[int]) -> List[Dict[str, Any]]:
+    """Mismas columnas que get_all_sales, solo para esas ventas."""
+    result = []
+    with closing(get_db_connection()) as conn:
+        cur = conn.cursor()
+        for start in range(0, len(ids), SQL_CHUNK_SIZE):
+            chunk = ids[start:start + SQL_CHUNK_SIZE]
+            cur.execute(f"""
+                SELECT id, title, client_id, total, payment_method, created_at 
+                FROM sales WHERE id IN ({','.join('?' * len(chunk))})
+                ORDER BY created_at DESC
+            """, chunk)
+            result.extend(dict(row) for row in cur.fetchall())
+    return result
 
 def get_sale_details(sale_id: int) -> List[Dict[str, Any]]:
     query = """
@@ -367,14 +2355,31 @@ def get_sale_details(sale_id: int) -> List[Dict[str, Any]]:
             si.unit_price, 
             (si.qty * si.unit_price) as subtotal, 
             i.sku               
-        FROM sale_items si 
-        LEFT JOIN items i ON si.item_id = i.id 
+        FROM {schema}.sale_items si 
+        LEFT JOIN main.items i ON si.item_id = i.id 
         WHERE si.sale_id = ?
+        ORDER BY si.id
     """
     with closing(get_db_connection()) as conn:
         cur = conn.cursor()
-        cur.execute(query, (sale_id,))
-        return [dict(row) for row in cur.fetchall()]
+        cur.execute(query.format(schema="main"), (sale_id,))
+        lines = [dict(row) for row in cur.fetchall()]
+        if not lines and _attach_archive(conn):
+            cur.execute(query.format(schema="archive"), (sale_id,))
+            lines = [dict(row) for row in cur.fetchall()]
+        return lines
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    init_db()
+    # python db.py --rebuild-rollups  -> regenera los resúmenes diarios desde el historial
+    if "--rebuild-rollups" in sys.argv[1:]:
+        print(f"Resúmenes de ventas regenerados: {rebuild_sales_rollups()} días.")
+    # python db.py --archive-before 2024-01-01  -> mueve esas ventas a archive.db
+    if "--archive-before" in sys.argv[1:]:
+        moved = archive_sales(sys.argv[sys.argv.index("--archive-before") + 1])
+        print(f"Archivadas {moved['sales']} ventas ({moved['lines']} líneas) en {moved['path']}.")
+    # python db.py --compact  -> borra productos y proveedores dados de baja sin ventas
+    if "--compact" in sys.argv[1:]:
+        purged = compact_catalog()
+        print(f"Borrados {purged['items']} productos y {purged['providers']} proveedores; "
+              f"{purged['reclaimed_bytes'] / 1024:,.0f} KB liberados.")
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Modo terminal: la app usa el servidor local (server.py) en lugar del archivo.
+
+install() reemplaza en el módulo `db` las funciones que expone el servidor por
+versiones que hacen la llamada por HTTP, así las vistas y diálogos siguen
+llamando `db.get_items(...)`, `db.register_sale(...)`, etc. sin cambios.
+Se activa con la variable de entorno EASYINV_SERVER=host:puerto.
+Los eventos de cambio que devuelve cada escritura se vuelven a publicar aquí,
+así las vistas se actualizan igual que con la base local.
+"""
+import http.client
+import os
+import threading
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import db
+import events
+import server
+
+SERVER_ENV = "EASYINV_SERVER"
+TIMEOUT = 15  # segundos
+
+# Excepciones que se vuelven a lanzar con su tipo original en la terminal
+_ERROR_TYPES = {"ValueError": ValueError, "TypeError": TypeError, "LookupError": LookupError,
+                "KeyError": KeyError, "IndexError": IndexError,
+                "StockConflictError": db.StockConflictError}
+
+
+class ServerError(RuntimeError):
+    """El servidor no respondió o falló al procesar el pedido."""
+
+
+class ApiClient:
+    """Cliente HTTP con una conexión keep-alive por hilo."""
+
+    def __init__(self, address: str, token: str = ""):
+        parts = urlsplit(address if "://" in address else f"http://{address}")
+        self.host = parts.hostname or server.DEFAULT_HOST
+        self.port = parts.port or server.DEFAULT_PORT
+        self.token = token
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=TIMEOUT)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def call(self, name: str, args=(), kwargs=None) -> Any:
+        body = server.dumps({"args": list(args), "kwargs": kwargs or {}})
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers[server.TOKEN_HEADER] = self.token
+
+        # Las lecturas se reintentan una vez (ej. el servidor se reinició y la
+        # conexión keep-alive quedó muerta). Las escrituras no: podrían aplicarse dos veces.
+        retries = 1 if name not in server.WRITE_ENDPOINTS else 0
+        while True:
+            conn = self._connection()
+            try:
+                conn.request("POST", f"/api/{name}", body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, OSError) as e:
+                self._drop_connection()
+                if retries == 0:
+                    raise ServerError(f"Sin respuesta del servidor {self.host}:{self.port} en '{name}': {e}")
+                retries -= 1
+
+        payload = server.loads(data) or {}
+        if payload.get("ok"):
+            for table, action, ids in payload.get("events", ()):
+                events.publish(table, action, ids)
+            return payload.get("result")
+        error_type = _ERROR_TYPES.get(payload.get("type"), ServerError)
+        raise error_type(payload.get("error") or f"Error del servidor (HTTP {response.status})")
+
+
+_client: Optional[ApiClient] = None
+
+def _remote(name: str):
+    def call(*args, **kwargs):
+        return _client.call(name, args, kwargs)
+    call.__name__ = name
+    call.__doc__ = f"db.{name} ejecutado en el servidor."
+    return call
+
+
+def install(address: Optional[str] = None) -> bool:
+    """
+    Conecta con el servidor y redirige las funciones de `db`.
+    Devuelve False (sin tocar nada) si no hay servidor configurado.
+    """
+    global _client
+    address = address or os.environ.get(SERVER_ENV)
+    if not address:
+        return False
+
+    _client = ApiClient(address, os.environ.get(server.TOKEN_ENV, ""))
+    _client.call("ping")  # falla rápido si el servidor no está disponible
+
+    for name in server.READ_ENDPOINTS | server.WRITE_ENDPOINTS:
+        setattr(db, name, _remote(name))
+    db.REMOTE_SERVER = f"{_client.host}:{_client.port}"
+    return True
@@ -0,0 +1,58 @@
+"""
+Diálogos precargados.
+
+Construir el árbol de widgets de "Nueva Venta" o de los formularios de ítems
+es lo más lento al abrirlos en equipos modestos. Aquí se construye cada uno
+una sola vez y se reutiliza: abrirlo de nuevo solo cuesta un reset().
+"""
+from PyQt5.QtCore import QTimer
+
+from dialogs.dlg_add_item import AddItemDialog
+from dialogs.dlg_edit_item import EditItemDialog
+from dialogs.dlg_sale import SaleDialog
+
+_pool = {}
+
+# La venta primero: su catálogo se carga en un hilo aparte y conviene arrancarlo ya
+WARM_UP_ORDER = (SaleDialog, AddItemDialog, EditItemDialog)
+
+
+def _acquire(dialog_class, parent):
+    dialog = _pool.get(dialog_class)
+    if dialog is None:
+        dialog = dialog_class(parent=parent)
+        _pool[dialog_class] = dialog
+    elif parent is not None and dialog.parent() is not parent:
+        # Conservamos las banderas de ventana para que siga siendo un diálogo
+        dialog.setParent(parent, dialog.windowFlags())
+    return dialog
+
+
+def warm_up():
+    """
+    Construye los diálogos por adelantado (se llama al arrancar, con el event loop
+    ya activo). Uno por vuelta del event loop, para que la ventana siga respondiendo.
+    """
+    pending = [dialog_class for dialog_class in WARM_UP_ORDER if dialog_class not in _pool]
+    if pending:
+        _acquire(pending[0], None)
+    if len(pending) > 1:
+        QTimer.singleShot(0, warm_up)
+
+
+def sale_dialog(parent=None) -> SaleDialog:
+    dialog = _acquire(SaleDialog, parent)
+    dialog.reset()
+    return dialog
+
+
+def add_item_dialog(parent=None) -> AddItemDialog:
+    dialog = _acquire(AddItemDialog, parent)
+    dialog.reset()
+    return dialog
+
+
+def edit_item_dialog(item_data, parent=None) -> EditItemDialog:
+    dialog = _acquire(EditItemDialog, parent)
+    dialog.load_item(item_data)
+    return dialog
@@ -0,0 +1,116 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QLabel, QPushButton, QHeaderView, QDateEdit, QAbstractItemView
+)
+from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtGui import QColor, QFont
+import db
+
+# Colores por clase: A = lo que más vende, C = lo que casi no aporta
+TIER_COLORS = {'A': "#27ae60", 'B': "#f39c12", 'C': "#95a5a6"}
+
+
+class AbcReportDialog(QDialog):
+    """Productos más vendidos y clasificación ABC por ingresos en un rango de fechas."""
+
+    COLUMNS = ["Clase", "#", "SKU", "Producto", "Ingresos", "% Ingresos", "% Acumulado", "Unidades", "# Unid."]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Productos Más Vendidos (Análisis ABC)")
+        self.setMinimumSize(850, 550)
+        self.setup_ui()
+        self.load_report()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        # Rango de fechas (por defecto: últimos 30 días)
+        h_range = QHBoxLayout()
+        self.date_start = QDateEdit()
+        self.date_start.setCalendarPopup(True)
+        self.date_start.setDisplayFormat("yyyy-MM-dd")
+        self.date_start.setDate(QDate.currentDate().addDays(-30))
+
+        self.date_end = QDateEdit()
+        self.date_end.setCalendarPopup(True)
+        self.date_end.setDisplayFormat("yyyy-MM-dd")
+        self.date_end.setDate(QDate.currentDate())
+
+        btn_run = QPushButton("Generar")
+        btn_run.setCursor(Qt.PointingHandCursor)
+        btn_run.setStyleSheet("background-color: #2980b9; color: white; font-weight: bold; padding: 6px 15px;")
+        btn_run.clicked.connect(self.load_report)
+
+        h_range.addWidget(QLabel("Desde:"))
+        h_range.addWidget(self.date_start)
+        h_range.addWidget(QLabel("Hasta:"))
+        h_range.addWidget(self.date_end)
+        h_range.addStretch()
+        h_range.addWidget(btn_run)
+        layout.addLayout(h_range)
+
+        self.lbl_summary = QLabel("")
+        self.lbl_summary.setStyleSheet("font-size: 13px; color: #34495e; padding: 5px;")
+        layout.addWidget(self.lbl_summary)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(3, QHeaderView.Stretch)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setAlternatingRowColors(True)
+        layout.addWidget(self.table)
+
+        btn_close = QPushButton("Cerrar")
+        btn_close.setCursor(Qt.PointingHandCursor)
+        btn_close.setStyleSheet("padding: 8px;")
+        btn_close.clicked.connect(self.accept)
+        layout.addWidget(btn_close)
+
+    def load_report(self):
+        start = self.date_start.date().toString("yyyy-MM-dd")
+        end = self.date_end.date().toString("yyyy-MM-dd")
+        if start > end:
+            start, end = end, start
+
+        rows = db.get_abc_report(start, end)
+        self.table.setRowCount(len(rows))
+
+        tiers = {'A': [0, 0.0], 'B': [0, 0.0], 'C': [0, 0.0]}
+        for r, row in enumerate(rows):
+            tiers[row['tier']][0] += 1
+            tiers[row['tier']][1] += row['revenue']
+
+            tier_item = QTableWidgetItem(row['tier'])
+            tier_item.setTextAlignment(Qt.AlignCenter)
+            tier_item.setForeground(QColor("white"))
+            tier_item.setBackground(QColor(TIER_COLORS[row['tier']]))
+            tier_item.setFont(QFont("Arial", weight=QFont.Bold))
+
+            values = [
+                str(row['revenue_rank']),
+                row['sku'] or "-",
+                row['name'],
+                f"$ {row['revenue']:,.2f}",
+                f"{(row['share'] or 0) * 100:.1f} %",
+                f"{(row['cumulative_share'] or 0) * 100:.1f} %",
+                str(row['units']),
+                str(row['units_rank']),
+            ]
+            self.table.setItem(r, 0, tier_item)
+            for c, value in enumerate(values, start=1):
+                cell = QTableWidgetItem(value)
+                if c != 3:
+                    cell.setTextAlignment(Qt.AlignCenter)
+                self.table.setItem(r, c, cell)
+
+        if not rows:
+            self.lbl_summary.setText("No hay ventas en el rango seleccionado.")
+            return
+        self.lbl_summary.setText("   |   ".join(
+            f"<b>Clase {tier}:</b> {count} productos ($ {revenue:,.2f})"
+            for tier, (count, revenue) in tiers.items()
+        ))
@@ -5,6 +5,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QEvent, QTimer
 import db
+from models import get_provider_model
 
 class AutoExpandComboBox(QComboBox):
     """
@@ -21,57 +22,31 @@ class AddItemDialog(QDialog):
         self.setWindowTitle("Agregar Nuevo Ítem")
         self.setMinimumWidth(450) # Un poco más ancho para que se vea bien
 
-        #estilos de la app
-        self.input_style = """
-            QLineEdit, QSpinBox, QTextEdit { 
-                background-color: white; 
-                border: 1px solid #bdc3c7; 
-                border-radius: 4px; 
-                padding: 4px; 
-            }
-            QLineEdit:focus, QSpinBox:focus, QTextEdit:focus { 
-                border: 2px solid #3498db; 
-            }
-        """
-        
-        self.combo_style = """
-            QComboBox {
-                background-color: white; 
-                border: 1px solid #bdc3c7; 
-                border-radius: 4px;
-                padding: 4px;
-            }
-            QComboBox:focus { border: 2px solid #3498db; }
-            QComboBox::drop-down { border: 0px; }
-        """
+        # Los estilos vienen de la hoja global (styles.py), por objectName
+        self.setObjectName("ItemFormDialog")
 
         #CAMPOS BASICOS
         
         # SKU
         self.sku_input = QLineEdit()
         self.sku_input.setPlaceholderText("Ej: USB-KING-32GB")
-        self.sku_input.setStyleSheet(self.input_style)
         
         # Nombre
         self.name_input = QLineEdit()
         self.name_input.setPlaceholderText("Ej: Memoria USB 32GB")
-        self.name_input.setStyleSheet(self.input_style)
 
         # Selección de proveedor (Usando AutoExpand)
         self.provider_input = AutoExpandComboBox()
-        self.provider_input.setStyleSheet(self.combo_style)
         self.load_providers() 
 
         # Ubicación
         self.location_input = QLineEdit()
         self.location_input.setPlaceholderText("Ej: Estante A, Nivel 2")
-        self.location_input.setStyleSheet(self.input_style)
 
         # Descripción
         self.desc_input = QTextEdit()
         self.max_chars = 255
         self.desc_input.setPlaceholderText("Descripción detallada del producto...")
-        self.desc_input.setStyleSheet(self.input_style)
         self.desc_input.textChanged.connect(self.check_text_length)
         self.desc_input.setFixedHeight(60)
         #para que tab funcione bien en QTextEdit
@@ -80,48 +55,37 @@ class AddItemDialog(QDialog):
         # --- 2. PRECIOS ---
         self.price_c1_input = QLineEdit()
         self.price_c1_input.setPlaceholderText("0.00")
-        self.price_c1_input.setStyleSheet(self.input_style)
         
         self.price_c2_input = QLineEdit()
         self.price_c2_input.setPlaceholderText("0.00 (Opcional)")
-        self.price_c2_input.setStyleSheet(self.input_style)
         
         self.price_c3_input = QLineEdit()
         self.price_c3_input.setPlaceholderText("0.00 (Opcional)")
-        self.price_c3_input.setStyleSheet(self.input_style)
 
         # STOCK Y LIMITES
         self.stock_input = QSpinBox()
         self.stock_input.setRange(0, 9999)
         self.stock_input.setSuffix(" un.")
-        self.stock_input.setStyleSheet(self.input_style)
 
         self.min_stock_input = QSpinBox()
         self.min_stock_input.setRange(1, 999) 
         self.min_stock_input.setValue(1) 
         #alerta en color naranja
-        self.min_stock_input.setStyleSheet(self.input_style + "QSpinBox { color: #e67e22; font-weight: bold; }")
+        self.min_stock_input.setObjectName("minStockInput")
 
         self.max_stock_input = QSpinBox()
         self.max_stock_input.setRange(1, 999)
         self.max_stock_input.setValue(100)
-        self.max_stock_input.setStyleSheet(self.input_style)
 
         #BOTONES
         self.save_btn = QPushButton("Guardar Producto")
         self.save_btn.setCursor(Qt.PointingHandCursor)
-        self.save_btn.setStyleSheet("""
-            QPushButton { background-color: #27ae60; color: white; font-weight: bold; padding: 10px; border-radius: 4px;}
-            QPushButton:focus { border: 2px solid #1e8449; background-color: #219150; }
-        """)
+        self.save_btn.setObjectName("btnSaveItem")
         self.save_btn.setAutoDefault(True) # Permite activar con Enter
         
         self.cancel_btn = QPushButton("Cancelar")
         self.cancel_btn.setCursor(Qt.PointingHandCursor)
-        self.cancel_btn.setStyleSheet("""
-            QPushButton { padding: 10px; border: 1px solid #bdc3c7; border-radius: 4px; background-color: #ecf0f1; }
-            QPushButton:focus { border: 2px solid #95a5a6; }
-        """)
+        self.cancel_btn.setObjectName("btnCancel")
         
         self.save_btn.clicked.connect(self.accept)
         self.cancel_btn.clicked.connect(self.reject)
@@ -220,15 +184,25 @@ class AddItemDialog(QDialog):
         QWidget.setTabOrder(self.save_btn, self.cancel_btn)
 
     def load_providers(self):
-        self.provider_input.clear()
-        self.provider_input.addItem("--- General / Sin Asignar ---", None)
+        # Modelo compartido: solo consulta la BD si la caché de proveedores fue invalidada
         try:
-            providers = db.get_providers()
-            for p in providers:
-                self.provider_input.addItem(p['name'], p['id'])
+            self.provider_input.setModel(get_provider_model())
         except Exception as e:
             print(f"Error cargando proveedores: {e}")
 
+    def reset(self):
+        """Deja el formulario vacío para reutilizar el diálogo (ver dialog_pool)."""
+        for field in (self.sku_input, self.name_input, self.location_input,
+                      self.price_c1_input, self.price_c2_input, self.price_c3_input):
+            field.clear()
+        self.desc_input.clear()
+        self.load_providers()
+        self.provider_input.setCurrentIndex(0)
+        self.stock_input.setValue(0)
+        self.min_stock_input.setValue(1)
+        self.max_stock_input.setValue(100)
+        self.sku_input.setFocus()
+
     def get_data(self):
         def safe_float(text):
             try:
@@ -0,0 +1,158 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QLabel, QPushButton, QHeaderView, QDoubleSpinBox, QComboBox,
+    QMessageBox, QFormLayout, QGroupBox
+)
+from PyQt5.QtCore import Qt
+import db
+
+
+class CashCloseDialog(QDialog):
+    """Abrir / cerrar el turno de caja y ver el corte por método de pago."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Corte de Caja")
+        self.setMinimumSize(520, 520)
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.lbl_status = QLabel("")
+        self.lbl_status.setStyleSheet("font-size: 16px; font-weight: bold; color: #2c3e50;")
+        layout.addWidget(self.lbl_status)
+
+        # Historial de turnos
+        h_hist = QHBoxLayout()
+        h_hist.addWidget(QLabel("Turno:"))
+        self.cmb_shift = QComboBox()
+        self.cmb_shift.currentIndexChanged.connect(self.show_selected_report)
+        h_hist.addWidget(self.cmb_shift, 1)
+        layout.addLayout(h_hist)
+
+        # Totales por método de pago
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["Método", "Ventas", "Total"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self.lbl_totals = QLabel("")
+        self.lbl_totals.setStyleSheet("font-size: 13px; color: #34495e; padding: 5px;")
+        layout.addWidget(self.lbl_totals)
+
+        # Apertura (si no hay turno abierto)
+        self.gb_open = QGroupBox("Abrir Turno")
+        form_open = QFormLayout()
+        self.spin_opening = QDoubleSpinBox()
+        self.spin_opening.setRange(0, 10**9)
+        self.spin_opening.setPrefix("$ ")
+        btn_open = QPushButton("Abrir Turno")
+        btn_open.setStyleSheet("background-color: #27ae60; color: white; font-weight: bold; padding: 8px;")
+        btn_open.clicked.connect(self.handle_open)
+        form_open.addRow("Fondo inicial:", self.spin_opening)
+        form_open.addRow(btn_open)
+        self.gb_open.setLayout(form_open)
+        layout.addWidget(self.gb_open)
+
+        # Cierre (si hay turno abierto)
+        self.gb_close = QGroupBox("Cerrar Turno")
+        form_close = QFormLayout()
+        self.spin_counted = QDoubleSpinBox()
+        self.spin_counted.setRange(0, 10**9)
+        self.spin_counted.setPrefix("$ ")
+        btn_close_shift = QPushButton("Cerrar Turno")
+        btn_close_shift.setStyleSheet("background-color: #c0392b; color: white; font-weight: bold; padding: 8px;")
+        btn_close_shift.clicked.connect(self.handle_close)
+        form_close.addRow("Efectivo contado:", self.spin_counted)
+        form_close.addRow(btn_close_shift)
+        self.gb_close.setLayout(form_close)
+        layout.addWidget(self.gb_close)
+
+        btn_exit = QPushButton("Salir")
+        btn_exit.setStyleSheet("padding: 8px;")
+        btn_exit.clicked.connect(self.accept)
+        layout.addWidget(btn_exit)
+
+    def refresh(self):
+        self.open_shift = db.get_open_shift()
+        if self.open_shift:
+            self.lbl_status.setText(f"🟢 Turno #{self.open_shift['id']} abierto desde {self.open_shift['opened_at'][:16]}")
+        else:
+            self.lbl_status.setText("🔴 Caja cerrada")
+        self.gb_open.setVisible(self.open_shift is None)
+        self.gb_close.setVisible(self.open_shift is not None)
+
+        self.cmb_shift.blockSignals(True)
+        self.cmb_shift.clear()
+        for shift in db.get_recent_shifts():
+            state = "abierto" if shift['closed_at'] is None else f"cerrado {shift['closed_at'][:16]}"
+            self.cmb_shift.addItem(f"#{shift['id']} - {shift['opened_at'][:16]} ({state})", shift['id'])
+        self.cmb_shift.blockSignals(False)
+        self.show_selected_report()
+
+    def show_selected_report(self):
+        shift_id = self.cmb_shift.currentData()
+        report = db.get_shift_report(shift_id) if shift_id is not None else None
+
+        self.table.setRowCount(0)
+        if not report:
+            self.lbl_totals.setText("Sin turnos registrados.")
+            return
+
+        for row, p in enumerate(report['by_payment']):
+            self.table.insertRow(row)
+            method_item = QTableWidgetItem(p['payment_method'] or "-")
+            count_item = QTableWidgetItem(str(p['sale_count']))
+            total_item = QTableWidgetItem(f"$ {p['revenue']:,.2f}")
+            count_item.setTextAlignment(Qt.AlignCenter)
+            total_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.table.setItem(row, 0, method_item)
+            self.table.setItem(row, 1, count_item)
+            self.table.setItem(row, 2, total_item)
+
+        text = (
+            f"<b>Ventas:</b> {report['sale_count']}   |   <b>Total:</b> $ {report['total']:,.2f}<br>"
+            f"<b>Fondo inicial:</b> $ {report['opening_cash']:,.2f}   |   "
+            f"<b>Efectivo esperado:</b> $ {report['expected_cash']:,.2f}"
+        )
+        if report['difference'] is not None:
+            color = "#27ae60" if abs(report['difference']) < 0.005 else "#c0392b"
+            text += (
+                f"<br><b>Efectivo contado:</b> $ {report['counted_cash']:,.2f}   |   "
+                f"<span style='color: {color};'><b>Diferencia:</b> $ {report['difference']:,.2f}</span>"
+            )
+        self.lbl_totals.setText(text)
+
+    def handle_open(self):
+        try:
+            db.open_shift(self.spin_opening.value())
+        except ValueError as e:
+            QMessageBox.warning(self, "Turno abierto", str(e))
+        self.refresh()
+
+    def handle_close(self):
+        if not self.open_shift:
+            return
+        confirm = QMessageBox.question(
+            self, "Confirmar", f"¿Cerrar el turno #{self.open_shift['id']}?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if confirm != QMessageBox.Yes:
+            return
+        try:
+            report = db.close_shift(self.open_shift['id'], self.spin_counted.value())
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            self.refresh()
+            return
+        self.spin_counted.setValue(0)
+        self.refresh()
+        QMessageBox.information(
+            self, "Turno Cerrado",
+            f"Total vendido: $ {report['total']:,.2f}\n"
+            f"Efectivo esperado: $ {report['expected_cash']:,.2f}\n"
+            f"Diferencia: $ {report['difference']:,.2f}"
+        )
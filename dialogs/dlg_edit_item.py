@@ -5,6 +5,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QTimer
 import db
+from models import get_provider_model
 
 class AutoExpandComboBox(QComboBox):
     """
@@ -16,46 +17,13 @@ class AutoExpandComboBox(QComboBox):
         super().focusInEvent(event)
 
 class EditItemDialog(QDialog):
-    def __init__(self, item_data, parent=None):
+    def __init__(self, item_data=None, parent=None):
         super().__init__(parent)
-        self.setWindowTitle(f"Editar Producto: {item_data.get('name', 'Ítem')}")
         self.setMinimumWidth(450)
-        self.item_data = item_data 
-
-        #ESTILOS APP
-        self.input_style = """
-            QLineEdit, QSpinBox, QTextEdit { 
-                background-color: white; 
-                border: 1px solid #bdc3c7; 
-                border-radius: 4px; 
-                padding: 4px; 
-            }
-            QLineEdit:focus, QSpinBox:focus, QTextEdit:focus { 
-                border: 2px solid #3498db; 
-            }
-        """
-        
-        self.combo_style = """
-            QComboBox {
-                background-color: white; 
-                border: 1px solid #bdc3c7; 
-                border-radius: 4px;
-                padding: 4px;
-            }
-            QComboBox:focus { border: 2px solid #3498db; }
-            QComboBox::drop-down { border: 0px; }
-        """
-
-        # Estilo para campos de solo lectura
-        self.readonly_style = """
-            QLineEdit { 
-                background-color: #ecf0f1; 
-                color: #7f8c8d; 
-                border: 1px solid #bdc3c7; 
-                border-radius: 4px;
-                padding: 4px;
-            }
-        """
+        self.item_data = {}
+
+        # Los estilos vienen de la hoja global (styles.py), por objectName
+        self.setObjectName("ItemFormDialog")
 
         # --- WIDGETS ---
         
@@ -63,23 +31,20 @@ class EditItemDialog(QDialog):
         self.sku_input = QLineEdit()
         self.sku_input.setPlaceholderText("SKU")
         self.sku_input.setReadOnly(True) 
-        self.sku_input.setStyleSheet(self.readonly_style)
+        self.sku_input.setObjectName("readonlyInput")
 
         # Nombre
         self.name_input = QLineEdit()
         self.name_input.setPlaceholderText("Nombre del producto")
-        self.name_input.setStyleSheet(self.input_style)
 
         # Proveedor (AutoExpand)
         self.provider_input = AutoExpandComboBox()
-        self.provider_input.setStyleSheet(self.combo_style)
         self.load_providers() 
 
         # Descripción
         self.desc_input = QTextEdit()
         self.max_chars = 255
         self.desc_input.setPlaceholderText("Descripción...")
-        self.desc_input.setStyleSheet(self.input_style)
         self.desc_input.textChanged.connect(self.check_text_length)
         self.desc_input.setFixedHeight(60)
         self.desc_input.setTabChangesFocus(True) 
@@ -87,46 +52,34 @@ class EditItemDialog(QDialog):
         # Ubicación
         self.location_input = QLineEdit()
         self.location_input.setPlaceholderText("Ubicación")
-        self.location_input.setStyleSheet(self.input_style)
 
         # Precios
         self.price_c1_input = QLineEdit()
-        self.price_c1_input.setStyleSheet(self.input_style)
         self.price_c2_input = QLineEdit()
-        self.price_c2_input.setStyleSheet(self.input_style)
         self.price_c3_input = QLineEdit()
-        self.price_c3_input.setStyleSheet(self.input_style)
 
         # Stock
         self.stock_input = QSpinBox()
         self.stock_input.setRange(0, 99999)
         self.stock_input.setSuffix(" un.")
-        self.stock_input.setStyleSheet(self.input_style)
 
         self.min_stock_input = QSpinBox()
         self.min_stock_input.setRange(0, 9999) 
-        # Combinamos estilo base + color naranja
-        self.min_stock_input.setStyleSheet(self.input_style + "QSpinBox { color: #e67e22; font-weight: bold; }")
+        # Estilo base + color naranja
+        self.min_stock_input.setObjectName("minStockInput")
         
         self.max_stock_input = QSpinBox()
         self.max_stock_input.setRange(0, 9999)
-        self.max_stock_input.setStyleSheet(self.input_style)
 
         # Botones
         self.save_btn = QPushButton("💾 Guardar Cambios")
         self.save_btn.setCursor(Qt.PointingHandCursor)
-        self.save_btn.setStyleSheet("""
-            QPushButton { background-color: #f39c12; color: white; font-weight: bold; padding: 10px; border-radius: 4px; }
-            QPushButton:focus { border: 2px solid #d35400; background-color: #e67e22; }
-        """)
+        self.save_btn.setObjectName("btnSaveEdit")
         self.save_btn.setAutoDefault(True)
 
         self.cancel_btn = QPushButton("Cancelar")
         self.cancel_btn.setCursor(Qt.PointingHandCursor)
-        self.cancel_btn.setStyleSheet("""
-            QPushButton { padding: 10px; border: 1px solid #bdc3c7; border-radius: 4px; background-color: #ecf0f1; }
-            QPushButton:focus { border: 2px solid #95a5a6; }
-        """)
+        self.cancel_btn.setObjectName("btnCancel")
         
         self.save_btn.clicked.connect(self.accept)
         self.cancel_btn.clicked.connect(self.reject)
@@ -225,15 +178,21 @@ class EditItemDialog(QDialog):
         QWidget.setTabOrder(self.save_btn, self.cancel_btn)
 
         #CARGAR DATOS
+        if item_data:
+            self.load_item(item_data)
+
+    def load_item(self, item_data):
+        """Carga otro producto en el diálogo (permite reutilizarlo, ver dialog_pool)."""
+        self.item_data = item_data
+        self.setWindowTitle(f"Editar Producto: {item_data.get('name', 'Ítem')}")
+        self.load_providers()
         self.populate_fields()
+        self.name_input.setFocus()
 
     def load_providers(self):
-        self.provider_input.clear()
-        self.provider_input.addItem("--- General / Sin Asignar ---", None)
+        # Modelo compartido: solo consulta la BD si la caché de proveedores fue invalidada
         try:
-            providers = db.get_providers()
-            for p in providers:
-                self.provider_input.addItem(p['name'], p['id'])
+            self.provider_input.setModel(get_provider_model())
         except Exception as e:
             print(f"Error cargando proveedores: {e}")
 
@@ -258,10 +217,8 @@ class EditItemDialog(QDialog):
             pass 
 
         current_prov_id = d.get('provider_id')
-        if current_prov_id is not None:
-            index = self.provider_input.findData(current_prov_id)
-            if index >= 0:
-                self.provider_input.setCurrentIndex(index)
+        index = self.provider_input.findData(current_prov_id) if current_prov_id is not None else -1
+        self.provider_input.setCurrentIndex(index if index >= 0 else 0)
 
     def get_updated_data(self):
         def safe_float(text):
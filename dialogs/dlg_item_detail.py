@@ -1,12 +1,10 @@
-import sqlite3
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, 
     QHeaderView, QLabel, QTextEdit, QPushButton, QHBoxLayout
 )
 from PyQt5.QtGui import QFont, QColor
 from PyQt5.QtCore import Qt
-
-DB_FILENAME = "inventory.db" 
+import db
 
 class ItemDetailDialog(QDialog):
     def __init__(self, item_data, parent=None):
@@ -19,21 +17,14 @@ class ItemDetailDialog(QDialog):
     def get_provider_name(self, provider_id):
         if not provider_id:
             return "General"  # Caso sin proveedor asignado
+
+        # get_item_by_id ya trae el nombre por JOIN; si no, usamos la caché de proveedores
+        if self.item_data.get('provider_name'):
+            return self.item_data['provider_name']
         
         try:
-            conn = sqlite3.connect(DB_FILENAME)
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT name FROM providers WHERE id = ?", (provider_id,))
-            result = cursor.fetchone()
-            
-            conn.close()
-            
-            if result:
-                return result[0]
-            else:
-                return "Proveedor no encontrado"
-                
+            name = db.get_provider_name(provider_id)
+            return name if name else "Proveedor no encontrado"
         except Exception as e:
             return f"Error al leer: {e}"
 
@@ -4,8 +4,25 @@ from PyQt5.QtWidgets import (
     QComboBox, QSpinBox, QLineEdit, QMessageBox, QCompleter, QFrame,
     QWidget
 )
-from PyQt5.QtCore import Qt, QStringListModel, QTimer
+from PyQt5.QtCore import Qt, QStringListModel, QTimer, QEvent, pyqtSignal
+import threading
+import time
 import db as db
+import events
+from search_index import TrigramIndex
+
+# Resultados que se muestran en el autocompletado
+COMPLETER_LIMIT = 20
+
+SEARCH_PLACEHOLDER = "🔍 Buscar producto por nombre o SKU..."
+LOADING_PLACEHOLDER = "⏳ Cargando productos..."
+
+# Columna de items que corresponde a cada tarifa del carrito
+PRICE_KEYS = {"Público": 'price', "Mayorista": 'price_c1', "Distribuidor": 'price_c2'}
+
+# Lector de código de barras: teclea mucho más rápido que una persona y termina con Enter
+SCAN_MAX_INTERVAL = 0.05   # segundos máximos entre teclas de una ráfaga
+SCAN_MIN_LENGTH = 4        # caracteres mínimos para considerar que fue un escaneo
 
 class AutoExpandComboBox(QComboBox):
     def focusInEvent(self, event):
@@ -13,53 +30,117 @@ class AutoExpandComboBox(QComboBox):
             QTimer.singleShot(50, self.showPopup)
         super().focusInEvent(event)
 
+class SaleCart:
+    """
+    Líneas del carrito agrupadas por (producto, precio unitario).
+    Mantiene el total acumulado y un índice hacia la fila de cada línea,
+    para que la tabla solo actualice la fila afectada.
+    """
+
+    def __init__(self):
+        self.lines = []          # Lo que recibe db.register_sale
+        self.total = 0.0
+        self._rows = {}          # (item_id, precio) -> fila
+        self._qty_by_item = {}   # item_id -> unidades en el carrito (todas las tarifas)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def qty_of(self, item_id):
+        return self._qty_by_item.get(item_id, 0)
+
+    def add(self, item, qty, price, price_label):
+        """Agrega unidades. Devuelve (fila, es_nueva)."""
+        key = (item['id'], price)
+        row = self._rows.get(key)
+        is_new = row is None
+
+        if is_new:
+            row = len(self.lines)
+            self._rows[key] = row
+            self.lines.append({
+                'id': item['id'],
+                'name': item['name'],
+                'price_label': price_label,
+                'qty': 0,
+                'price': price,
+                'subtotal': 0.0
+            })
+
+        line = self.lines[row]
+        line['qty'] += qty
+        line['subtotal'] = line['price'] * line['qty']
+        self._qty_by_item[item['id']] = self.qty_of(item['id']) + qty
+        self.total += price * qty
+        return row, is_new
+
+    def remove(self, row):
+        line = self.lines.pop(row)
+        del self._rows[(line['id'], line['price'])]
+        self._qty_by_item[line['id']] -= line['qty']
+        self.total -= line['subtotal']
+        # Las filas siguientes suben una posición
+        for later in self.lines[row:]:
+            self._rows[(later['id'], later['price'])] -= 1
+        if not self.lines:
+            self.total = 0.0
+        return line
+
+    def reprice(self, item_id, price_label, price):
+        """Cambia el precio de las líneas de un producto con esa tarifa (se reagrupan)."""
+        lines = self.lines
+        self.clear()
+        for line in lines:
+            new_price = price if (line['id'], line['price_label']) == (item_id, price_label) else line['price']
+            self.add(line, line['qty'], new_price, line['price_label'])
+
+    def clear(self):
+        self.__init__()
+
+
 class SaleDialog(QDialog):
+    catalog_loaded = pyqtSignal()  # se entrega en el hilo de la interfaz
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Nueva Venta")
+        # Los estilos vienen de la hoja global (styles.py), por objectName
+        self.setObjectName("SaleDialog")
         self.setMinimumSize(900, 600)
         
-        self.cart = [] 
-        self.all_items = [] 
+        self.cart = SaleCart()
         self.item_map = {} 
+        self.items_by_id = {}
+        self.sku_map = {}
+        self.search_index = TrigramIndex()
+        self.catalog_ready = False
+        self._loaded_catalog = None
+        self.catalog_loaded.connect(self.install_catalog)
+
+        # Detección de ráfagas del lector de códigos
+        self._last_key_time = 0.0
+        self._burst_len = 0
         
         self.setup_ui()
         self.load_data()
+        events.subscribe("items", self.on_items_changed)
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
 
         # --- SECCIÓN SUPERIOR ---
         top_frame = QFrame(self) 
-        top_frame.setStyleSheet("background-color: #f1f2f6; border-radius: 8px; padding: 10px;")
+        top_frame.setObjectName("saleTopFrame")
         top_layout = QHBoxLayout(top_frame)
 
-        combo_style = """
-            QComboBox {
-                background-color: white; 
-                border: 1px solid #bdc3c7; 
-                border-radius: 4px;
-                padding: 5px;
-                min-width: 150px;
-            }
-            QComboBox:focus {
-                border: 2px solid #3498db; 
-            }
-            QComboBox::drop-down {
-                border: 0px;
-            }
-        """
-
         self.cmb_payment = AutoExpandComboBox()
         self.cmb_payment.addItems(["Efectivo", "Transferencia", "Tarjeta", "Crédito"])
-        self.cmb_payment.setStyleSheet(combo_style)
 
         self.input_title = QLineEdit()
         self.input_title.setPlaceholderText("Ej: Cliente Mesa 5, Pedido Juan... (Opcional)")
-        self.input_title.setStyleSheet("""
-            QLineEdit { background-color: white; padding: 5px; border: 1px solid #bdc3c7; border-radius: 4px; }
-            QLineEdit:focus { border: 2px solid #3498db; }
-        """)
 
         top_layout.addWidget(QLabel("Descripción / Ref:"))
         top_layout.addWidget(self.input_title, 1)
@@ -72,20 +153,21 @@ class SaleDialog(QDialog):
 
         # Buscador
         self.txt_search = QLineEdit()
-        self.txt_search.setPlaceholderText("🔍 Buscar producto por nombre o SKU...")
-        self.txt_search.setStyleSheet("""
-            QLineEdit { padding: 5px; border: 1px solid #bdc3c7; border-radius: 4px; }
-            QLineEdit:focus { border: 2px solid #3498db; }
-        """)
+        self.txt_search.setPlaceholderText(SEARCH_PLACEHOLDER)
         
-        self.completer = QCompleter()
+        # El filtrado lo hace el índice de trigramas; el completer solo muestra el resultado
+        self.completer_model = QStringListModel()
+        self.completer = QCompleter(self.completer_model, self)
         self.completer.setCaseSensitivity(Qt.CaseInsensitive)
-        self.completer.setFilterMode(Qt.MatchContains)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setMaxVisibleItems(COMPLETER_LIMIT)
         self.txt_search.setCompleter(self.completer)
+        self.txt_search.installEventFilter(self)
 
 
         # carga datos cuando se selecciona del autocompletado o cuando se escribe 
         self.completer.activated.connect(self.on_product_selected)
+        self.txt_search.textEdited.connect(self.on_text_edited)
         self.txt_search.textChanged.connect(self.on_text_changed)
         
         # Selector de TIPO DE PRECIO
@@ -96,25 +178,16 @@ class SaleDialog(QDialog):
             "P. Distribuidor ($ 0)"
         ])
         self.cmb_price_type.setToolTip("Selecciona la tarifa a aplicar")
-        self.cmb_price_type.setStyleSheet(combo_style)
 
         # Cantidad
         self.spin_qty = QSpinBox()
         self.spin_qty.setRange(1, 9999)
         self.spin_qty.setValue(1)
         self.spin_qty.setFixedWidth(80)
-        self.spin_qty.setStyleSheet("""
-            QSpinBox { padding: 5px; border: 1px solid #bdc3c7; border-radius: 4px; background-color: white; }
-            QSpinBox:focus { border: 2px solid #3498db; }
-        """)
 
         btn_add = QPushButton("Agregar [Enter]")
         btn_add.setCursor(Qt.PointingHandCursor)
-        btn_add.setStyleSheet("""
-            QPushButton { background-color: #3498db; color: white; font-weight: bold; padding: 6px; border-radius: 4px; } 
-            QPushButton:focus { border: 2px solid #2c3e50; background-color: #2980b9; }
-            QPushButton:pressed { background-color: #1abc9c; }
-        """)
+        btn_add.setObjectName("btnAddToCart")
         btn_add.clicked.connect(self.add_item_to_cart)
         btn_add.setAutoDefault(True)
 
@@ -143,15 +216,12 @@ class SaleDialog(QDialog):
         # FOOTER
         bottom_layout = QHBoxLayout()
         self.lbl_total = QLabel("Total: $0.00")
-        self.lbl_total.setStyleSheet("font-size: 24px; font-weight: bold; color: #27ae60;")
+        self.lbl_total.setObjectName("saleTotal")
         
         self.btn_save = QPushButton("Confirmar Venta")
         self.btn_save.setCursor(Qt.PointingHandCursor)
         self.btn_save.setMinimumHeight(50)
-        self.btn_save.setStyleSheet("""
-            QPushButton { background-color: #2ecc71; color: white; font-size: 16px; font-weight: bold; border-radius: 5px; } 
-            QPushButton:focus { border: 3px solid #1e8449; background-color: #27ae60; }
-        """)
+        self.btn_save.setObjectName("btnConfirmSale")
         self.btn_save.clicked.connect(self.save_sale)
         self.btn_save.setAutoDefault(True)
 
@@ -168,19 +238,166 @@ class SaleDialog(QDialog):
         QWidget.setTabOrder(self.spin_qty, btn_add)
         QWidget.setTabOrder(btn_add, self.btn_save)
 
+    # Con 100k productos leer el catálogo y armar el índice lleva segundos: se hace
+    # una sola vez, en un hilo aparte, y después se actualiza producto por producto
     def load_data(self):
-        self.all_items = db.get_items(limit=1000) 
-        
+        self.catalog_ready = False
+        self.txt_search.setPlaceholderText(LOADING_PLACEHOLDER)
+        threading.Thread(target=self._build_catalog, name="easyinv-sale-catalog", daemon=True).start()
+
+    def _build_catalog(self):
+        try:
+            catalog = db.get_sale_catalog()
+            self._loaded_catalog = (
+                TrigramIndex(catalog),
+                {item['id']: item for item in catalog},
+                {db.normalize_text(item['sku'].strip()): item for item in catalog},
+            )
+        except Exception as e:
+            self._loaded_catalog = e
+        self.catalog_loaded.emit()
+
+    def install_catalog(self):
+        loaded, self._loaded_catalog = self._loaded_catalog, None
+        if isinstance(loaded, Exception):
+            self.txt_search.setPlaceholderText(SEARCH_PLACEHOLDER)
+            QMessageBox.critical(self, "Error", f"No se pudo cargar el catálogo de productos:\n{loaded}")
+            return
+        self.search_index, self.items_by_id, self.sku_map = loaded
+        self.catalog_ready = True
+        self.txt_search.setPlaceholderText(SEARCH_PLACEHOLDER)
+        # Lo que cambió mientras se armaba el índice
+        self.refresh_catalog()
+        if self.txt_search.text():
+            self.on_text_edited(self.txt_search.text())
+
+    # Al reutilizar el diálogo solo se releen los productos cuya versión cambió
+    def refresh_catalog(self):
+        if not self.catalog_ready:
+            return  # install_catalog() la llama al terminar la carga
+        versions = db.get_catalog_versions()
+
+        for item_id in set(self.items_by_id) - set(versions):
+            self.forget_item(item_id)
+
+        changed = [item_id for item_id, version in versions.items()
+                   if item_id not in self.items_by_id or self.items_by_id[item_id]['version'] != version]
+        for item in db.get_sale_catalog(changed):
+            self.remember_item(item)
+
+    # Escrituras hechas desde esta app (ventas, ediciones): se actualizan solo esos productos
+    def on_items_changed(self, event):
+        if not self.catalog_ready:
+            return  # install_catalog() recupera estos cambios por versión
+        if event.ids is None:
+            self.refresh_catalog()
+            return
+        fresh = {} if event.action == events.DELETE else {
+            item['id']: item for item in db.get_sale_catalog(list(event.ids))}
+        for item_id in event.ids:
+            if item_id in fresh:
+                self.remember_item(fresh[item_id])
+            else:
+                self.forget_item(item_id)
+
+    def remember_item(self, item):
+        old = self.items_by_id.get(item['id'])
+        if old:
+            self.sku_map.pop(db.normalize_text(old['sku'].strip()), None)
+        self.items_by_id[item['id']] = item
+        self.sku_map[db.normalize_text(item['sku'].strip())] = item
+        self.search_index.add(item)
+
+    def forget_item(self, item_id):
+        old = self.items_by_id.pop(item_id, None)
+        if old:
+            self.sku_map.pop(db.normalize_text(old['sku'].strip()), None)
+        self.search_index.remove(item_id)
+
+    def reset(self):
+        """Deja el diálogo como recién abierto (ver dialog_pool)."""
+        self.cart.clear()
+        self.table.setRowCount(0)
+        self.update_total_label()
+        self.input_title.clear()
+        self.cmb_payment.setCurrentIndex(0)
+        self.cmb_price_type.setCurrentIndex(0)
+        self.txt_search.clear()
+        self.spin_qty.setValue(1)
+        self.update_price_labels(0, 0, 0)
+        self.item_map = {}
+        self.completer_model.setStringList([])
+        self._burst_len = 0
+        self.refresh_catalog()
+        self.input_title.setFocus()
+
+    @staticmethod
+    def display_text(item):
+        return f"{item['sku']} | {item['name']} (Stock: {item['stock']})"
+
+    # Consulta el índice con cada tecla y muestra solo los mejores resultados
+    def on_text_edited(self, text):
+        if text in self.item_map:
+            return
+
+        # Durante una ráfaga del lector no consultamos el índice ni abrimos el popup
+        if self.is_scanning():
+            self.completer.popup().hide()
+            return
+
+        matches = self.search_index.search(text, COMPLETER_LIMIT) if len(text.strip()) >= 2 else []
+
+        self.item_map = {}
         search_list = []
-        self.item_map = {} 
-        
-        for item in self.all_items:
-            display_text = f"{item['sku']} | {item['name']} (Stock: {item['stock']})"
+        for item in matches:
+            display_text = self.display_text(item)
             search_list.append(display_text)
             self.item_map[display_text] = item
-            
-        model = QStringListModel(search_list)
-        self.completer.setModel(model)
+
+        self.completer_model.setStringList(search_list)
+        if search_list:
+            self.completer.complete()
+
+    # LECTOR DE CÓDIGO DE BARRAS
+
+    def is_scanning(self):
+        return self._burst_len >= 2
+
+    def eventFilter(self, obj, event):
+        if obj is self.txt_search and event.type() == QEvent.KeyPress:
+            if event.key() in (Qt.Key_Return, Qt.Key_Enter):
+                scanned = self._burst_len >= SCAN_MIN_LENGTH
+                self._burst_len = 0
+                if scanned and self.handle_scan(self.txt_search.text()):
+                    return True  # Consumimos el Enter para que no dispare el botón por defecto
+            elif event.text() and event.text().isprintable():
+                now = time.monotonic()
+                if now - self._last_key_time <= SCAN_MAX_INTERVAL:
+                    self._burst_len += 1
+                else:
+                    self._burst_len = 1
+                self._last_key_time = now
+        return super().eventFilter(obj, event)
+
+    def handle_scan(self, code):
+        """Agrega 1 unidad del SKU escaneado. Devuelve False si no es un SKU conocido."""
+        item = self.sku_map.get(db.normalize_text(code.strip()))
+        if item is None:
+            return False
+
+        self.txt_search.clear()
+        self.completer.popup().hide()
+
+        price_label, final_price = self.resolve_price(item)
+        if price_label is None:
+            return True
+
+        if self.cart.qty_of(item['id']) + 1 > item['stock']:
+            QMessageBox.warning(self, "Stock Insuficiente", f"Solo quedan {item['stock']} unidades de {item['name']}.")
+            return True
+
+        self.add_to_cart(item, 1, final_price, price_label)
+        return True
 
     # Función auxiliar para actualizar los textos del combo
     def update_price_labels(self, p1=0, p2=0, p3=0):
@@ -222,80 +439,139 @@ class SaleDialog(QDialog):
         selected_item = self.item_map[text]
         qty = self.spin_qty.value()
         
-        if selected_item['stock'] < qty:
+        if selected_item['stock'] < self.cart.qty_of(selected_item['id']) + qty:
             QMessageBox.warning(self, "Stock Insuficiente", f"Solo quedan {selected_item['stock']} unidades disponibles.")
             return
 
-        # Determinar PRECIO
+        price_label, final_price = self.resolve_price(selected_item)
+        if price_label is None: return
+
+        # Agregar al carrito (si ya está con el mismo precio, se suma a esa línea)
+        self.add_to_cart(selected_item, qty, final_price, price_label)
+        
+        # Reiniciar para siguiente producto
+        self.txt_search.clear()
+        self.spin_qty.setValue(1)
+        self.update_price_labels(0, 0, 0) # Volver a 0 visualmente
+        self.txt_search.setFocus() 
+
+    # Precio según la tarifa seleccionada. Devuelve (None, 0) si el usuario cancela por precio $0
+    def resolve_price(self, item):
         price_index = self.cmb_price_type.currentIndex()
         final_price = 0.0
         price_label = ""
 
         if price_index == 0:   # Público
-            final_price = selected_item['price']
+            final_price = item['price']
             price_label = "Público"
         elif price_index == 1: # Mayorista
-            final_price = selected_item.get('price_c1', 0)
+            final_price = item.get('price_c1', 0)
             price_label = "Mayorista"
         elif price_index == 2: # Distribuidor
-            final_price = selected_item.get('price_c2', 0)
+            final_price = item.get('price_c2', 0)
             price_label = "Distribuidor"
 
         if final_price <= 0:
             res = QMessageBox.question(self, "Precio Cero", 
                 f"El precio seleccionado ({price_label}) es $0. ¿Deseas continuar?", 
                 QMessageBox.Yes | QMessageBox.No)
-            if res == QMessageBox.No: return
+            if res == QMessageBox.No: return None, 0.0
 
-        # Agregar al carrito
-        subtotal = final_price * qty
-        
-        row_data = {
-            'id': selected_item['id'],
-            'name': selected_item['name'],
-            'price_label': price_label,
-            'qty': qty,
-            'price': final_price,
-            'subtotal': subtotal
-        }
-        
-        self.cart.append(row_data)
-        self.refresh_cart_table()
-        
-        # Reiniciar para siguiente producto
-        self.txt_search.clear()
-        self.spin_qty.setValue(1)
-        self.update_price_labels(0, 0, 0) # Volver a 0 visualmente
-        self.txt_search.setFocus() 
+        return price_label, final_price
+
+    # Solo se toca la fila afectada; el total viene acumulado en el carrito
+    def add_to_cart(self, item, qty, price, price_label):
+        row, is_new = self.cart.add(item, qty, price, price_label)
+        line = self.cart.lines[row]
 
-    def refresh_cart_table(self):
+        if is_new:
+            self.table.insertRow(row)
+            self.table.setItem(row, 0, QTableWidgetItem(str(line['id'])))
+            self.table.setItem(row, 1, QTableWidgetItem(line['name']))
+            self.table.setItem(row, 2, QTableWidgetItem(line['price_label']))
+            self.table.setItem(row, 4, QTableWidgetItem(f"${line['price']:,.2f}"))
+            self.table.setItem(row, 3, QTableWidgetItem())
+            self.table.setItem(row, 5, QTableWidgetItem())
+
+        self.table.item(row, 3).setText(str(line['qty']))
+        self.table.item(row, 5).setText(f"${line['subtotal']:,.2f}")
+        self.update_total_label()
+
+    def reload_cart_table(self):
         self.table.setRowCount(0)
-        total_gral = 0.0
-        
-        for i, item in enumerate(self.cart):
-            self.table.insertRow(i)
-            self.table.setItem(i, 0, QTableWidgetItem(str(item['id'])))
-            self.table.setItem(i, 1, QTableWidgetItem(item['name']))
-            self.table.setItem(i, 2, QTableWidgetItem(item['price_label']))
-            self.table.setItem(i, 3, QTableWidgetItem(str(item['qty'])))
-            self.table.setItem(i, 4, QTableWidgetItem(f"${item['price']:,.2f}"))
-            self.table.setItem(i, 5, QTableWidgetItem(f"${item['subtotal']:,.2f}"))
-            
-            total_gral += item['subtotal']
-            
-        self.lbl_total.setText(f"Total: ${total_gral:,.2f}")
+        lines = self.cart.lines
+        for row, line in enumerate(lines):
+            self.table.insertRow(row)
+            values = (str(line['id']), line['name'], line['price_label'], str(line['qty']),
+                      f"${line['price']:,.2f}", f"${line['subtotal']:,.2f}")
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+        self.update_total_label()
+
+    def update_total_label(self):
+        self.lbl_total.setText(f"Total: ${self.cart.total:,.2f}")
 
     def remove_row(self):
         row = self.table.currentRow()
         if row >= 0:
-            self.cart.pop(row)
-            self.refresh_cart_table()
+            self.cart.remove(row)
+            self.table.removeRow(row)
+            self.update_total_label()
+
+    # Relee solo los productos del carrito que otra caja modificó desde que se abrió el diálogo
+    def revalidate_cart(self):
+        names = {line['id']: line['name'] for line in self.cart}
+        # Un producto que ya no está en el catálogo local (borrado) se relee igual
+        versions = {item_id: self.items_by_id[item_id]['version'] if item_id in self.items_by_id else -1
+                    for item_id in names}
+        stale = db.revalidate_cart(versions)
+
+        problems = []
+        for item_id, current in stale.items():
+            if current is None or not current['active']:
+                problems.append(f"• {names[item_id]}: ya no está disponible")
+                continue
+            snapshot = self.items_by_id.get(item_id)
+            if snapshot:
+                for key in ('version', 'stock', 'name', 'price', 'price_c1', 'price_c2'):
+                    snapshot[key] = current[key]
+            if current['stock'] < self.cart.qty_of(item_id):
+                problems.append(f"• {current['name']}: quedan {current['stock']}, en carrito {self.cart.qty_of(item_id)}")
+
+        # Precios cambiados (por esta revalidación o por un evento): el carrito pasa
+        # al precio nuevo y se avisa, para que el cajero confirme el total
+        repriced = False
+        for item_id, name in names.items():
+            item = self.items_by_id.get(item_id)
+            if item is None:
+                continue
+            changes = {(line['price_label'], line['price']) for line in self.cart
+                       if line['id'] == item_id and item[PRICE_KEYS[line['price_label']]] != line['price']}
+            for price_label, old_price in sorted(changes):
+                new_price = item[PRICE_KEYS[price_label]]
+                self.cart.reprice(item_id, price_label, new_price)
+                problems.append(f"• {name}: precio {price_label} cambió de ${old_price:,.2f} a ${new_price:,.2f}")
+                repriced = True
+        if repriced:
+            self.reload_cart_table()
+        return problems
 
     def save_sale(self):
         if not self.cart:
             QMessageBox.warning(self, "Error", "El carrito está vacío.")
             return
 
+        try:
+            problems = self.revalidate_cart()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"No se pudo verificar el stock:\n{str(e)}")
+            return
+
+        if problems:
+            QMessageBox.warning(self, "Stock Modificado", 
+                "Otra caja modificó productos del carrito. Revisa el carrito:\n\n" + "\n".join(problems))
+            return
+
         try:
             client_id = 0 
             payment_method = self.cmb_payment.currentText()
@@ -303,11 +579,14 @@ class SaleDialog(QDialog):
             user_title = self.input_title.text().strip()
             title = user_title if user_title else "Venta General"
             
-            db.register_sale(title, client_id, self.cart, payment_method)
+            db.register_sale(title, client_id, self.cart.lines, payment_method)
             
             QMessageBox.information(self, "Éxito", "Venta registrada correctamente.")
             self.accept() 
             
+        except db.StockConflictError as e:
+            QMessageBox.warning(self, "Stock Modificado", 
+                "Otra caja modificó productos del carrito. Revisa el carrito:\n\n" + str(e))
         except Exception as e:
             QMessageBox.critical(self, "Error", f"No se pudo guardar la venta:\n{str(e)}")
             
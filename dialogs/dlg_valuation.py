@@ -0,0 +1,68 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QLabel, QPushButton, QHeaderView, QComboBox
+)
+from PyQt5.QtCore import Qt
+import db
+
+
+class ValuationDialog(QDialog):
+    """Detalle de la valorización de inventario por proveedor o por ubicación."""
+
+    COLUMNS = ["", "Productos", "Unidades", "Valor Público", "Valor Mayorista", "Valor Distribuidor"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Valorización de Inventario")
+        self.setMinimumSize(800, 500)
+        self.setup_ui()
+        self.load_data()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        h_top = QHBoxLayout()
+        h_top.addWidget(QLabel("Agrupar por:"))
+        self.cmb_group = QComboBox()
+        self.cmb_group.addItem("Proveedor", "provider")
+        self.cmb_group.addItem("Ubicación", "location")
+        self.cmb_group.currentIndexChanged.connect(self.load_data)
+        h_top.addWidget(self.cmb_group)
+        h_top.addStretch()
+        layout.addLayout(h_top)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setAlternatingRowColors(True)
+        layout.addWidget(self.table)
+
+        btn_close = QPushButton("Cerrar")
+        btn_close.setStyleSheet("padding: 8px;")
+        btn_close.clicked.connect(self.accept)
+        layout.addWidget(btn_close)
+
+    def load_data(self):
+        group_by = self.cmb_group.currentData()
+        columns = list(self.COLUMNS)
+        columns[0] = "Ubicación" if group_by == "location" else "Proveedor"
+        self.table.setHorizontalHeaderLabels(columns)
+
+        rows = db.get_inventory_valuation(group_by)
+        empty_label = "--- Sin Ubicación ---" if group_by == "location" else "--- Sin Asignar ---"
+        self.table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            values = [
+                row['label'] or empty_label,
+                str(row['item_count']),
+                str(row['units']),
+                f"$ {row['value']:,.2f}",
+                f"$ {row['value_c1']:,.2f}",
+                f"$ {row['value_c2']:,.2f}",
+            ]
+            for c, value in enumerate(values):
+                cell = QTableWidgetItem(value)
+                cell.setTextAlignment((Qt.AlignLeft if c == 0 else Qt.AlignRight) | Qt.AlignVCenter)
+                self.table.setItem(r, c, cell)
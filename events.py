@@ -0,0 +1,81 @@
+"""
+Bus de eventos de cambios (dentro del proceso).
+
+Después de cada commit, las escrituras de db publican qué filas cambiaron:
+
+    ChangeEvent(table="items", action="update", ids=(12, 15))
+
+Las vistas se suscriben por tabla y actualizan solo esas filas en lugar de
+recargar todo. Si `ids` es None no se sabe qué filas fueron: hay que recargar.
+
+Los callbacks se ejecutan en el hilo que hizo la escritura (en la app, el hilo
+de la interfaz). Un error en un suscriptor se imprime y no afecta a los demás
+ni a la escritura, que ya está confirmada.
+"""
+import sys
+import threading
+import traceback
+import types
+import weakref
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+ChangeEvent = namedtuple("ChangeEvent", "table action ids")
+
+_subscribers = {}  # tabla -> [referencia al callback]
+_lock = threading.Lock()
+_capture = threading.local()
+
+
+def _ref(callback: Callable):
+    # Los métodos se guardan con referencia débil: una vista que se destruye
+    # no queda viva solo por estar suscrita.
+    if isinstance(callback, types.MethodType):
+        return weakref.WeakMethod(callback)
+    return lambda: callback
+
+
+def subscribe(table: str, callback: Callable[[ChangeEvent], None]):
+    with _lock:
+        _subscribers.setdefault(table, []).append(_ref(callback))
+
+
+def unsubscribe(table: str, callback: Callable[[ChangeEvent], None]):
+    with _lock:
+        _subscribers[table] = [ref for ref in _subscribers.get(table, []) if ref() not in (None, callback)]
+
+
+def publish(table: str, action: str, ids: Optional[Iterable[int]] = None):
+    event = ChangeEvent(table, action, tuple(ids) if ids is not None else None)
+    captured = getattr(_capture, "events", None)
+    if captured is not None:
+        captured.append(event)
+
+    with _lock:
+        refs = list(_subscribers.get(table, ()))
+    for ref in refs:
+        callback = ref()
+        if callback is None:
+            continue
+        try:
+            callback(event)
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+
+
+@contextmanager
+def capturing():
+    """Junta los eventos publicados por este hilo dentro del bloque (ver server.py)."""
+    previous = getattr(_capture, "events", None)
+    _capture.events = captured = []
+    try:
+        yield captured
+    finally:
+        _capture.events = previous
+        if previous is not None:
+            previous.extend(captured)
@@ -3,9 +3,14 @@ import os
 import ctypes
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtGui import QIcon 
+from PyQt5.QtCore import QTimer
 from ui_mainwindow import MainWindow 
+from dialogs import dialog_pool
 import db
+import db_client
 import logger_config
+import maintenance
+import styles
 
 def resource_path(relative_path):
     """ 
@@ -28,8 +33,12 @@ def main():
     #  Inicialización de DB
     # La DB se creará donde esté el archivo .exe (o el .py), no en temporales
     print("Iniciando sistema...")
-    db.init_db()
-    print("Base de datos conectada correctamente.")
+    if db_client.install():
+        # Modo terminal: el servidor (server.py) es el dueño de la base de datos
+        print(f"Conectado al servidor {db.REMOTE_SERVER}.")
+    else:
+        db.init_db()
+        print("Base de datos conectada correctamente.")
      
     #  Configuración para barra de tareas Windows (AppID)
     # Esto evita que el icono se pierda en la barra de tareas de Windows
@@ -40,6 +49,10 @@ def main():
         pass 
 
     app = QApplication(sys.argv)
+    # Una sola hoja de estilos para toda la app (se parsea una vez)
+    app.setStyleSheet(styles.APP_STYLESHEET)
+    # ANALYZE / vacuum incremental / quick_check cuando nadie usa la app
+    maintenance.install(app)
     
     #  Cargar el icono usando la función segura
     # Esto busca "assets/logo.ico" correctamente ahora
@@ -53,6 +66,9 @@ def main():
 
     window = MainWindow()
     window.show()
+
+    # Deja listos los diálogos pesados cuando la ventana ya está visible
+    QTimer.singleShot(0, dialog_pool.warm_up)
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
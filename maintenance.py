@@ -0,0 +1,306 @@
+"""
+Mantenimiento automático de la base de datos.
+
+Las bajas lógicas (active = 0) y las ventas que entran todo el día dejan páginas
+libres y estadísticas viejas; sin mantenimiento el archivo solo crece y el
+planificador de consultas elige índices con datos de cuando la base era chica.
+run_maintenance() hace, en este orden:
+  1. PRAGMA incremental_vacuum: devuelve al disco las páginas libres.
+  2. ANALYZE (acotado con analysis_limit) y PRAGMA optimize.
+  3. PRAGMA quick_check.
+  4. Checkpoint PASSIVE del WAL, para que el archivo se achique de verdad.
+El resultado (duración, páginas liberadas, integridad) se anota en error_log.txt,
+que muestra el panel de Diagnóstico, y en app_meta.
+
+El paso 1 requiere auto_vacuum INCREMENTAL. Pasar una base existente a ese modo
+reescribe el archivo completo con VACUUM y bloquea a las demás cajas mientras
+dura, así que no lo hace el mantenimiento automático: convert_auto_vacuum() se
+ejecuta a pedido, con las otras cajas cerradas (botón de Avanzado o
+`python maintenance.py --convert-vacuum`).
+
+Política de checkpoints: con la app abierta (mantenimiento, compact_catalog)
+siempre PASSIVE, que no espera a las otras cajas. TRUNCATE, que además deja el
+-wal en cero pero frena las escrituras mientras espera a los lectores, solo se
+usa sin nadie más conectado: en convert_auto_vacuum() y al cerrar la app
+(checkpoint_on_exit, que no espera si otra caja sigue leyendo).
+
+MaintenanceScheduler lo ejecuta solo, en un hilo aparte, cuando la app lleva
+IDLE_SECONDS sin teclado ni mouse y pasaron MAINTENANCE_INTERVAL_HOURS desde la
+última vez. main.py lo instala con install(app); en modo terminal no se instala
+(la base es del servidor).
+
+Uso por consola:
+    python maintenance.py                     # mantenimiento completo una vez
+    python maintenance.py --convert-vacuum    # pasar a vacuum incremental
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from PyQt5.QtCore import QEvent, QObject, QTimer, pyqtSignal
+
+import db
+
+IDLE_SECONDS = 120                 # sin actividad del usuario para considerar la app inactiva
+CHECK_INTERVAL_MS = 30 * 1000      # cada cuánto se revisa si corresponde
+MAINTENANCE_INTERVAL_HOURS = 24    # como mucho una vez por día
+ANALYSIS_LIMIT = 1000              # filas por índice que mira ANALYZE (acota su duración)
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+USER_INPUT_EVENTS = frozenset({
+    QEvent.KeyPress, QEvent.MouseButtonPress, QEvent.MouseButtonDblClick,
+    QEvent.MouseMove, QEvent.Wheel, QEvent.TouchBegin,
+})
+
+_META_KEY = "maintenance_last"
+
+
+def run_maintenance() -> Dict[str, Any]:
+    """Ejecuta el mantenimiento completo. Devuelve el resumen que se guarda y se anota."""
+    started = time.monotonic()
+    result: Dict[str, Any] = {
+        'started_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'steps': {},
+    }
+
+    def step(name: str, sql: str):
+        t = time.monotonic()
+        rows = cur.execute(sql).fetchall()
+        result['steps'][name] = round(time.monotonic() - t, 3)
+        return rows
+
+    with closing(db.get_db_connection()) as conn:
+        conn.isolation_level = None  # VACUUM y varios PRAGMA no corren dentro de una transacción
+        cur = conn.cursor()
+        cur.row_factory = None
+        page_size = cur.execute("PRAGMA page_size").fetchone()[0]
+        pages_before = cur.execute("PRAGMA page_count").fetchone()[0]
+
+        # Sin auto_vacuum incremental el paso siguiente no libera nada (ver convert_auto_vacuum)
+        result['needs_conversion'] = cur.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL
+        result['free_pages'] = cur.execute("PRAGMA freelist_count").fetchone()[0]
+        t = time.monotonic()
+        # execute() avanza el PRAGMA un solo paso (una página); executescript lo corre entero
+        conn.executescript("PRAGMA incremental_vacuum;")
+        result['steps']['incremental_vacuum'] = round(time.monotonic() - t, 3)
+
+        cur.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+        step('analyze', "ANALYZE")
+        step('optimize', "PRAGMA optimize")
+
+        check = [row[0] for row in step('quick_check', "PRAGMA quick_check")]
+        result['quick_check'] = "ok" if check == ["ok"] else check[:20]
+
+        if cur.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            step('checkpoint', "PRAGMA wal_checkpoint(PASSIVE)")
+        pages_after = cur.execute("PRAGMA page_count").fetchone()[0]
+
+        result['reclaimed_pages'] = max(pages_before - pages_after, 0)
+        result['reclaimed_bytes'] = result['reclaimed_pages'] * page_size
+        result['size_bytes'] = pages_after * page_size
+        result['duration'] = round(time.monotonic() - started, 3)
+
+        cur.execute("""
+            INSERT INTO app_meta (key, value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """, (_META_KEY, json.dumps(result)))
+    return result
+
+
+def is_incremental() -> bool:
+    with closing(db.get_db_connection()) as conn:
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL
+
+
+def convert_auto_vacuum() -> Dict[str, Any]:
+    """
+    Pasa la base a auto_vacuum INCREMENTAL con un VACUUM completo, desde una sola
+    conexión. Reescribe todo el archivo: las otras cajas deben estar cerradas.
+    """
+    started = time.monotonic()
+    with closing(db.get_db_connection()) as conn:
+        conn.isolation_level = None
+        cur = conn.cursor()
+        page_size = cur.execute("PRAGMA page_size").fetchone()[0]
+        pages_before = cur.execute("PRAGMA page_count").fetchone()[0]
+        converted = cur.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL
+        if converted:
+            cur.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cur.execute("VACUUM")
+            if cur.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+                cur.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        pages_after = cur.execute("PRAGMA page_count").fetchone()[0]
+    result = {
+        'converted': converted,
+        'reclaimed_bytes': max(pages_before - pages_after, 0) * page_size,
+        'size_bytes': pages_after * page_size,
+        'duration': round(time.monotonic() - started, 3),
+    }
+    if converted:
+        try:
+            with open(os.path.join(db.USER_DATA_DIR, "error_log.txt"), "a", encoding="utf-8") as f:
+                f.write(f"\n[{datetime.now():%Y-%m-%d %H:%M:%S}] BASE PASADA A VACUUM INCREMENTAL: "
+                        f"{result['duration']:.1f} s, {result['reclaimed_bytes'] / 1024:,.0f} KB liberados\n")
+        except OSError:
+            pass
+    return result
+
+
+def checkpoint_on_exit():
+    """TRUNCATE del WAL al cerrar la app. Si otra caja está usando la base no espera: lo deja para después."""
+    try:
+        with closing(db.get_db_connection()) as conn:
+            conn.execute("PRAGMA busy_timeout = 0")
+            if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    except sqlite3.Error:
+        pass
+
+
+def get_last_maintenance() -> Optional[Dict[str, Any]]:
+    with closing(db.get_db_connection()) as conn:
+        row = conn.execute("SELECT value FROM app_meta WHERE key = ?", (_META_KEY,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def describe(result: Dict[str, Any]) -> str:
+    """Una línea para el log y el panel de Diagnóstico."""
+    if 'error' in result:
+        return f"falló: {result['error']}"
+    check = "ok" if result['quick_check'] == "ok" else f"{len(result['quick_check'])} PROBLEMAS"
+    text = (f"{result['duration']:.1f} s, {result['reclaimed_pages']} páginas liberadas "
+            f"({result['reclaimed_bytes'] / 1024:,.0f} KB), base de {result['size_bytes'] / 1048576:,.1f} MB, "
+            f"integridad {check}")
+    if result.get('converted'):
+        text += " (base pasada a vacuum incremental)"
+    if result.get('needs_conversion'):
+        text += " (sin vacuum incremental: activarlo desde Avanzado)"
+    return text
+
+
+def _log(result: Dict[str, Any]):
+    try:
+        with open(os.path.join(db.USER_DATA_DIR, "error_log.txt"), "a", encoding="utf-8") as f:
+            f.write(f"\n[{datetime.now():%Y-%m-%d %H:%M:%S}] MANTENIMIENTO DE BASE DE DATOS: {describe(result)}\n")
+            if 'steps' in result:
+                f.write("Pasos: " + ", ".join(f"{name} {secs:.2f} s" for name, secs in result['steps'].items()) + "\n")
+            if result.get('quick_check') not in (None, "ok"):
+                f.write("quick_check:\n" + "\n".join(result['quick_check']) + "\n")
+            if 'traceback' in result:
+                f.write(result['traceback'])
+    except OSError:
+        pass
+
+
+class MaintenanceScheduler(QObject):
+    """Detecta la inactividad desde el event loop y lanza run_maintenance() en un hilo."""
+
+    finished = pyqtSignal(dict)  # se entrega en el hilo de la interfaz
+
+    def __init__(self, app, idle_seconds: int = IDLE_SECONDS,
+                 interval_hours: float = MAINTENANCE_INTERVAL_HOURS):
+        super().__init__(app)
+        self.idle_seconds = idle_seconds
+        self.interval = timedelta(hours=interval_hours)
+        self._last_input = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        last = get_last_maintenance()
+        self._last_run = datetime.strptime(last['started_at'], '%Y-%m-%d %H:%M:%S') if last else None
+
+        app.installEventFilter(self)
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._check)
+        self._timer.start(CHECK_INTERVAL_MS)
+
+    def eventFilter(self, obj, event):
+        if event.type() in USER_INPUT_EVENTS:
+            self._last_input = time.monotonic()
+        return False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _check(self):
+        if self.running or time.monotonic() - self._last_input < self.idle_seconds:
+            return
+        if self._last_run is None or datetime.now() - self._last_run >= self.interval:
+            self.start()
+
+    def start(self) -> bool:
+        """Lanza el mantenimiento ya (ej. botón del panel). False si ya está corriendo."""
+        if self.running:
+            return False
+        self._last_run = datetime.now()
+        self._thread = threading.Thread(target=self._run, name="easyinv-maintenance", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Deja de programar el mantenimiento y espera el que esté en curso (ej. antes de restaurar)."""
+        self._timer.stop()
+        if self.running:
+            self._thread.join()
+
+    def _run(self):
+        try:
+            result = run_maintenance()
+        except Exception as e:
+            result = {'error': str(e), 'traceback': traceback.format_exc()}
+        _log(result)
+        self.finished.emit(result)
+
+
+_scheduler: Optional[MaintenanceScheduler] = None
+
+
+def install(app) -> Optional[MaintenanceScheduler]:
+    """Activa el mantenimiento automático (no en modo terminal)."""
+    global _scheduler
+    if db.REMOTE_SERVER:
+        return None
+    if _scheduler is None:
+        _scheduler = MaintenanceScheduler(app)
+        app.aboutToQuit.connect(checkpoint_on_exit)
+    return _scheduler
+
+
+def get_scheduler() -> Optional[MaintenanceScheduler]:
+    return _scheduler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mantenimiento de la base EasyINV")
+    parser.add_argument("--convert-vacuum", action="store_true",
+                        help="Pasar la base a vacuum incremental (cerrar antes las otras cajas)")
+    parser.add_argument("--db", help="Base a mantener (por defecto la de la app)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        db.DB_PATH = os.path.abspath(args.db)
+    db.init_db(qt_connection=False)
+    if args.convert_vacuum:
+        result = convert_auto_vacuum()
+        if not result['converted']:
+            print("La base ya usa vacuum incremental.")
+        else:
+            print(f"Base pasada a vacuum incremental en {result['duration']:.1f} s, "
+                  f"{result['reclaimed_bytes'] / 1024:,.0f} KB liberados.")
+        return 0
+    result = run_maintenance()
+    _log(result)
+    print(describe(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
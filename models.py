@@ -0,0 +1,49 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+import db
+
+
+class ProviderListModel(QAbstractListModel):
+    """
+    Lista de proveedores activos para los combos de los diálogos de ítems.
+    La primera fila es "sin asignar" (dato None). Se comparte entre todos los
+    diálogos y solo se recarga cuando db invalida la caché de proveedores.
+    """
+    NONE_LABEL = "--- General / Sin Asignar ---"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = [(self.NONE_LABEL, None)]
+        self._version = None
+
+    def refresh_if_stale(self):
+        version = db.provider_cache_version()
+        if version == self._version:
+            return
+        self.beginResetModel()
+        self._rows = [(self.NONE_LABEL, None)] + [(p['name'], p['id']) for p in db.get_cached_providers()]
+        self._version = version
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not (0 <= index.row() < len(self._rows)):
+            return None
+        label, provider_id = self._rows[index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return label
+        if role == Qt.UserRole:
+            return provider_id
+        return None
+
+
+_provider_model = None
+
+def get_provider_model() -> ProviderListModel:
+    """Modelo compartido de proveedores, actualizado si hubo cambios desde el último uso."""
+    global _provider_model
+    if _provider_model is None:
+        _provider_model = ProviderListModel()
+    _provider_model.refresh_if_stale()
+    return _provider_model
@@ -0,0 +1,179 @@
+"""
+Sugerencias de pedido según la velocidad de venta real.
+
+Para cada ítem activo se calcula cuántas unidades se venden por día (promedio
+ponderado de varias ventanas), el punto de pedido y cuánto pedir:
+
+    punto de pedido = max(stock mínimo, velocidad * (días de entrega + días de seguridad))
+    nivel objetivo  = max(stock máximo, velocidad * (entrega + seguridad + días de cobertura))
+    a pedir         = nivel objetivo - stock, solo si stock <= punto de pedido
+
+Sin ventas registradas el resultado coincide con la regla anterior (llenar
+hasta el máximo cuando se llega al mínimo). El cálculo se hace sobre todo el
+catálogo a la vez con NumPy; si NumPy no está instalado se usa Python puro.
+El resultado queda en caché hasta que entre una venta nueva o cambie un ítem.
+"""
+import math
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import db
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# (días, peso): las ventanas cortas reaccionan rápido, las largas suavizan picos
+VELOCITY_WINDOWS: Tuple[Tuple[int, float], ...] = ((7, 0.5), (30, 0.3), (90, 0.2))
+LEAD_TIME_DAYS = 7    # días que tarda el proveedor en entregar
+SAFETY_DAYS = 3       # colchón por demoras o picos de venta
+REVIEW_DAYS = 14      # días de venta que debe cubrir cada pedido
+
+
+class ReorderPlan:
+    """Resultado del cálculo, indexado por id de ítem."""
+
+    def __init__(self, ids: List[int], provider_ids: List[int], velocity: List[float],
+                 reorder_point: List[int], order_qty: List[int], order_value: List[float]):
+        self.ids = ids
+        self.provider_ids = provider_ids
+        self.velocity = velocity
+        self.reorder_point = reorder_point
+        self.order_qty = order_qty
+        self.order_value = order_value
+        self._index = dict(zip(ids, range(len(ids))))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get(self, item_id: int) -> Optional[Dict[str, Any]]:
+        i = self._index.get(item_id)
+        if i is None:
+            return None
+        return {
+            'velocity': self.velocity[i],
+            'reorder_point': self.reorder_point[i],
+            'order_qty': self.order_qty[i],
+            'order_value': self.order_value[i],
+        }
+
+    def to_order(self) -> Dict[int, Dict[str, Any]]:
+        """Solo los ítems que hay que pedir."""
+        return {self.ids[i]: self.get(self.ids[i]) for i, qty in enumerate(self.order_qty) if qty > 0}
+
+    def provider_totals(self) -> Dict[int, Tuple[int, float]]:
+        """proveedor -> (unidades a pedir, valor estimado). Los ítems sin proveedor van en 0."""
+        totals: Dict[int, Tuple[int, float]] = {}
+        for i, qty in enumerate(self.order_qty):
+            if qty > 0:
+                units, value = totals.get(self.provider_ids[i], (0, 0.0))
+                totals[self.provider_ids[i]] = (units + qty, value + self.order_value[i])
+        return totals
+
+
+def _daily_velocity(sold_row: Sequence[float], windows: Sequence[Tuple[int, float]]) -> float:
+    total_weight = sum(w for _, w in windows)
+    return sum(weight * qty / days for qty, (days, weight) in zip(sold_row, windows)) / total_weight
+
+
+def _compute_numpy(items, sold, windows, lead_days, cover_days) -> ReorderPlan:
+    n = len(items)
+    data = np.array(items, dtype=np.float64).reshape(n, 6)
+    ids = data[:, 0].astype(np.int64)
+    stock, min_stock, max_stock, price = data[:, 2], data[:, 3], data[:, 4], data[:, 5]
+
+    velocity = np.zeros(n)
+    if sold and n:
+        sold_arr = np.array(sold, dtype=np.float64).reshape(len(sold), len(windows) + 1)
+        days = np.array([d for d, _ in windows], dtype=np.float64)
+        weights = np.array([w for _, w in windows], dtype=np.float64)
+        rates = (sold_arr[:, 1:] / days) @ weights / weights.sum()
+        # `ids` viene ordenado: ubicamos cada ítem vendido con búsqueda binaria
+        sold_ids = sold_arr[:, 0].astype(np.int64)
+        pos = np.clip(np.searchsorted(ids, sold_ids), 0, max(n - 1, 0))
+        found = ids[pos] == sold_ids  # ventas de ítems ya borrados no cuentan
+        velocity[pos[found]] = rates[found]
+
+    reorder_point = np.maximum(min_stock, np.ceil(velocity * lead_days))
+    target = np.maximum(max_stock, np.ceil(velocity * cover_days))
+    order_qty = np.where(stock <= reorder_point, np.maximum(target - stock, 0), 0)
+
+    return ReorderPlan(
+        ids.tolist(), data[:, 1].astype(np.int64).tolist(),
+        np.round(velocity, 3).tolist(), reorder_point.astype(np.int64).tolist(),
+        order_qty.astype(np.int64).tolist(), (order_qty * price).tolist(),
+    )
+
+
+def _compute_python(items, sold, windows, lead_days, cover_days) -> ReorderPlan:
+    rates = {row[0]: _daily_velocity(row[1:], windows) for row in sold}
+    ids, provider_ids, velocity, reorder_point, order_qty, order_value = [], [], [], [], [], []
+    for item_id, provider_id, stock, min_stock, max_stock, price in items:
+        v = rates.get(item_id, 0.0)
+        rop = max(min_stock, math.ceil(v * lead_days))
+        target = max(max_stock, math.ceil(v * cover_days))
+        qty = max(target - stock, 0) if stock <= rop else 0
+        ids.append(item_id)
+        provider_ids.append(provider_id)
+        velocity.append(round(v, 3))
+        reorder_point.append(int(rop))
+        order_qty.append(int(qty))
+        order_value.append(qty * price)
+    return ReorderPlan(ids, provider_ids, velocity, reorder_point, order_qty, order_value)
+
+
+_cache: Dict[str, Any] = {'key': None, 'plan': None}
+
+def get_reorder_plan(windows: Sequence[Tuple[int, float]] = VELOCITY_WINDOWS,
+                     lead_time_days: int = LEAD_TIME_DAYS, safety_days: int = SAFETY_DAYS,
+                     review_days: int = REVIEW_DAYS) -> ReorderPlan:
+    """
+    Sugerencias para todo el catálogo. Se recalcula solo si hubo ventas o
+    cambios en ítems desde la última vez, si cambió el día o los parámetros.
+    """
+    windows = tuple(windows)
+    key = (db.get_reorder_state(), date.today(), windows, lead_time_days, safety_days, review_days)
+    if _cache['key'] == key:
+        return _cache['plan']
+
+    items = db.get_reorder_inputs()
+    sold = db.get_sold_qty_by_window([d for d, _ in windows])
+    plan = compute_plan(items, sold, windows, lead_time_days, safety_days, review_days)
+
+    _cache['key'], _cache['plan'] = key, plan
+    return plan
+
+
+def compute_plan(items: List[Tuple], sold: List[Tuple],
+                 windows: Sequence[Tuple[int, float]] = VELOCITY_WINDOWS,
+                 lead_time_days: int = LEAD_TIME_DAYS, safety_days: int = SAFETY_DAYS,
+                 review_days: int = REVIEW_DAYS) -> ReorderPlan:
+    """
+    Cálculo sin caché a partir de las filas de db.get_reorder_inputs() y
+    db.get_sold_qty_by_window() (ej. de otra sucursal, ver consolidate.py).
+    """
+    lead_days = lead_time_days + safety_days
+    cover_days = lead_days + review_days
+    compute = _compute_numpy if np is not None else _compute_python
+    return compute(items, sold, tuple(windows), lead_days, cover_days)
+
+
+# Columnas del CSV de pedido sugerido (Avanzado > Reporte de Pedidos)
+ORDER_REPORT_HEADERS = [
+    "Proveedor", "Teléfono Contacto", "SKU", "Producto", 
+    "Stock Actual", "Stock Mínimo", "Stock Máximo", 
+    "Venta Diaria (Prom.)", "Punto de Pedido",
+    "CANTIDAD A PEDIR (Sugerida)"
+]
+
+def order_report_line(row: Dict[str, Any], suggestion: Dict[str, Any]) -> List[Any]:
+    """Fila del CSV para una fila de db.get_order_report_rows() y su sugerencia."""
+    return [
+        row['provider_name'] if row['provider_name'] else "--- Sin Asignar ---",
+        row['provider_phone'] if row['provider_phone'] else "",
+        row['sku'], row['name'], 
+        row['stock'], row['min_stock'], row['max_stock'],
+        f"{suggestion['velocity']:.2f}", suggestion['reorder_point'],
+        suggestion['order_qty']
+    ]
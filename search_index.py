@@ -0,0 +1,116 @@
+import heapq
+from typing import Dict, Iterable, List, Optional, Set, Any
+
+from db import normalize_text
+
+# Un trigrama muy común (ej. " me") puede aparecer en decenas de miles de productos.
+# Cuando ya tenemos candidatos de trigramas más raros, las listas más largas que esto
+# solo se usan para sumar puntos a esos candidatos, no para agregar nuevos.
+MAX_POSTING_SCAN = 2000
+
+# Cuántos candidatos (por múltiplo de `limit`) pasan al ranking fino.
+PRESELECT_FACTOR = 10
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigramas de un texto ya normalizado, con relleno para favorecer el inicio de palabra."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Índice invertido en memoria (trigrama -> ids) para buscar productos
+    tolerando errores de tipeo. Se indexa SKU + nombre, normalizados
+    sin tildes ni mayúsculas.
+    """
+
+    def __init__(self, items: Optional[Iterable[Dict[str, Any]]] = None):
+        self.items: Dict[int, Dict[str, Any]] = {}
+        self._keys: Dict[int, str] = {}
+        self._skus: Dict[int, str] = {}
+        self._grams: Dict[int, Set[str]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        if items:
+            for item in items:
+                self.add(item)
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, item: Dict[str, Any]):
+        """Agrega o reemplaza un producto del índice."""
+        item_id = item['id']
+        if item_id in self.items:
+            self.remove(item_id)
+
+        key = normalize_text(f"{item.get('sku') or ''} {item.get('name') or ''}")
+        grams = trigrams(key)
+        self.items[item_id] = item
+        self._keys[item_id] = key
+        self._skus[item_id] = normalize_text(item.get('sku'))
+        self._grams[item_id] = grams
+        for g in grams:
+            self._postings.setdefault(g, set()).add(item_id)
+
+    def remove(self, item_id: int):
+        self.items.pop(item_id, None)
+        self._keys.pop(item_id, None)
+        self._skus.pop(item_id, None)
+        for g in self._grams.pop(item_id, ()):
+            ids = self._postings.get(g)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self._postings[g]
+
+    def search(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Devuelve los `limit` productos más parecidos a `text`.
+        Ordena por similitud de trigramas (Jaccard), con prioridad para
+        coincidencias exactas de SKU y subcadenas.
+        """
+        query = normalize_text(text.strip())
+        if not query:
+            return []
+
+        q_grams = trigrams(query)
+        # Primero los trigramas raros: son los que más discriminan
+        ordered = sorted(q_grams, key=lambda g: len(self._postings.get(g, ())))
+
+        scores: Dict[int, int] = {}
+        for g in ordered:
+            ids = self._postings.get(g)
+            if not ids:
+                continue
+            if scores and len(ids) > MAX_POSTING_SCAN:
+                for item_id in scores:
+                    if item_id in ids:
+                        scores[item_id] += 1
+            else:
+                for item_id in ids:
+                    scores[item_id] = scores.get(item_id, 0) + 1
+
+        if not scores:
+            return []
+
+        # Con consultas largas exigimos un mínimo de trigramas en común para descartar ruido
+        min_shared = 1 if len(q_grams) <= 4 else max(2, len(q_grams) // 3)
+        q_len = len(q_grams)
+
+        def rank(item_id):
+            shared = scores[item_id]
+            key = self._keys[item_id]
+            similarity = shared / (q_len + len(self._grams[item_id]) - shared)
+            if self._skus[item_id] == query:
+                similarity += 2.0
+            elif query in key:
+                similarity += 1.0
+            return similarity
+
+        candidates = [i for i, shared in scores.items() if shared >= min_shared]
+        if len(candidates) > limit * PRESELECT_FACTOR:
+            # Preselección barata (clave en C) antes del ranking fino en Python
+            candidates = heapq.nlargest(limit * PRESELECT_FACTOR, candidates, key=scores.__getitem__)
+        best = heapq.nlargest(limit, candidates, key=rank)
+        return [self.items[i] for i in best]
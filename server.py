@@ -0,0 +1,297 @@
+"""
+Servidor local de inventario para varias cajas.
+
+Un solo proceso abre la base de datos y las demás PCs (terminales) le hablan
+por HTTP/JSON en la red local, en lugar de abrir el mismo archivo SQLite por
+una carpeta compartida. Las lecturas se atienden en paralelo; las escrituras
+pasan por la cola de write_queue.py: un único hilo escritor que confirma en un
+solo commit las que llegan juntas, así nunca compiten por el bloqueo y varias
+cajas vendiendo a la vez no pagan un fsync por venta.
+
+Uso:
+    python server.py                                  # escucha en 127.0.0.1:8765
+    python server.py --host 0.0.0.0 --token CLAVE     # visible para las otras cajas
+
+Las terminales se conectan con la variable de entorno EASYINV_SERVER
+(ver db_client.py). Con --token (o EASYINV_TOKEN) cada pedido debe traer el
+mismo valor en la cabecera X-EasyINV-Token; fuera de 127.0.0.1 es obligatorio,
+para que nadie en la red pueda escribir sin autenticarse.
+
+Protocolo: POST /api/<función> con cuerpo {"args": [...], "kwargs": {...}}.
+También GET /api/<función>?param=valor (ej. /api/search?text=tornillo&limit=20).
+Respuesta: {"ok": true, "result": ...} o {"ok": false, "error": "...", "type": "ValueError"}.
+Una función o parámetros inexistentes responden 404 / 400.
+Las escrituras agregan "events": [[tabla, acción, ids], ...] con los eventos de
+cambio (events.py) que produjeron, para que la terminal los publique localmente.
+Solo se exponen las funciones de db listadas en READ_ENDPOINTS / WRITE_ENDPOINTS.
+"""
+import argparse
+import asyncio
+import hmac
+import inspect
+import ipaddress
+import json
+import os
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, Tuple
+from urllib.parse import parse_qsl
+
+import db
+import events
+from write_queue import WriteQueue
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+TOKEN_ENV = "EASYINV_TOKEN"
+TOKEN_HEADER = "x-easyinv-token"
+MAX_BODY_BYTES = 16 * 1024 * 1024
+READ_WORKERS = 8
+WRITE_WORKERS = 32  # pedidos de escritura esperando su commit a la vez
+
+READ_ENDPOINTS = frozenset({
+    "get_items", "search_items", "get_item_by_id", "get_items_by_ids", "get_sale_catalog", "get_catalog_versions",
+    "revalidate_cart", "get_providers", "get_cached_providers", "get_provider_name",
+    "provider_cache_version", "get_provider_dashboard", "get_items_by_provider",
+    "get_reorder_inputs", "get_sold_qty_by_window", "get_reorder_state", "get_order_report_rows",
+    "get_all_sales", "get_sales_by_ids", "get_sale_details", "get_sales_with_details", "get_sales_summary",
+    "get_daily_sales", "get_sales_by_payment", "get_abc_report",
+    "get_open_shift", "get_shift_report", "get_recent_shifts",
+    "get_stock_as_of", "get_stock_movements",
+    "get_inventory_valuation", "get_valuation_totals", "verify_valuation",
+    "get_store_id", "get_applied_sources", "export_changes",
+})
+
+WRITE_ENDPOINTS = frozenset({
+    "add_item", "update_item", "delete_item_by_sku", "import_items", "add_items_bulk", "update_items_bulk",
+    "add_provider", "update_provider", "delete_provider",
+    "register_sale", "open_shift", "close_shift",
+    "take_stock_snapshot", "rebuild_sales_rollups", "rebuild_valuation", "apply_changes",
+})
+
+# Referencias tomadas al importar: si en este mismo proceso se instala db_client,
+# el servidor sigue llamando a las funciones locales y no a sí mismo.
+_DB_FUNCTIONS = {name: getattr(db, name) for name in READ_ENDPOINTS | WRITE_ENDPOINTS}
+
+# Nombres cortos para clientes que no son la app (ej. /api/search?text=...)
+ENDPOINT_ALIASES = {"search": "search_items"}
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+                405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+# ------------------------------------------------------------------------------
+# JSON: los dict con claves enteras (ej. {item_id: version}) no sobreviven a
+# json.dumps, que las vuelve texto. Se envían como {"__int_keys__": [[k, v], ...]}.
+# ------------------------------------------------------------------------------
+
+def encode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if value and all(isinstance(k, int) for k in value):
+            return {"__int_keys__": [[k, encode_value(v)] for k, v in value.items()]}
+        return {k: encode_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(v) for v in value]
+    return value
+
+def _decode_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "__int_keys__" in obj:
+        return {int(k): v for k, v in obj["__int_keys__"]}
+    return obj
+
+def dumps(value: Any) -> bytes:
+    return json.dumps(encode_value(value), ensure_ascii=False).encode("utf-8")
+
+def loads(data: bytes) -> Any:
+    return json.loads(data.decode("utf-8"), object_hook=_decode_hook) if data else None
+
+
+def query_kwargs(func, query: str) -> Dict[str, Any]:
+    """Parámetros de la URL como kwargs; los que tienen default numérico se convierten."""
+    params = inspect.signature(func).parameters
+    kwargs = {}
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        default = params[key].default if key in params else None
+        if isinstance(default, (int, float)) and not isinstance(default, bool):
+            value = type(default)(value)
+        kwargs[key] = value
+    return kwargs
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class InventoryServer:
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, token: str = ""):
+        if not token and not is_loopback(host):
+            raise ValueError(f"Escuchar en {host} requiere un token (--token o {TOKEN_ENV})")
+        self.host = host
+        self.port = port
+        self.token = token
+        self.read_pool = ThreadPoolExecutor(max_workers=READ_WORKERS, thread_name_prefix="easyinv-read")
+        # Las funciones de escritura de db encolan su transacción en write_queue y
+        # esperan el commit del lote; estos hilos solo esperan, no compiten por la base.
+        self.write_queue = WriteQueue()
+        db.set_write_queue(self.write_queue)
+        self.write_pool = ThreadPoolExecutor(max_workers=WRITE_WORKERS, thread_name_prefix="easyinv-write")
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        print(f"Servidor EasyINV escuchando en http://{self.host}:{self.port} (DB: {db.DB_PATH})")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server:
+            self._server.close()
+        self.read_pool.shutdown(wait=False)
+        self.write_pool.shutdown(wait=True)
+        db.set_write_queue(None)
+        self.write_queue.close()
+
+    # --- HTTP (mínimo: HTTP/1.1 con keep-alive y Content-Length) ---
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, {"ok": False, "error": "Pedido inválido"})
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"ok": False, "error": "Pedido demasiado grande"})
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.dispatch(method.upper(), target, headers, body)
+                await self._respond(writer, status, payload)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any]):
+        data = dumps(payload)
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+    # --- API ---
+
+    async def dispatch(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, Any]]:
+        # Comparación en tiempo constante: no revela cuántos caracteres acertó
+        if self.token and not hmac.compare_digest(headers.get(TOKEN_HEADER, "").encode("utf-8"),
+                                                  self.token.encode("utf-8")):
+            return 403, {"ok": False, "error": "Token inválido"}
+
+        path, _, query = target.partition("?")
+        if not path.startswith("/api/"):
+            return 404, {"ok": False, "error": f"Ruta desconocida: {path}"}
+        name = ENDPOINT_ALIASES.get(path[5:], path[5:])
+
+        if name == "ping":
+            return 200, {"ok": True, "result": {"db": db.DB_PATH}}
+        if name not in READ_ENDPOINTS and name not in WRITE_ENDPOINTS:
+            return 404, {"ok": False, "error": f"Función no disponible: {name}"}
+        if method not in ("GET", "POST"):
+            return 405, {"ok": False, "error": "Usa GET o POST"}
+
+        func = _DB_FUNCTIONS[name]
+        try:
+            request = loads(body) or {}
+            args = request.get("args", [])
+            kwargs = request.get("kwargs", {})
+        except (ValueError, AttributeError) as e:
+            return 400, {"ok": False, "error": f"JSON inválido: {e}"}
+        try:
+            kwargs = {**kwargs, **query_kwargs(func, query)}
+            inspect.signature(func).bind(*args, **kwargs)
+        except (TypeError, ValueError) as e:
+            return 400, {"ok": False, "error": f"Parámetros inválidos para {name}: {e}", "type": "TypeError"}
+
+        call = partial(func, *args, **kwargs)
+        try:
+            if name in WRITE_ENDPOINTS:
+                result, published = await asyncio.get_running_loop().run_in_executor(
+                    self.write_pool, _call_capturing_events, call)
+                return 200, {"ok": True, "result": result, "events": published}
+            result = await asyncio.get_running_loop().run_in_executor(self.read_pool, call)
+            return 200, {"ok": True, "result": result}
+        except (ValueError, TypeError, LookupError) as e:
+            # Errores de negocio (SKU duplicado, turno abierto...) o de parámetros
+            return 200, {"ok": False, "error": str(e), "type": type(e).__name__}
+        except Exception as e:
+            _log_error(name, e)
+            return 500, {"ok": False, "error": str(e), "type": type(e).__name__}
+
+
+def _call_capturing_events(call) -> Tuple[Any, list]:
+    with events.capturing() as published:
+        result = call()
+    return result, published
+
+
+def _log_error(name: str, error: Exception):
+    try:
+        with open(os.path.join(db.USER_DATA_DIR, "error_log.txt"), "a", encoding="utf-8") as f:
+            f.write(f"\n[{datetime.now():%Y-%m-%d %H:%M:%S}] ERROR EN SERVIDOR ({name}): {error}\n")
+            f.write(traceback.format_exc())
+    except OSError:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local EasyINV para varias cajas")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV, ""),
+                        help=f"Clave que deben enviar las terminales (por defecto {TOKEN_ENV})")
+    args = parser.parse_args(argv)
+    if not args.token and not is_loopback(args.host):
+        parser.error(f"--host {args.host} expone el servidor a la red: indica --token (o {TOKEN_ENV})")
+
+    db.init_db(qt_connection=False)
+    server = InventoryServer(args.host, args.port, args.token)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("Servidor detenido.")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
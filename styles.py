@@ -0,0 +1,86 @@
+# ==============================================================================
+# HOJA DE ESTILOS GLOBAL
+# Se aplica una sola vez con app.setStyleSheet() en main.py. Los diálogos solo
+# asignan objectName a los widgets; así Qt no vuelve a parsear un stylesheet por
+# cada widget cada vez que se construye un diálogo.
+# ==============================================================================
+
+APP_STYLESHEET = """
+/* --- Formularios de ítems (Agregar / Editar) --- */
+QDialog#ItemFormDialog QLineEdit,
+QDialog#ItemFormDialog QSpinBox,
+QDialog#ItemFormDialog QTextEdit {
+    background-color: white;
+    border: 1px solid #bdc3c7;
+    border-radius: 4px;
+    padding: 4px;
+}
+QDialog#ItemFormDialog QLineEdit:focus,
+QDialog#ItemFormDialog QSpinBox:focus,
+QDialog#ItemFormDialog QTextEdit:focus {
+    border: 2px solid #3498db;
+}
+QDialog#ItemFormDialog QComboBox {
+    background-color: white;
+    border: 1px solid #bdc3c7;
+    border-radius: 4px;
+    padding: 4px;
+}
+QDialog#ItemFormDialog QComboBox:focus { border: 2px solid #3498db; }
+QDialog#ItemFormDialog QComboBox::drop-down { border: 0px; }
+
+/* Stock mínimo: alerta en naranja */
+QDialog#ItemFormDialog QSpinBox#minStockInput { color: #e67e22; font-weight: bold; }
+
+/* Campos de solo lectura (SKU al editar) */
+QDialog#ItemFormDialog QLineEdit#readonlyInput {
+    background-color: #ecf0f1;
+    color: #7f8c8d;
+    border: 1px solid #bdc3c7;
+}
+
+QPushButton#btnSaveItem { background-color: #27ae60; color: white; font-weight: bold; padding: 10px; border-radius: 4px; }
+QPushButton#btnSaveItem:focus { border: 2px solid #1e8449; background-color: #219150; }
+
+QPushButton#btnSaveEdit { background-color: #f39c12; color: white; font-weight: bold; padding: 10px; border-radius: 4px; }
+QPushButton#btnSaveEdit:focus { border: 2px solid #d35400; background-color: #e67e22; }
+
+QPushButton#btnCancel { padding: 10px; border: 1px solid #bdc3c7; border-radius: 4px; background-color: #ecf0f1; }
+QPushButton#btnCancel:focus { border: 2px solid #95a5a6; }
+
+/* --- Nueva Venta --- */
+QFrame#saleTopFrame,
+QFrame#saleTopFrame QLabel {
+    background-color: #f1f2f6;
+    border-radius: 8px;
+    padding: 10px;
+}
+QDialog#SaleDialog QComboBox {
+    background-color: white;
+    border: 1px solid #bdc3c7;
+    border-radius: 4px;
+    padding: 5px;
+    min-width: 150px;
+}
+QDialog#SaleDialog QComboBox:focus { border: 2px solid #3498db; }
+QDialog#SaleDialog QComboBox::drop-down { border: 0px; }
+
+QDialog#SaleDialog QLineEdit,
+QDialog#SaleDialog QSpinBox {
+    background-color: white;
+    padding: 5px;
+    border: 1px solid #bdc3c7;
+    border-radius: 4px;
+}
+QDialog#SaleDialog QLineEdit:focus,
+QDialog#SaleDialog QSpinBox:focus { border: 2px solid #3498db; }
+
+QPushButton#btnAddToCart { background-color: #3498db; color: white; font-weight: bold; padding: 6px; border-radius: 4px; }
+QPushButton#btnAddToCart:focus { border: 2px solid #2c3e50; background-color: #2980b9; }
+QPushButton#btnAddToCart:pressed { background-color: #1abc9c; }
+
+QLabel#saleTotal { font-size: 24px; font-weight: bold; color: #27ae60; }
+
+QPushButton#btnConfirmSale { background-color: #2ecc71; color: white; font-size: 16px; font-weight: bold; border-radius: 5px; }
+QPushButton#btnConfirmSale:focus { border: 3px solid #1e8449; background-color: #27ae60; }
+"""
@@ -0,0 +1,93 @@
+"""
+Sincronización de sucursales por paquetes de cambios.
+
+Cada sucursal registra en change_log qué filas de productos, proveedores y
+ventas cambiaron (ver db.py, REGISTRO DE CAMBIOS). En lugar de mandar la base
+completa por export_database, la sucursal exporta solo lo cambiado desde la
+última secuencia que recibió la casa matriz, y la casa matriz lo aplica sobre
+la réplica de esa sucursal (un archivo por sucursal, ej. para consolidate.py).
+
+Uso:
+    # En la sucursal
+    python sync.py export --since 1520 -o centro_1520.json.gz
+
+    # En la casa matriz
+    python sync.py apply centro_1520.json.gz --db sucursales/centro.db
+    python sync.py status --db sucursales/centro.db    # hasta qué secuencia llegó
+
+Sin --db se usa la base de la app (db.DB_PATH).
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+
+import db
+
+
+def write_package(changes, path: str):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(changes, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def read_package(path: str):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _open(path: str, replica: bool = False):
+    if path:
+        db.DB_PATH = os.path.abspath(path)
+    # Una réplica nueva arranca vacía, no desde la plantilla de la app
+    db.init_db(qt_connection=False, use_template=not replica)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportar / aplicar cambios entre sucursales EasyINV")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p_export = commands.add_parser("export", help="Exportar los cambios de esta base")
+    p_export.add_argument("--since", type=int, default=0, help="Última secuencia ya aplicada en destino")
+    p_export.add_argument("-o", "--output", help="Archivo .json.gz (por defecto cambios_<tienda>_<desde>-<hasta>.json.gz)")
+    p_export.add_argument("--db")
+
+    p_apply = commands.add_parser("apply", help="Aplicar un paquete sobre la réplica de una sucursal")
+    p_apply.add_argument("package")
+    p_apply.add_argument("--db", required=True, help="Réplica de la sucursal (se crea si no existe)")
+
+    p_status = commands.add_parser("status", help="Identificador de la base y sucursales aplicadas")
+    p_status.add_argument("--db")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        _open(args.db)
+        changes = db.export_changes(args.since)
+        output = args.output or f"cambios_{changes['store_id'][:8]}_{changes['from_seq']}-{changes['to_seq']}.json.gz"
+        write_package(changes, output)
+        rows = sum(len(t['rows']) + len(t['deleted']) for t in changes['tables'].values())
+        print(f"{rows} filas cambiadas (secuencia {changes['from_seq']} -> {changes['to_seq']}) "
+              f"en {output} ({os.path.getsize(output):,} bytes)")
+
+    elif args.command == "apply":
+        _open(args.db, replica=True)
+        try:
+            result = db.apply_changes(read_package(args.package))
+        except ValueError as e:
+            print(f"No se aplicó: {e}")
+            return 1
+        print(f"Sucursal {result['source'][:8]}: {result['rows']} filas copiadas, "
+              f"{result['deleted']} borradas. Secuencia actual: {result['last_seq']}")
+
+    elif args.command == "status":
+        _open(args.db)
+        print(f"Base: {db.DB_PATH}")
+        print(f"Identificador de tienda: {db.get_store_id()}")
+        for source in db.get_applied_sources():
+            print(f"  réplica de {source['source']}: hasta secuencia {source['last_seq']} ({source['applied_at']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
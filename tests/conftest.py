@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+import reorder  # noqa: E402
+
+
+@pytest.fixture
+def inventory_db(tmp_path, monkeypatch):
+    """Base vacía en un directorio temporal (sin plantilla ni conexión QtSql)."""
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "inventory.db"))
+    monkeypatch.setattr(db, "USER_DATA_DIR", str(tmp_path))
+    db.set_write_queue(None)
+    db.invalidate_provider_cache()  # también vacía la caché de ítems
+    db.clear_abc_cache()
+    reorder._cache.update(key=None, plan=None)
+    db.init_db(qt_connection=False, use_template=False)
+    yield db
+    db.invalidate_provider_cache()
+    db.clear_abc_cache()
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """QApplication sin pantalla, para probar diálogos."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+def wait_until(app, condition, timeout=10.0):
+    """Procesa eventos de Qt hasta que `condition()` sea verdadera."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "tiempo de espera agotado"
+        app.processEvents()
+        time.sleep(0.005)
+
+
+def raw_connection():
+    return sqlite3.connect(db.DB_PATH)
+
+
+def ledger_mismatches():
+    """Ítems cuyo stock no coincide con la suma de su libro de movimientos."""
+    with raw_connection() as conn:
+        return conn.execute("""
+            SELECT i.id, i.stock, COALESCE(m.total, 0)
+            FROM items i
+            LEFT JOIN (SELECT item_id, SUM(delta) AS total FROM stock_movements GROUP BY item_id) m
+                ON m.item_id = i.id
+            WHERE i.stock != COALESCE(m.total, 0)
+        """).fetchall()
+
+
+def sell(item_id, qty, price=10.0, name="Producto"):
+    return db.register_sale("Venta", 0, [{'id': item_id, 'name': name, 'qty': qty, 'price': price}], "Efectivo")
@@ -0,0 +1,52 @@
+import threading
+from datetime import date
+
+from conftest import sell
+
+TODAY = date.today().isoformat()
+
+
+def test_abc_tiers_and_cache(inventory_db):
+    db = inventory_db
+    big = db.add_item("A1", "Taladro", "", 100.0, 50)
+    mid = db.add_item("B1", "Martillo", "", 10.0, 50)
+    small = db.add_item("C1", "Clavo", "", 1.0, 50)
+    sell(big, 9, price=100.0)   # 90%
+    sell(mid, 6, price=10.0)    # 6%
+    sell(small, 40, price=1.0)  # 4%
+
+    rows = db.get_abc_report(TODAY, TODAY)
+    assert [(r['item_id'], r['tier']) for r in rows] == [(big, 'A'), (mid, 'B'), (small, 'C')]
+    assert rows[2]['units_rank'] == 1
+
+    # El resultado es una copia: modificarlo no toca la caché
+    rows[0]['tier'] = 'X'
+    assert db.get_abc_report(TODAY, TODAY)[0]['tier'] == 'A'
+
+    # Una venta nueva invalida la caché
+    sell(small, 1, price=1000.0)
+    assert db.get_abc_report(TODAY, TODAY)[0]['item_id'] == small
+
+
+def test_abc_cache_from_several_threads(inventory_db):
+    db = inventory_db
+    item_id = db.add_item("A1", "Taladro", "", 100.0, 1000)
+    sell(item_id, 1, price=100.0)
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(200):
+                day = f"2020-01-{(i + offset) % 28 + 1:02d}"
+                db.get_abc_report(day, TODAY)
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(db._abc_cache) <= db.ABC_CACHE_SIZE
@@ -0,0 +1,72 @@
+import os
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import ledger_mismatches, raw_connection, sell
+
+
+@pytest.fixture
+def old_sales(inventory_db):
+    """Seis ventas: tres de hace dos años (archivables) y tres de hoy."""
+    db = inventory_db
+    a = db.add_item("A1", "Tornillo", "", 2.0, 100)
+    b = db.add_item("B1", "Tuerca", "", 1.0, 100)
+    old_ids = [sell(a, 1, price=2.0), sell(b, 2, price=1.0), sell(a, 3, price=2.0)]
+    for item_id in (a, b, a):
+        sell(item_id, 1)
+    with raw_connection() as conn:
+        conn.executemany("UPDATE sales SET created_at = datetime(created_at, '-2 years') WHERE id = ?",
+                         [(sale_id,) for sale_id in old_ids])
+    db.rebuild_sales_rollups()
+    return old_ids
+
+
+def reads(db, old_ids):
+    return {
+        'with_details': db.get_sales_with_details("2000-01-01", "2100-01-01"),
+        'all': db.get_all_sales(),
+        'details': [db.get_sale_details(sale_id) for sale_id in old_ids],
+        'daily': db.get_daily_sales(),
+        'summary': db.get_sales_summary(),
+    }
+
+
+def test_archive_keeps_every_read(inventory_db, old_sales):
+    db = inventory_db
+    before = reads(db, old_sales)
+    cutoff = (date.today() - timedelta(days=400)).isoformat()
+
+    result = db.archive_sales(cutoff)
+
+    assert result['sales'] == 3
+    assert os.path.exists(db.get_archive_path())
+    assert db.get_archive_cutoff() == cutoff
+    with raw_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 3
+    assert reads(db, old_sales) == before
+    # Reconstruir los resúmenes no pierde los días archivados
+    db.rebuild_sales_rollups()
+    assert reads(db, old_sales) == before
+    assert ledger_mismatches() == []
+
+    # Volver a ejecutar no mueve nada más
+    assert db.archive_sales(cutoff)['sales'] == 0
+
+
+def test_archive_refuses_recent_dates(inventory_db):
+    with pytest.raises(ValueError):
+        inventory_db.archive_sales(date.today().isoformat())
+
+
+def test_compaction_keeps_items_sold_only_in_archive(inventory_db, old_sales):
+    db = inventory_db
+    item_id = db.add_item("Z1", "Solo archivado", "", 3.0, 5)
+    sale_id = sell(item_id, 1, price=3.0)
+    with raw_connection() as conn:
+        conn.execute("UPDATE sales SET created_at = datetime(created_at, '-2 years') WHERE id = ?", (sale_id,))
+    db.archive_sales((date.today() - timedelta(days=400)).isoformat())
+    db.delete_item_by_sku("Z1")
+
+    assert db.compact_catalog()['items'] == 0
+    assert db.get_sale_details(sale_id)[0]['sku'] == "Z1"
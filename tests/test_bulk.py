@@ -0,0 +1,78 @@
+from conftest import ledger_mismatches
+from write_queue import WriteQueue
+
+
+def test_add_items_bulk_statuses(inventory_db):
+    db = inventory_db
+    provider = db.add_provider("Ferretería", "555")
+    retired = db.add_provider("Cerrado", "000")
+    db.delete_provider(retired)
+    db.add_item("OLD", "Borrado", "", 1.0, 3)
+    db.delete_item_by_sku("OLD")
+    db.add_item("ACT", "Activo", "", 1.0, 1)
+
+    results = db.add_items_bulk([
+        {'sku': "N1", 'name': "Nuevo", 'price': 2.0, 'stock': 4, 'provider_id': provider},
+        {'sku': "OLD", 'name': "Vuelve", 'price': 1.5, 'stock': 7},
+        {'sku': "ACT", 'name': "Repetido", 'price': 1.0, 'stock': 1},
+        {'sku': "N1", 'name': "Dos veces", 'price': 1.0, 'stock': 1},
+        {'sku': "", 'name': "Sin SKU", 'price': 1.0, 'stock': 1},
+        {'sku': "B1", 'name': "Bool", 'price': 1.0, 'stock': True},
+        {'sku': "P1", 'name': "Proveedor de baja", 'price': 1.0, 'stock': 1, 'provider_id': retired},
+        {'sku': "P2", 'name': "Proveedor inexistente", 'price': 1.0, 'stock': 1, 'provider_id': 999},
+        {'sku': "X1", 'name': "Campo raro", 'price': 1.0, 'stock': 1, 'color': "rojo"},
+    ])
+
+    assert [r['status'] for r in results] == [
+        'created', 'reactivated', 'error', 'error', 'error', 'error', 'error', 'error', 'error']
+    assert all(r['error'] for r in results[2:])
+    created = db.get_item_by_id(results[0]['id'])
+    assert (created['sku'], created['stock'], created['provider_id']) == ("N1", 4, provider)
+    assert db.get_item_by_id(results[1]['id'])['name'] == "Vuelve"
+    assert db.search_items("vuelve")[0]['sku'] == "OLD"
+    assert ledger_mismatches() == []
+    assert db.verify_valuation() == []
+
+
+def test_update_items_bulk_statuses(inventory_db):
+    db = inventory_db
+    provider = db.add_provider("Ferretería", "555")
+    a = db.add_item("A1", "Tornillo", "", 2.0, 10, 0, 0, None, 0, 0, "Estante 1")
+    b = db.add_item("B1", "Tuerca", "", 1.0, 5)
+
+    results = db.update_items_bulk([
+        {'id': a, 'stock': 3, 'location': "Estante 9"},
+        {'id': b, 'price': 1.75, 'provider_id': provider},
+        {'id': 999, 'price': 1.0},
+        {'id': a, 'name': "Dos veces"},
+        {'id': b + 100},
+        {'id': b, 'min_stock': False},
+        {'id': True, 'price': 9.0},
+    ])
+
+    assert [r['status'] for r in results] == [
+        'updated', 'updated', 'not_found', 'error', 'error', 'error', 'error']
+    item_a, item_b = db.get_item_by_id(a), db.get_item_by_id(b)
+    assert (item_a['name'], item_a['stock'], item_a['location']) == ("Tornillo", 3, "Estante 9")
+    assert (item_b['price'], item_b['stock'], item_b['provider_id']) == (1.75, 5, provider)
+    assert db.search_items("estante 9")[0]['id'] == a
+    assert ledger_mismatches() == []
+    assert db.verify_valuation() == []
+
+
+def test_bulk_through_write_queue(inventory_db):
+    db = inventory_db
+    queue = WriteQueue()
+    db.set_write_queue(queue)
+    try:
+        results = db.add_items_bulk({'sku': f"S{i}", 'name': f"Item {i}", 'price': 1.0, 'stock': i % 3}
+                                    for i in range(2000))
+        updates = db.update_items_bulk({'id': r['id'], 'stock': 5} for r in results)
+    finally:
+        db.set_write_queue(None)
+        queue.close()
+
+    assert {r['status'] for r in results} == {'created'}
+    assert {r['status'] for r in updates} == {'updated'}
+    assert queue.batches == 2
+    assert ledger_mismatches() == []
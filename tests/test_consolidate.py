@@ -0,0 +1,81 @@
+import hashlib
+from datetime import date
+
+import pytest
+
+import consolidate
+from conftest import sell
+
+TODAY = date.today().isoformat()
+
+
+def make_store(db, monkeypatch, path, sold, payment="Efectivo"):
+    monkeypatch.setattr(db, "DB_PATH", str(path))
+    db.invalidate_provider_cache()
+    db.init_db(qt_connection=False, use_template=False)
+    provider = db.add_provider("Ferretería", "555")
+    screw = db.add_item("A1", "Tornillo", "", 2.0, 40, min_stock=10, max_stock=50, provider_id=provider)
+    db.add_item("B1", "Tuerca", "", 1.0, 100, min_stock=5, max_stock=20)
+    sell(screw, sold, price=2.0)
+    db.register_sale("Venta", 0, [{'id': screw, 'name': "Tornillo", 'qty': 1, 'price': 2.0}], payment)
+    return str(path)
+
+
+@pytest.fixture
+def stores(inventory_db, tmp_path, monkeypatch):
+    db = inventory_db
+    folder = tmp_path / "sucursales"
+    folder.mkdir()
+    paths = [make_store(db, monkeypatch, folder / "centro.db", 35),
+             make_store(db, monkeypatch, folder / "norte.db", 5, payment="Tarjeta"),
+             make_store(db, monkeypatch, folder / "sur.db", 32)]
+    db.invalidate_provider_cache()
+    return paths
+
+
+def checksum(paths):
+    return [hashlib.sha256(open(p, "rb").read()).hexdigest() for p in paths]
+
+
+def without_strategy(report):
+    return {k: v for k, v in report.items() if k != 'strategy'}
+
+
+def test_strategies_agree(stores, monkeypatch):
+    before = checksum(stores)
+
+    attach = consolidate.consolidate(stores, TODAY, TODAY, consolidate.STRATEGY_ATTACH)
+    monkeypatch.setattr(consolidate, "ATTACH_MAX", 2)  # dos grupos de ATTACH
+    grouped = consolidate.consolidate(stores, TODAY, TODAY, consolidate.STRATEGY_ATTACH)
+    process = consolidate.consolidate(stores, TODAY, TODAY, consolidate.STRATEGY_PROCESS, workers=2)
+
+    assert without_strategy(grouped) == without_strategy(attach)
+    assert without_strategy(process) == without_strategy(attach)
+    assert consolidate.consolidate(stores, TODAY, TODAY)['strategy'] == consolidate.STRATEGY_PROCESS
+    assert checksum(stores) == before  # las bases de las sucursales no se tocan
+
+    assert attach['total'] == {'revenue': 150.0, 'sale_count': 6, 'units': 75, 'line_count': 6}
+    assert [s['store'] for s in attach['stores']] == ["centro", "norte", "sur"]
+    assert [(p['payment_method'], p['revenue']) for p in attach['by_payment']] == [
+        ("Efectivo", 148.0), ("Tarjeta", 2.0)]
+    # Centro y sur quedaron bajo el mínimo de tornillos; norte no
+    assert [line[0] for line in attach['orders']] == ["centro", "sur"]
+    assert attach['orders_by_sku'][0][:4] == ["A1", "Ferretería", "Tornillo", 2]
+
+
+def test_missing_store_fails_the_whole_report(stores, tmp_path):
+    missing = str(tmp_path / "oeste.db")
+    for strategy in (consolidate.STRATEGY_ATTACH, consolidate.STRATEGY_PROCESS):
+        with pytest.raises((FileNotFoundError, RuntimeError)):
+            consolidate.consolidate(stores + [missing], TODAY, TODAY, strategy)
+    with pytest.raises(ValueError):
+        consolidate.consolidate(stores, TODAY, TODAY, "otra")
+
+
+def test_write_reports(stores, tmp_path):
+    report = consolidate.consolidate(stores, TODAY, TODAY)
+    files = consolidate.write_reports(report, str(tmp_path / "reportes"))
+    assert len(files) == 3
+    with open(files[1], encoding="utf-8-sig") as f:
+        assert f.readline().startswith("Sucursal;Proveedor")
+    assert consolidate.find_databases([str(tmp_path / "sucursales")]) == stores
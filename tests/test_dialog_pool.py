@@ -0,0 +1,27 @@
+import events
+from conftest import wait_until
+
+
+def test_warm_up_builds_one_dialog_per_tick(inventory_db, qapp):
+    from dialogs import dialog_pool
+    from dialogs.dlg_sale import SaleDialog
+    dialog_pool._pool.clear()
+    try:
+        dialog_pool.warm_up()
+        assert list(dialog_pool._pool) == [SaleDialog]
+
+        wait_until(qapp, lambda: len(dialog_pool._pool) == len(dialog_pool.WARM_UP_ORDER))
+        assert list(dialog_pool._pool) == list(dialog_pool.WARM_UP_ORDER)
+
+        # Reabrir devuelve el mismo diálogo, vacío
+        sale = dialog_pool._pool[SaleDialog]
+        wait_until(qapp, lambda: sale.catalog_ready)
+        sale.input_title.setText("Mesa 5")
+        assert dialog_pool.sale_dialog() is sale
+        assert sale.input_title.text() == ""
+    finally:
+        for dialog in dialog_pool._pool.values():
+            dialog.deleteLater()
+        events.unsubscribe("items", dialog_pool._pool[SaleDialog].on_items_changed)
+        dialog_pool._pool.clear()
+        qapp.processEvents()
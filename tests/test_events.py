@@ -0,0 +1,70 @@
+import gc
+
+import pytest
+
+import events
+from conftest import sell
+
+
+@pytest.fixture
+def received():
+    got = []
+
+    def listener(event):
+        got.append(event)
+
+    for table in ("items", "sales"):
+        events.subscribe(table, listener)
+    yield got
+    for table in ("items", "sales"):
+        events.unsubscribe(table, listener)
+
+
+def test_writes_publish_after_commit(inventory_db, received):
+    db = inventory_db
+    a = db.add_item("A1", "Tornillo", "", 2.0, 10)
+    db.update_items_bulk([{'id': a, 'price': 3.0}])
+    sale_id = sell(a, 1)
+    db.delete_item_by_sku("A1")
+    with pytest.raises(ValueError):
+        sell(a, 100)
+
+    assert (events.INSERT, (a,)) in [(e.action, e.ids) for e in received if e.table == "items"]
+    assert ("sales", events.INSERT, (sale_id,)) in received
+    assert received[-1] == ("items", events.DELETE, (a,))
+    # La venta rechazada no publicó nada
+    assert len([e for e in received if e.table == "sales"]) == 1
+
+
+def test_subscribers_are_isolated_and_weak(capsys):
+    calls = []
+
+    class View:
+        def on_change(self, event):
+            calls.append(event.ids)
+
+    def broken(event):
+        raise RuntimeError("vista rota")
+
+    view = View()
+    events.subscribe("demo", broken)
+    events.subscribe("demo", view.on_change)
+    events.publish("demo", events.UPDATE, [1, 2])
+    assert calls == [(1, 2)]
+    assert "vista rota" in capsys.readouterr().err
+
+    del view
+    gc.collect()
+    events.publish("demo", events.UPDATE, None)  # la vista destruida ya no recibe nada
+    assert calls == [(1, 2)]
+    events.unsubscribe("demo", broken)
+    assert events._subscribers["demo"] == []
+
+
+def test_capturing_nests():
+    with events.capturing() as outer:
+        events.publish("demo", events.INSERT, [1])
+        with events.capturing() as inner:
+            events.publish("demo", events.DELETE, [2])
+    assert inner == [("demo", events.DELETE, (2,))]
+    assert [e.ids for e in outer] == [(1,), (2,)]
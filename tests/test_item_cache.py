@@ -0,0 +1,52 @@
+from conftest import raw_connection, sell
+
+
+def other_register_renames(item_id, name):
+    with raw_connection() as conn:
+        conn.execute("UPDATE items SET name = ? WHERE id = ?", (name, item_id))
+
+
+def test_reads_come_from_the_cache_until_ttl(inventory_db, monkeypatch):
+    db = inventory_db
+    item_id = db.add_item("A1", "Tornillo", "", 2.0, 10)
+    assert db.get_item_by_id(item_id)['name'] == "Tornillo"
+
+    other_register_renames(item_id, "Cambiado afuera")
+    cached = db.get_item_by_id(item_id)
+    assert cached['name'] == "Tornillo"
+    # Se devuelven copias
+    cached['name'] = "X"
+    assert db.get_item_by_id(item_id)['name'] == "Tornillo"
+
+    monkeypatch.setattr(db, "ITEM_CACHE_TTL", 0)
+    assert db.get_item_by_id(item_id)['name'] == "Cambiado afuera"
+
+
+def test_writes_from_this_app_invalidate(inventory_db):
+    db = inventory_db
+    provider = db.add_provider("Ferretería", "555")
+    item_id = db.add_item("A1", "Tornillo", "", 2.0, 10, provider_id=provider)
+    assert db.get_item_by_id(item_id)['provider_name'] == "Ferretería"
+
+    sell(item_id, 3)
+    assert db.get_item_by_id(item_id)['stock'] == 7
+    db.update_provider(provider, "Ferretería Central", "555")
+    assert db.get_item_by_id(item_id)['provider_name'] == "Ferretería Central"
+    db.update_items_bulk([{'id': item_id, 'price': 2.5}])
+    assert db.get_item_by_id(item_id)['price'] == 2.5
+    db.delete_item_by_sku("A1")
+    assert db.get_item_by_id(item_id)['active'] == 0
+    assert db.get_item_by_id(999) is None
+
+
+def test_table_reads_fill_the_cache_and_lru_is_bounded(inventory_db, monkeypatch):
+    db = inventory_db
+    monkeypatch.setattr(db, "ITEM_CACHE_SIZE", 3)
+    ids = [db.add_item(f"S{i}", f"Item {i}", "", 1.0, 1) for i in range(5)]
+
+    db.get_items()
+    assert len(db._item_cache) == 3
+
+    db.search_items("item 4")
+    assert ids[4] in db._item_cache
+    assert len(db._item_cache) == 3
@@ -0,0 +1,53 @@
+import pytest
+
+from conftest import ledger_mismatches, raw_connection, sell
+
+
+def test_ledger_matches_stock_after_writes(inventory_db):
+    db = inventory_db
+    a = db.add_item("A1", "Tornillo", "", 10.0, 20)
+    b = db.add_item("B1", "Tuerca", "", 5.0, 0)
+    sell(a, 3)
+    db.update_item(b, "Tuerca", "", 5.0, 7, 0, 0, None, 0, 0, "")
+    db.import_items([{'sku': "A1", 'name': "Tornillo", 'stock': 5}, {'sku': "C1", 'name': "Clavo", 'stock': 9}])
+    db.delete_item_by_sku("B1")
+    db.add_item("B1", "Tuerca", "", 5.0, 2)  # reactivación
+
+    assert ledger_mismatches() == []
+    assert db.get_item_by_id(a)['stock'] == 22
+
+
+def test_ledger_after_compaction_and_stock_as_of(inventory_db):
+    db = inventory_db
+    sold = db.add_item("S1", "Vendido", "", 1.0, 5)
+    purged = db.add_item("P1", "Baja", "", 1.0, 4)
+    sell(sold, 1)
+    before = db.get_stock_as_of("2100-01-01")
+    db.delete_item_by_sku("S1")
+    db.delete_item_by_sku("P1")
+
+    result = db.compact_catalog()
+
+    assert result['items'] == 1
+    assert db.get_item_by_id(purged) is None
+    assert db.get_item_by_id(sold) is not None  # tiene ventas: se conserva
+    # El libro no se toca: el stock pasado del ítem borrado sigue igual
+    assert db.get_stock_movements(purged)
+    assert db.get_stock_as_of("2100-01-01") == before
+    assert db.get_stock_as_of("2100-01-01", [purged]) == {purged: 4}
+    assert ledger_mismatches() == []
+
+
+def test_sale_cannot_oversell(inventory_db):
+    db = inventory_db
+    item_id = db.add_item("L1", "Último", "", 10.0, 2)
+    sell(item_id, 2)
+    with pytest.raises(db.StockConflictError):
+        db.register_sale("Venta", 0, [
+            {'id': item_id, 'name': "Último", 'qty': 1, 'price': 10.0},
+        ], "Efectivo")
+
+    assert db.get_item_by_id(item_id)['stock'] == 0
+    with raw_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 1
+    assert ledger_mismatches() == []
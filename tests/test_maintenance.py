@@ -0,0 +1,56 @@
+import os
+import time
+
+import maintenance
+from conftest import raw_connection
+
+
+def test_run_maintenance_reclaims_pages(inventory_db):
+    with raw_connection() as conn:
+        conn.execute("CREATE TABLE scratch (data TEXT)")
+        conn.executemany("INSERT INTO scratch VALUES (?)", [("x" * 2000,) for _ in range(200)])
+    with raw_connection() as conn:
+        conn.execute("DROP TABLE scratch")
+
+    result = maintenance.run_maintenance()
+
+    assert result['quick_check'] == "ok"
+    assert result['needs_conversion'] is False
+    assert result['free_pages'] > 0
+    assert result['reclaimed_pages'] > 0
+    assert maintenance.get_last_maintenance()['started_at'] == result['started_at']
+    assert "integridad ok" in maintenance.describe(result)
+
+
+def test_checkpoints_do_not_wait_for_readers(inventory_db):
+    inventory_db.add_item("A1", "Tornillo", "", 2.0, 10)
+    reader = raw_connection()
+    try:
+        reader.execute("BEGIN")
+        reader.execute("SELECT COUNT(*) FROM items").fetchone()
+        inventory_db.add_item("B1", "Tuerca", "", 1.0, 5)
+
+        started = time.monotonic()
+        maintenance.run_maintenance()
+        maintenance.checkpoint_on_exit()
+        # TRUNCATE con la espera por defecto tardaría los 5 s del busy timeout
+        assert time.monotonic() - started < 2
+        reader.rollback()
+        # Sin lectores, el checkpoint de salida deja el -wal en cero
+        maintenance.checkpoint_on_exit()
+        assert os.path.getsize(inventory_db.DB_PATH + "-wal") == 0
+    finally:
+        reader.close()
+
+
+def test_convert_auto_vacuum(inventory_db):
+    with raw_connection() as conn:
+        conn.isolation_level = None
+        conn.execute("PRAGMA auto_vacuum = NONE")
+        conn.execute("VACUUM")
+    assert not maintenance.is_incremental()
+    assert maintenance.run_maintenance()['needs_conversion'] is True
+
+    assert maintenance.convert_auto_vacuum()['converted'] is True
+    assert maintenance.is_incremental()
+    assert maintenance.convert_auto_vacuum()['converted'] is False
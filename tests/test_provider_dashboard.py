@@ -0,0 +1,34 @@
+import reorder
+
+
+def test_dashboard_counts_in_one_query(inventory_db):
+    db = inventory_db
+    hardware = db.add_provider("Ferretería Núñez", "555")
+    paint = db.add_provider("Pinturas", "777")
+    closed = db.add_provider("Cerrado", "000")
+    db.delete_provider(closed)
+    db.add_item("A1", "Tornillo", "", 1.0, 2, min_stock=5, max_stock=20, provider_id=hardware)
+    db.add_item("A2", "Tuerca", "", 1.0, 50, min_stock=5, max_stock=20, provider_id=hardware)
+    db.add_item("A3", "Clavo", "", 1.0, 0, min_stock=0, max_stock=0, provider_id=hardware)
+    db.add_item("A4", "Borrado", "", 1.0, 0, min_stock=5, max_stock=10, provider_id=hardware)
+    db.delete_item_by_sku("A4")
+
+    rows = {row['id']: row for row in db.get_provider_dashboard()}
+
+    assert set(rows) == {hardware, paint}
+    assert (rows[hardware]['item_count'], rows[hardware]['low_stock_count']) == (3, 2)
+    assert (rows[paint]['item_count'], rows[paint]['low_stock_count']) == (0, 0)
+    assert [row['id'] for row in db.get_provider_dashboard("NUNEZ")] == [hardware]
+    assert db.get_provider_dashboard("otro") == []
+
+
+def test_units_to_order_per_provider(inventory_db):
+    db = inventory_db
+    hardware = db.add_provider("Ferretería", "555")
+    db.add_item("A1", "Tornillo", "", 2.0, 2, min_stock=5, max_stock=20, provider_id=hardware)
+    db.add_item("A2", "Tuerca", "", 1.0, 50, min_stock=5, max_stock=20, provider_id=hardware)
+    db.add_item("B1", "Sin proveedor", "", 3.0, 1, min_stock=1, max_stock=4)
+
+    totals = reorder.get_reorder_plan().provider_totals()
+
+    assert totals == {hardware: (18, 36.0), 0: (3, 9.0)}
@@ -0,0 +1,55 @@
+import pytest
+
+from conftest import raw_connection
+
+
+@pytest.fixture
+def provider_model(inventory_db, qapp, monkeypatch):
+    import models
+    monkeypatch.setattr(models, "_provider_model", None)
+    return models
+
+
+def labels(model):
+    return [model.data(model.index(row)) for row in range(model.rowCount())]
+
+
+def test_model_is_shared_and_reloads_on_changes(inventory_db, provider_model):
+    from PyQt5.QtCore import Qt
+    db = inventory_db
+    paint = db.add_provider("Pinturas", "777")
+    model = provider_model.get_provider_model()
+    resets = []
+    model.modelReset.connect(lambda: resets.append(1))
+
+    assert labels(model) == [model.NONE_LABEL, "Pinturas"]
+    assert model.data(model.index(1), Qt.UserRole) == paint
+    assert model.data(model.index(0), Qt.UserRole) is None
+
+    # Sin cambios no se recarga
+    assert provider_model.get_provider_model() is model
+    assert resets == []
+
+    hardware = db.add_provider("Ferretería", "555")
+    db.delete_provider(paint)
+    provider_model.get_provider_model()
+    assert labels(model) == [model.NONE_LABEL, "Ferretería"]
+    assert len(resets) == 1
+    # Los inactivos siguen teniendo nombre (ítems viejos que los referencian)
+    assert db.get_provider_name(paint) == "Pinturas"
+    assert db.get_provider_name(hardware) == "Ferretería"
+    assert db.get_provider_name(None) is None
+
+
+def test_changes_from_other_registers_after_ttl(inventory_db, provider_model, monkeypatch):
+    db = inventory_db
+    db.add_provider("Pinturas", "777")
+    model = provider_model.get_provider_model()
+    with raw_connection() as conn:
+        conn.execute("INSERT INTO providers (name, phone, active) VALUES ('Otra caja', '', 1)")
+
+    provider_model.get_provider_model()  # dentro del TTL se usa la caché
+    assert labels(model)[1:] == ["Pinturas"]
+    monkeypatch.setattr(db, "PROVIDER_CACHE_TTL", 0)
+    provider_model.get_provider_model()
+    assert labels(model)[1:] == ["Otra caja", "Pinturas"]
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+import reorder
+from conftest import sell
+
+WINDOWS = ((7, 0.5), (30, 0.3), (90, 0.2))
+
+
+def plan_both_ways(monkeypatch, items, sold, **params):
+    fast = reorder.compute_plan(items, sold, WINDOWS, **params)
+    with monkeypatch.context() as m:
+        m.setattr(reorder, "np", None)
+        slow = reorder.compute_plan(items, sold, WINDOWS, **params)
+    return fast, slow
+
+
+def test_worked_example(monkeypatch):
+    # (id, proveedor, stock, mínimo, máximo, precio)
+    items = [(1, 5, 10, 2, 20, 3.0), (2, 0, 1, 2, 8, 1.0), (3, 5, 50, 0, 0, 1.0)]
+    # Ítem 1: 14 en 7 días, 30 en 30, 90 en 90 -> 0.5*2 + 0.3*1 + 0.2*1 = 1.5 por día
+    sold = [(1, 14, 30, 90), (99, 5, 5, 5)]  # el 99 ya no existe
+
+    for plan in plan_both_ways(monkeypatch, items, sold, lead_time_days=7, safety_days=3, review_days=14):
+        assert plan.velocity == [1.5, 0.0, 0.0]
+        assert plan.reorder_point == [15, 2, 0]   # ceil(1.5 * 10)
+        assert plan.order_qty == [26, 7, 0]       # ceil(1.5 * 24) - 10; 8 - 1
+        assert plan.order_value == [78.0, 7.0, 0.0]
+        assert plan.provider_totals() == {5: (26, 78.0), 0: (7, 7.0)}
+        assert set(plan.to_order()) == {1, 2}
+        assert plan.get(3)['order_qty'] == 0
+        assert plan.get(42) is None
+
+
+@pytest.mark.skipif(reorder.np is None, reason="requiere NumPy")
+def test_numpy_and_python_agree(monkeypatch):
+    rng = random.Random(7)
+    items = [(i, rng.randint(0, 4), rng.randint(0, 60), rng.randint(0, 10), rng.randint(0, 80),
+              round(rng.uniform(0.1, 50), 2)) for i in range(1, 2001, 2)]
+    sold = [(i, a, a + b, a + b + c) for i in rng.sample(range(1, 2101), 600)
+            for a, b, c in [(rng.randint(0, 30), rng.randint(0, 60), rng.randint(0, 120))]]
+    sold.sort()
+
+    fast, slow = plan_both_ways(monkeypatch, items, sold, lead_time_days=5, safety_days=2, review_days=10)
+
+    for field in ("ids", "provider_ids", "velocity", "reorder_point", "order_qty"):
+        assert getattr(fast, field) == getattr(slow, field), field
+    assert fast.order_value == pytest.approx(slow.order_value)
+    assert fast.provider_totals().keys() == slow.provider_totals().keys()
+    assert sum(fast.order_qty) > 0
+
+
+def test_empty_catalog(monkeypatch):
+    for plan in plan_both_ways(monkeypatch, [], [(1, 1, 1, 1)]):
+        assert len(plan) == 0
+        assert plan.provider_totals() == {}
+
+
+def test_plan_is_cached_until_a_sale(inventory_db):
+    db = inventory_db
+    item_id = db.add_item("A1", "Tornillo", "", 1.0, 40, min_stock=0, max_stock=0)
+    first = reorder.get_reorder_plan()
+    assert reorder.get_reorder_plan() is first
+    assert first.get(item_id)['velocity'] == 0.0
+
+    sell(item_id, 35)
+
+    second = reorder.get_reorder_plan()
+    assert second is not first
+    assert second.get(item_id)['velocity'] > 0
+    assert second.get(item_id)['order_qty'] > 0
@@ -0,0 +1,58 @@
+import os
+import shutil
+import sqlite3
+
+from conftest import raw_connection
+from views.view_advanced import _move_db_files
+from write_queue import WriteQueue
+
+
+def names(path):
+    with sqlite3.connect(path) as conn:
+        return [row[0] for row in conn.execute("SELECT name FROM items ORDER BY id")]
+
+
+def test_close_connections_empties_the_wal(inventory_db):
+    db = inventory_db
+    queue = WriteQueue()
+    db.set_write_queue(queue)
+    db.add_item("A1", "Tornillo", "", 2.0, 10)
+    other = raw_connection()  # otra conexión abierta: SQLite no borra el WAL al cerrar las nuestras
+    other.execute("SELECT COUNT(*) FROM items").fetchone()
+    try:
+        with db.read_snapshot():
+            assert os.path.getsize(db.DB_PATH + "-wal") > 0
+            assert db.close_connections() is True
+            assert db.get_db_connection() is not db.get_db_connection()  # ya no hay foto
+        assert os.path.getsize(db.DB_PATH + "-wal") == 0
+        assert db._write_queue is None
+
+        other.execute("BEGIN")
+        other.execute("SELECT COUNT(*) FROM items").fetchone()
+        db.add_item("B1", "Tuerca", "", 1.0, 5)
+        # Un lector con una transacción abierta impide vaciar el WAL
+        assert db.close_connections() is False
+    finally:
+        other.close()
+
+
+def test_restore_does_not_replay_the_old_wal(inventory_db, tmp_path):
+    db = inventory_db
+    db.add_item("N1", "Nuevo", "", 1.0, 1)
+    restored = str(tmp_path / "respaldo.db")
+    shutil.copy(db.DB_PATH, restored)
+    backup = str(tmp_path / "inventory.db.bak")
+
+    other = raw_connection()
+    try:
+        other.execute("PRAGMA wal_autocheckpoint = 0")
+        db.add_item("V1", "Viejo", "", 1.0, 1)  # queda solo en el -wal
+        assert db.close_connections()
+        _move_db_files(db.DB_PATH, backup)
+    finally:
+        other.close()
+    shutil.move(restored, db.DB_PATH)
+
+    assert not any(os.path.exists(path) for path in db.database_files()[1:])
+    assert names(db.DB_PATH) == ["Nuevo"]
+    assert names(backup) == ["Nuevo", "Viejo"]
@@ -0,0 +1,37 @@
+from datetime import date
+
+from conftest import raw_connection
+
+
+def rollups():
+    with raw_connection() as conn:
+        return {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+                for table in ("sales_daily", "sales_daily_item", "sales_daily_payment", "shift_totals")}
+
+
+def test_rollups_match_a_full_rebuild(inventory_db):
+    db = inventory_db
+    a = db.add_item("A1", "Tornillo", "", 2.0, 100)
+    b = db.add_item("B1", "Tuerca", "", 1.0, 100)
+    db.open_shift(100.0)
+    db.register_sale("Mesa 1", 0, [{'id': a, 'name': "Tornillo", 'qty': 2, 'price': 2.0},
+                                   {'id': a, 'name': "Tornillo", 'qty': 1, 'price': 1.5},
+                                   {'id': b, 'name': "Tuerca", 'qty': 4, 'price': 1.0}], "Efectivo")
+    db.register_sale("Mesa 2", 0, [{'id': b, 'name': "Tuerca", 'qty': 1, 'price': 1.0}], "Tarjeta")
+    with raw_connection() as conn:
+        conn.execute("UPDATE sales SET created_at = '2024-01-15 10:00:00' WHERE id = 2")
+    db.rebuild_sales_rollups()
+    db.register_sale("Mesa 3", 0, [{'id': a, 'name': "Tornillo", 'qty': 1, 'price': 2.0}], "Efectivo")
+
+    incremental = rollups()
+    db.rebuild_sales_rollups()
+    assert rollups() == incremental
+
+    today = date.today().isoformat()
+    summary = db.get_sales_summary(today, today)
+    assert summary == {'revenue': 11.5, 'sale_count': 2, 'units': 8, 'line_count': 4}
+    assert db.get_sales_summary()['sale_count'] == 3
+    assert [d['day'] for d in db.get_daily_sales()] == ["2024-01-15", today]
+    assert db.get_daily_sales("2024-01-01", "2024-01-31")[0]['revenue'] == 1.0
+    assert [(p['payment_method'], p['revenue']) for p in db.get_sales_by_payment()] == [
+        ("Efectivo", 11.5), ("Tarjeta", 1.0)]
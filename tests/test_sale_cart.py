@@ -0,0 +1,83 @@
+import pytest
+
+from dialogs.dlg_sale import SaleCart
+
+SCREW = {'id': 1, 'name': "Tornillo"}
+NUT = {'id': 2, 'name': "Tuerca"}
+
+
+def rows(cart):
+    return [(line['id'], line['price_label'], line['qty'], line['price'], line['subtotal']) for line in cart]
+
+
+def test_same_item_and_price_share_a_line():
+    cart = SaleCart()
+    assert cart.add(SCREW, 2, 1.5, "Público") == (0, True)
+    assert cart.add(NUT, 1, 3.0, "Público") == (1, True)
+    assert cart.add(SCREW, 3, 1.5, "Público") == (0, False)
+    assert cart.add(SCREW, 1, 1.2, "Mayorista") == (2, True)
+
+    assert rows(cart) == [(1, "Público", 5, 1.5, 7.5), (2, "Público", 1, 3.0, 3.0), (1, "Mayorista", 1, 1.2, 1.2)]
+    assert cart.qty_of(1) == 6
+    assert cart.qty_of(3) == 0
+    assert cart.total == pytest.approx(11.7)
+    assert len(cart) == 3
+
+
+def test_remove_shifts_later_rows():
+    cart = SaleCart()
+    cart.add(SCREW, 2, 1.5, "Público")
+    cart.add(NUT, 1, 3.0, "Público")
+    cart.add(SCREW, 1, 1.2, "Mayorista")
+
+    removed = cart.remove(0)
+
+    assert removed['qty'] == 2
+    assert cart.qty_of(1) == 1
+    assert cart.total == pytest.approx(4.2)
+    # La fila de la tuerca ahora es la 0: agregar más la encuentra ahí
+    assert cart.add(NUT, 1, 3.0, "Público") == (0, False)
+    cart.remove(1)
+    cart.remove(0)
+    assert cart.total == 0.0
+    assert len(cart) == 0
+
+
+def test_reprice_merges_lines():
+    cart = SaleCart()
+    cart.add(SCREW, 2, 1.5, "Público")
+    cart.add(NUT, 1, 3.0, "Público")
+    cart.add(SCREW, 1, 1.8, "Público")  # ya con el precio nuevo
+
+    cart.reprice(1, "Público", 1.8)
+
+    assert rows(cart) == [(1, "Público", 3, 1.8, pytest.approx(5.4)), (2, "Público", 1, 3.0, 3.0)]
+    assert cart.total == pytest.approx(8.4)
+
+
+def test_dialog_table_follows_the_cart(inventory_db, qapp):
+    import events
+    from conftest import wait_until
+    from dialogs.dlg_sale import SaleDialog
+
+    item_id = inventory_db.add_item("A1", "Tornillo", "", 2.0, 10)
+    dialog = SaleDialog()
+    try:
+        wait_until(qapp, lambda: dialog.catalog_ready)
+        item = dialog.items_by_id[item_id]
+        dialog.add_to_cart(item, 2, 2.0, "Público")
+        dialog.add_to_cart(item, 1, 2.0, "Público")
+        dialog.add_to_cart(item, 1, 1.5, "Mayorista")
+
+        table = [[dialog.table.item(r, c).text() for c in (2, 3, 5)] for r in range(dialog.table.rowCount())]
+        assert table == [["Público", "3", "$6.00"], ["Mayorista", "1", "$1.50"]]
+        assert "7.50" in dialog.lbl_total.text()
+
+        dialog.table.setCurrentCell(0, 0)
+        dialog.remove_row()
+        assert dialog.table.rowCount() == 1
+        assert dialog.table.item(0, 2).text() == "Mayorista"
+        assert dialog.cart.add(item, 1, 1.5, "Mayorista") == (0, False)
+    finally:
+        events.unsubscribe("items", dialog.on_items_changed)
+        dialog.deleteLater()
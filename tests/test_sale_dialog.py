@@ -0,0 +1,186 @@
+import pytest
+
+import events
+from conftest import raw_connection, wait_until
+
+
+@pytest.fixture
+def sale_dialog(inventory_db, qapp):
+    from dialogs.dlg_sale import SaleDialog
+    db = inventory_db
+    db.add_item("USB-1", "Memoria USB Kingston", "", 10.0, 5, 8.0, 7.0)
+    db.add_item("CAN-1", "Canción de Cuna", "", 3.0, 2)
+    dialog = SaleDialog()
+    yield dialog
+    events.unsubscribe("items", dialog.on_items_changed)
+    dialog.deleteLater()
+    qapp.processEvents()
+
+
+def test_catalog_loads_in_background(inventory_db, qapp, sale_dialog):
+    db = inventory_db
+    # El constructor no arma el índice: eso ocurre en otro hilo
+    assert not sale_dialog.catalog_ready
+    # Un cambio hecho durante la carga no se pierde
+    late = db.add_item("LATE-1", "Cable HDMI", "", 4.0, 3)
+
+    wait_until(qapp, lambda: sale_dialog.catalog_ready)
+
+    assert set(sale_dialog.items_by_id) == {1, 2, late}
+    assert sale_dialog.search_index.search("cable hdmi")[0]['id'] == late
+    assert sale_dialog.sku_map["usb-1"]['name'] == "Memoria USB Kingston"
+
+
+def test_index_follows_item_events(inventory_db, qapp, sale_dialog):
+    db = inventory_db
+    wait_until(qapp, lambda: sale_dialog.catalog_ready)
+    index = sale_dialog.search_index
+
+    new_id = db.add_item("TOR-1", "Tornillo", "", 0.5, 100)
+    db.update_item(1, "Memoria USB Sandisk", "", 12.0, 5, 8.0, 7.0, None, 0, 0, "")
+    db.delete_item_by_sku("CAN-1")
+    sale_dialog.reset()
+
+    # Se actualiza producto por producto, sin reconstruir el índice
+    assert sale_dialog.search_index is index
+    assert sale_dialog.search_index.search("tornilo")[0]['id'] == new_id
+    assert sale_dialog.search_index.search("sandisk")[0]['price'] == 12.0
+    assert 2 not in sale_dialog.items_by_id
+    assert "can-1" not in sale_dialog.sku_map
+    assert sale_dialog.search_index.search("cancion de cuna") == []
+
+
+def test_completer_uses_the_index(inventory_db, qapp, sale_dialog):
+    wait_until(qapp, lambda: sale_dialog.catalog_ready)
+    sale_dialog.show()
+
+    sale_dialog.on_text_edited("memroia kingstn")
+
+    assert sale_dialog.completer_model.stringList()[0].startswith("USB-1 | Memoria USB Kingston")
+
+
+@pytest.fixture
+def messages(monkeypatch):
+    """Registra los QMessageBox en lugar de mostrarlos."""
+    from PyQt5.QtWidgets import QMessageBox
+    shown = []
+    for kind in ("warning", "information", "critical"):
+        monkeypatch.setattr(QMessageBox, kind, staticmethod(
+            lambda parent, title, text, *args, kind=kind: shown.append((kind, title, text)) or QMessageBox.Ok))
+    return shown
+
+
+def type_text(dialog, text, interval):
+    """Teclea `text` en el buscador con `interval` segundos entre teclas, y Enter."""
+    import dialogs.dlg_sale as dlg_sale
+    from PyQt5.QtCore import QEvent, Qt
+    from PyQt5.QtGui import QKeyEvent
+
+    clock = [1000.0]
+
+    def key(code, char=""):
+        clock[0] += interval
+        event = QKeyEvent(QEvent.KeyPress, code, Qt.NoModifier, char)
+        real = dlg_sale.time.monotonic
+        dlg_sale.time.monotonic = lambda: clock[0]
+        try:
+            consumed = dialog.eventFilter(dialog.txt_search, event)
+        finally:
+            dlg_sale.time.monotonic = real
+        return consumed
+
+    for char in text:
+        key(0, char)
+        dialog.txt_search.setText(dialog.txt_search.text() + char)
+    return key(Qt.Key_Return)
+
+
+def test_scanner_burst_adds_one_unit(inventory_db, qapp, sale_dialog, messages):
+    wait_until(qapp, lambda: sale_dialog.catalog_ready)
+
+    assert type_text(sale_dialog, "usb-1", interval=0.01) is True  # Enter consumido
+    assert type_text(sale_dialog, "USB-1", interval=0.01) is True
+
+    assert [(line['id'], line['qty'], line['price']) for line in sale_dialog.cart] == [(1, 2, 10.0)]
+    assert sale_dialog.txt_search.text() == ""
+    assert sale_dialog.table.rowCount() == 1
+    assert messages == []
+
+
+def test_typing_by_hand_is_not_a_scan(inventory_db, qapp, sale_dialog, messages):
+    wait_until(qapp, lambda: sale_dialog.catalog_ready)
+
+    assert type_text(sale_dialog, "usb-1", interval=0.3) is False
+    assert len(sale_dialog.cart) == 0
+    assert not sale_dialog.is_scanning()
+
+
+def test_scan_of_unknown_code_or_without_stock(inventory_db, qapp, sale_dialog, messages):
+    wait_until(qapp, lambda: sale_dialog.catalog_ready)
+
+    # Código desconocido: el Enter sigue su camino normal
+    assert type_text(sale_dialog, "999999", interval=0.01) is False
+    assert len(sale_dialog.cart) == 0
+    assert sale_dialog.txt_search.text() == "999999"
+    sale_dialog.txt_search.clear()
+
+    for _ in range(3):
+        type_text(sale_dialog, "CAN-1", interval=0.01)
+    assert sale_dialog.cart.qty_of(2) == 2
+    assert messages[-1][1] == "Stock Insuficiente"
+
+
+def other_register(sql, *params):
+    """Una escritura de otra caja: cambia la base sin publicar eventos en este proceso."""
+    with raw_connection() as conn:
+        conn.execute(sql, params)
+
+
+def test_revalidate_cart_reports_changed_items(inventory_db):
+    db = inventory_db
+    a = db.add_item("A1", "Tornillo", "", 2.0, 10)
+    b = db.add_item("B1", "Tuerca", "", 1.0, 5)
+    versions = db.get_catalog_versions()
+
+    assert db.revalidate_cart(versions) == {}
+    other_register("UPDATE items SET stock = 1 WHERE id = ?", a)
+    db.delete_item_by_sku("B1")
+    stale = db.revalidate_cart({**versions, 999: 0})
+
+    assert stale[a]['stock'] == 1
+    assert stale[b]['active'] == 0
+    assert stale[999] is None
+
+
+def test_save_refuses_a_stale_cart(inventory_db, qapp, sale_dialog, messages):
+    db = inventory_db
+    wait_until(qapp, lambda: sale_dialog.catalog_ready)
+    sale_dialog.add_to_cart(sale_dialog.items_by_id[1], 4, 10.0, "Público")
+    other_register("UPDATE items SET stock = 3 WHERE id = 1")
+
+    sale_dialog.save_sale()
+
+    assert messages[-1][1] == "Stock Modificado"
+    assert "quedan 3, en carrito 4" in messages[-1][2]
+    assert db.get_all_sales() == []
+    # El catálogo local quedó al día: ahora se puede vender lo que hay
+    sale_dialog.cart.clear()
+    sale_dialog.add_to_cart(sale_dialog.items_by_id[1], 3, 10.0, "Público")
+    sale_dialog.save_sale()
+    assert messages[-1][0] == "information"
+    assert db.get_item_by_id(1)['stock'] == 0
+
+
+def test_save_reprices_before_confirming(inventory_db, qapp, sale_dialog, messages):
+    db = inventory_db
+    wait_until(qapp, lambda: sale_dialog.catalog_ready)
+    sale_dialog.add_to_cart(sale_dialog.items_by_id[1], 2, 10.0, "Público")
+    other_register("UPDATE items SET price = 12.0 WHERE id = 1")
+
+    sale_dialog.save_sale()
+
+    assert db.get_all_sales() == []
+    assert [(line['qty'], line['price']) for line in sale_dialog.cart] == [(2, 12.0)]
+    assert sale_dialog.cart.total == 24.0
+    sale_dialog.save_sale()
+    assert db.get_all_sales()[0]['total'] == 24.0
@@ -0,0 +1,55 @@
+from conftest import raw_connection
+
+
+def skus(items):
+    return sorted(item['sku'] for item in items)
+
+
+def test_normalize_text(inventory_db):
+    db = inventory_db
+    assert db.normalize_text("Canción") == "cancion"
+    assert db.normalize_text("ÑANDÚ Straße") == "nandu strasse"
+    assert db.normalize_text("ABC-12") == "abc-12"
+    assert db.normalize_text(None) == ""
+    assert db.item_search_key("A1", "Pingüino", None) == "a1 | pinguino | "
+
+
+def test_search_ignores_accents_and_case(inventory_db):
+    db = inventory_db
+    db.add_item("CAN-1", "Canción de Cuna", "", 3.0, 2, location="Góndola Ñ")
+    db.add_item("usb-2", "MEMORIA USB", "", 10.0, 5)
+    db.add_item("OFF", "Cancion vieja", "", 1.0, 1)
+    db.delete_item_by_sku("OFF")
+
+    assert skus(db.search_items("CANCIÓN")) == ["CAN-1"]
+    assert skus(db.search_items("gondola n")) == ["CAN-1"]
+    assert skus(db.search_items("USB-2")) == ["usb-2"]
+    assert skus(db.search_items("memória")) == ["usb-2"]
+    assert skus(db.search_items("  ")) == ["CAN-1", "usb-2"]
+
+
+def test_search_key_follows_every_write(inventory_db):
+    db = inventory_db
+    item_id = db.add_item("A1", "Tornillo", "", 1.0, 1)
+    db.update_item(item_id, "Tuerca Hexágonal", "", 1.0, 1, 0, 0, None, 0, 0, "Depósito")
+    assert skus(db.search_items("hexagonal")) == ["A1"]
+    assert db.search_items("tornillo") == []
+
+    db.import_items([{'sku': "A1", 'name': "Arandela", 'price': 1.0, 'stock': 1}])
+    assert skus(db.search_items("arandela")) == ["A1"]
+    db.update_items_bulk([{'id': item_id, 'name': "Clavo Acerado"}])
+    assert skus(db.search_items("clavo acerado")) == ["A1"]
+
+
+def test_init_db_backfills_old_rows(inventory_db):
+    db = inventory_db
+    db.add_item("A1", "Martillo", "", 1.0, 1)
+    provider = db.add_provider("Ferretería Núñez", "555")
+    with raw_connection() as conn:
+        conn.execute("UPDATE items SET search_key = ''")
+        conn.execute("UPDATE providers SET search_key = NULL")
+
+    db.init_db(qt_connection=False, use_template=False)
+
+    assert skus(db.search_items("MARTILLO")) == ["A1"]
+    assert [p['id'] for p in db.get_provider_dashboard("nunez")] == [provider]
@@ -0,0 +1,63 @@
+from search_index import MAX_POSTING_SCAN, TrigramIndex, trigrams
+
+
+def item(item_id, sku, name):
+    return {'id': item_id, 'sku': sku, 'name': name}
+
+
+CATALOG = [
+    item(1, "USB-1", "Memoria USB Kingston 32GB"),
+    item(2, "USB-2", "Memoria USB Sandisk 64GB"),
+    item(3, "HDMI-1", "Cable HDMI 2 metros"),
+    item(4, "CAN-1", "Canción de Cuna (CD)"),
+    item(5, "MEM", "Tarjeta de memoria"),
+]
+
+
+def ids(results):
+    return [r['id'] for r in results]
+
+
+def test_trigrams_pad_the_start_of_words():
+    assert "  m" in trigrams("mem")
+    assert " me" in trigrams("mem")
+
+
+def test_typos_accents_and_case():
+    index = TrigramIndex(CATALOG)
+    assert ids(index.search("memroia kingstn"))[0] == 1
+    assert ids(index.search("CANCION"))[0] == 4
+    assert ids(index.search("cable hdmi", limit=1)) == [3]
+    assert index.search("   ") == []
+    assert index.search("zzzz") == []
+
+
+def test_exact_sku_then_substring_first():
+    index = TrigramIndex(CATALOG)
+    # "mem" es el SKU exacto del 5, aunque otros nombres también lo contengan
+    assert ids(index.search("mem"))[0] == 5
+    # Subcadena exacta antes que una coincidencia parcial de trigramas
+    assert ids(index.search("sandisk"))[0] == 2
+
+
+def test_add_replace_and_remove():
+    index = TrigramIndex(CATALOG)
+    index.add(item(3, "HDMI-1", "Cable VGA"))
+    assert 3 not in ids(index.search("metros"))
+    assert ids(index.search("cable vga"))[0] == 3
+
+    index.remove(1)
+    index.remove(99)  # no existe: no falla
+    assert len(index) == 4
+    assert 1 not in ids(index.search("kingston"))
+    assert all(1 not in posting for posting in index._postings.values())
+
+
+def test_common_trigrams_only_rescore_candidates():
+    catalog = [item(i, f"S{i}", f"Producto genérico {i}") for i in range(MAX_POSTING_SCAN + 500)]
+    catalog.append(item(-1, "RARO", "Producto xilófono"))
+    index = TrigramIndex(catalog)
+
+    # Los trigramas de "producto" (en miles de ítems) no suman candidatos nuevos
+    assert ids(index.search("producto xilofono", limit=5)) == [-1]
+    assert len(index.search("producto", limit=5)) == 5
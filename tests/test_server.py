@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def api(inventory_db):
+    srv = server.InventoryServer(token="clave")
+    ok = {server.TOKEN_HEADER: "clave"}
+
+    def call(method, target, body=None, headers=ok):
+        data = server.dumps(body) if body is not None else b""
+        return asyncio.run(srv.dispatch(method, target, headers, data))
+
+    yield call
+    srv.close()
+
+
+def test_token_is_required(api):
+    assert api("GET", "/api/ping", headers={})[0] == 403
+    assert api("GET", "/api/ping", headers={server.TOKEN_HEADER: "clav"})[0] == 403
+    assert api("GET", "/api/ping", headers={server.TOKEN_HEADER: "claveñ"})[0] == 403
+    assert api("GET", "/api/ping")[0] == 200
+
+
+def test_status_codes(api):
+    assert api("GET", "/otra")[0] == 404
+    assert api("GET", "/api/drop_everything")[0] == 404
+    assert api("DELETE", "/api/get_items")[0] == 405
+    assert api("POST", "/api/get_item_by_id", {"args": [1, 2, 3]})[0] == 400
+    assert api("GET", "/api/search?texto=x")[0] == 400
+    status, payload = api("POST", "/api/add_item", {"args": ["A1", "Tornillo", "", 2.0, 10]})
+    assert status == 200 and payload["ok"]
+    assert payload["events"]
+
+    # Errores de negocio: 200 con ok=False y el tipo de la excepción
+    status, payload = api("POST", "/api/add_item", {"args": ["A1", "Otro", "", 1.0, 1]})
+    assert status == 200
+    assert (payload["ok"], payload["type"]) == (False, "ValueError")
+
+
+def test_get_converts_numeric_parameters(api):
+    api("POST", "/api/add_item", {"args": ["A1", "Tornillo", "", 2.0, 10]})
+    api("POST", "/api/add_item", {"args": ["A2", "Tornillo largo", "", 2.0, 10]})
+    status, payload = api("GET", "/api/search?text=tornillo&limit=1")
+    assert status == 200
+    assert len(payload["result"]) == 1
+
+
+def test_remote_host_needs_token(inventory_db):
+    with pytest.raises(ValueError):
+        server.InventoryServer(host="0.0.0.0")
+
+
+def test_int_keys_survive_json():
+    value = {"versions": {1: 3, 20: 1}, "rows": [{"id": 1}]}
+    assert server.loads(server.dumps(value)) == value
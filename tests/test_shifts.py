@@ -0,0 +1,41 @@
+import pytest
+
+from conftest import sell
+
+
+def test_cash_close_by_payment_method(inventory_db):
+    db = inventory_db
+    item_id = db.add_item("A1", "Tornillo", "", 2.0, 100)
+    sell(item_id, 1, price=5.0)  # antes del turno: no cuenta
+    shift_id = db.open_shift(100.0, "Mañana")
+    assert db.get_open_shift()['id'] == shift_id
+    with pytest.raises(ValueError):
+        db.open_shift(0.0)
+
+    sell(item_id, 2, price=10.0)
+    db.register_sale("Venta", 0, [{'id': item_id, 'name': "Tornillo", 'qty': 1, 'price': 30.0}], "Tarjeta")
+    sell(item_id, 1, price=5.0)
+
+    report = db.close_shift(shift_id, 120.0)
+
+    assert [(p['payment_method'], p['revenue'], p['sale_count']) for p in report['by_payment']] == [
+        ("Tarjeta", 30.0, 1), ("Efectivo", 25.0, 2)]
+    assert (report['total'], report['sale_count']) == (55.0, 3)
+    assert report['expected_cash'] == 125.0
+    assert report['difference'] == -5.0
+    assert db.get_open_shift() is None
+    with pytest.raises(ValueError):
+        db.close_shift(shift_id, 0.0)
+
+    # El corte sobrevive a una reconstrucción de los resúmenes
+    db.rebuild_sales_rollups()
+    assert db.get_shift_report(shift_id)['by_payment'] == report['by_payment']
+    assert [s['id'] for s in db.get_recent_shifts()] == [shift_id]
+    assert db.get_shift_report(999) is None
+
+
+def test_open_shift_report_has_no_difference(inventory_db):
+    db = inventory_db
+    shift_id = db.open_shift(50.0)
+    report = db.get_shift_report(shift_id)
+    assert (report['total'], report['expected_cash'], report['difference']) == (0, 50.0, None)
@@ -0,0 +1,45 @@
+import sqlite3
+import threading
+
+import pytest
+
+from conftest import sell
+
+
+def test_reads_inside_a_snapshot_see_one_moment(inventory_db):
+    db = inventory_db
+    item_id = db.add_item("A1", "Tornillo", "", 2.0, 10)
+    sell(item_id, 1)
+
+    with db.read_snapshot() as conn:
+        assert db.get_db_connection()._conn is conn
+        sales = db.get_all_sales()
+        # Otra caja vende y cambia el catálogo: la escritura no queda bloqueada
+        sell(item_id, 2)
+        db.add_item("B1", "Tuerca", "", 1.0, 5)
+
+        assert db.get_all_sales() == sales
+        assert [row['sku'] for row in db.get_order_report_rows()] == ["A1"]
+        assert db.get_sales_summary()['sale_count'] == 1
+
+        # Anidado: la misma foto
+        with db.read_snapshot() as inner:
+            assert inner is conn
+
+        # Otro hilo no comparte la foto
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(len(db.get_all_sales())))
+        thread.start()
+        thread.join()
+        assert seen == [2]
+
+    assert len(db.get_all_sales()) == 2
+    assert db.get_sales_summary()['sale_count'] == 2
+    assert db.get_db_connection() is not db.get_db_connection()
+
+
+def test_snapshot_is_read_only(inventory_db):
+    db = inventory_db
+    with db.read_snapshot() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM items")
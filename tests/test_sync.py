@@ -0,0 +1,66 @@
+import sqlite3
+
+from conftest import sell
+
+TABLES = ("providers", "items", "sales", "sale_items", "sales_daily")
+
+
+def dump(path):
+    with sqlite3.connect(path) as conn:
+        return {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall() for table in TABLES}
+
+
+def apply_to(db, monkeypatch, replica, package):
+    source = db.DB_PATH
+    monkeypatch.setattr(db, "DB_PATH", replica)
+    try:
+        db.init_db(qt_connection=False, use_template=False)
+        return db.apply_changes(package)
+    finally:
+        monkeypatch.setattr(db, "DB_PATH", source)
+
+
+def test_export_apply_is_idempotent(inventory_db, tmp_path, monkeypatch):
+    db = inventory_db
+    replica = str(tmp_path / "replica.db")
+    provider = db.add_provider("Ferretería", "555")
+    a = db.add_item("A1", "Tornillo", "", 2.0, 10, 0, 0, provider)
+    b = db.add_item("B1", "Tuerca", "", 1.0, 5)
+    sell(a, 2, price=2.0)
+
+    first = db.export_changes(0)
+    result = apply_to(db, monkeypatch, replica, first)
+    assert result['last_seq'] == first['to_seq']
+    assert dump(replica) == dump(db.DB_PATH)
+
+    # El mismo paquete otra vez no cambia nada
+    again = apply_to(db, monkeypatch, replica, first)
+    assert again['rows'] == 0
+    assert dump(replica) == dump(db.DB_PATH)
+
+    # Un paquete que se superpone con lo ya aplicado deja la réplica igual al origen
+    sell(b, 1, price=1.0)
+    db.update_item(a, "Tornillo largo", "", 2.5, 8, 0, 0, provider, 0, 0, "")
+    db.delete_item_by_sku("B1")
+    overlapping = db.export_changes(0)
+    apply_to(db, monkeypatch, replica, overlapping)
+    apply_to(db, monkeypatch, replica, db.export_changes(overlapping['to_seq']))
+    assert dump(replica) == dump(db.DB_PATH)
+
+
+def test_export_changes_inside_read_snapshot(inventory_db):
+    db = inventory_db
+    item_id = db.add_item("A1", "Tornillo", "", 2.0, 10)
+    expected = db.export_changes(0)
+
+    with db.read_snapshot() as conn:
+        inside = db.export_changes(0)
+        sell(item_id, 1)  # otra caja vende mientras dura la foto
+        still_inside = db.export_changes(0)
+        assert conn.in_transaction
+
+    for package in (expected, inside, still_inside):
+        package.pop('created_at')
+    assert inside == expected
+    assert still_inside == expected
+    assert db.export_changes(0)['to_seq'] > expected['to_seq']
@@ -0,0 +1,23 @@
+from conftest import sell
+
+
+def test_valuation_follows_every_write(inventory_db):
+    db = inventory_db
+    provider = db.add_provider("Ferretería", "555")
+    a = db.add_item("A1", "Tornillo", "", 2.0, 10, 1.5, 1.0, provider, 0, 0, "Estante 1")
+    b = db.add_item("B1", "Tuerca", "", 1.0, 30)
+    sell(a, 4, price=2.0)
+    db.update_item(b, "Tuerca", "", 1.25, 25, 1.0, 0.5, provider, 0, 0, "Estante 2")
+    db.import_items([{'sku': "C1", 'name': "Clavo", 'price': 0.1, 'stock': 500, 'provider_name': "Otro"}])
+    db.add_items_bulk([{'sku': "D1", 'name': "Arandela", 'price': 0.5, 'stock': 40, 'provider_id': provider}])
+    db.update_items_bulk([{'id': a, 'price': 2.5, 'location': "Estante 3"}])
+    db.delete_item_by_sku("C1")
+    db.add_item("C1", "Clavo", "", 0.2, 100)  # reactivado con otro precio y stock
+    db.delete_item_by_sku("B1")
+    db.compact_catalog()
+
+    assert db.verify_valuation() == []
+    totals = db.get_valuation_totals()
+    assert totals['item_count'] == 3
+    assert totals['units'] == 6 + 40 + 100
+    assert abs(totals['value'] - (6 * 2.5 + 40 * 0.5 + 100 * 0.2)) < 0.001
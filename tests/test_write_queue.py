@@ -0,0 +1,92 @@
+import sqlite3
+import threading
+
+import pytest
+
+from conftest import raw_connection
+from write_queue import WriteQueue
+
+
+def insert(cur, sku, fail=False):
+    cur.execute("INSERT INTO items (sku, name, price, stock, active) VALUES (?, ?, 1, 0, 1)", (sku, sku))
+    if fail:
+        raise ValueError(f"falla {sku}")
+    return cur.lastrowid
+
+
+def skus():
+    with raw_connection() as conn:
+        return [row[0] for row in conn.execute("SELECT sku FROM items ORDER BY id")]
+
+
+@pytest.fixture
+def queue(inventory_db):
+    q = WriteQueue(max_wait=0.2)
+    yield q
+    q.close()
+
+
+def test_failed_operation_rolls_back_alone(queue):
+    futures = [queue.submit(insert, "A"), queue.submit(insert, "B", fail=True), queue.submit(insert, "C")]
+
+    assert futures[0].result() > 0
+    with pytest.raises(ValueError, match="falla B"):
+        futures[1].result()
+    assert futures[2].result() > 0
+    assert skus() == ["A", "C"]
+    assert (queue.batches, queue.operations) == (1, 3)
+
+
+def test_results_arrive_after_commit(queue):
+    seen = []
+    future = queue.submit(insert, "A")
+    # El callback corre en el hilo escritor al resolverse el Future: otra conexión ya ve la fila
+    future.add_done_callback(lambda f: seen.append(skus()))
+    future.result()
+    assert seen == [["A"]]
+
+
+def test_a_broken_transaction_fails_the_whole_batch(queue):
+    def break_transaction(cur):
+        cur.execute("ROLLBACK")
+
+    futures = [queue.submit(insert, "A"), queue.submit(break_transaction), queue.submit(insert, "C")]
+
+    for future in futures:
+        with pytest.raises(sqlite3.OperationalError):
+            future.result()
+    assert skus() == []
+    assert queue.batches == 0
+
+
+def test_effects_run_in_the_calling_thread(inventory_db, queue):
+    db = inventory_db
+    calls = []
+
+    def tx(cur, sku, fail):
+        db.after_commit(lambda: calls.append((sku, threading.current_thread().name)))
+        return insert(cur, sku, fail)
+
+    db.set_write_queue(queue)
+    try:
+        db.run_write(tx, "A", False)
+        with pytest.raises(ValueError):
+            db.run_write(tx, "B", True)
+    finally:
+        db.set_write_queue(None)
+
+    assert calls == [("A", threading.current_thread().name)]
+
+
+def test_close_flushes_pending_and_rejects_new(inventory_db):
+    q = WriteQueue(max_wait=0.2)
+    cancelled = q.submit(insert, "X")
+    cancelled.cancel()
+    pending = [q.submit(insert, f"S{i}") for i in range(100)]
+    q.close()
+
+    assert all(f.done() for f in pending)
+    assert len(skus()) == 100
+    assert q.batches >= 2  # BATCH_MAX_OPS parte los 100 en varios lotes
+    with pytest.raises(RuntimeError):
+        q.submit(insert, "Z")
@@ -119,5 +119,6 @@ class MainWindow(QMainWindow):
             self.view_sales.load_sales()
         elif index == 2 and hasattr(self, 'view_advanced'):
             self.view_advanced.load_log_preview()
+            self.view_advanced.load_valuation()
         elif index == 3 and hasattr(self, 'view_provider'): 
             self.view_provider.load_provider_list()
\ No newline at end of file
@@ -4,10 +4,15 @@ from datetime import datetime, date
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QPushButton, 
     QLabel, QFileDialog, QMessageBox, QGroupBox, QTextEdit,
-    QDialog, QFormLayout, QDateEdit, QDialogButtonBox 
+    QDialog, QFormLayout, QDateEdit, QDialogButtonBox, QInputDialog, QApplication 
 )
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtSql import QSqlDatabase 
+import db
+import maintenance
+import reorder
+from dialogs.dlg_abc_report import AbcReportDialog
+from dialogs.dlg_valuation import ValuationDialog
 
 APP_FOLDER_NAME = "EasyINV" 
 
@@ -35,6 +40,15 @@ DB_PATH = os.path.join(USER_DATA_DIR, "inventory.db")
 LOG_FILE = os.path.join(USER_DATA_DIR, "error_log.txt")
 
 
+def _move_db_files(src, dst):
+    """Mueve una base junto con sus archivos -wal y -shm; no deja los viejos de `dst`."""
+    for src_file, dst_file in zip(db.database_files(src), db.database_files(dst)):
+        if os.path.exists(dst_file):
+            os.remove(dst_file)
+        if os.path.exists(src_file):
+            shutil.move(src_file, dst_file)
+
+
 class DateRangeDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -75,6 +89,8 @@ class AdvancedView(QWidget):
         super().__init__()
         self.setup_ui()
         self.load_log_preview()
+        self.load_valuation()
+        self.load_maintenance_status()
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -112,7 +128,8 @@ class AdvancedView(QWidget):
         gb_db = QGroupBox("Gestión de Base de Datos")
         layout_db = QVBoxLayout()
 
-        lbl_info_db = QLabel(f"Ubicación de datos:\n{DB_PATH}")
+        location = f"Servidor: {db.REMOTE_SERVER}" if db.REMOTE_SERVER else DB_PATH
+        lbl_info_db = QLabel(f"Ubicación de datos:\n{location}")
         lbl_info_db.setStyleSheet("color: gray; font-size: 10px;")
         lbl_info_db.setWordWrap(True)
         
@@ -122,9 +139,17 @@ class AdvancedView(QWidget):
         btn_import = QPushButton("♻️ Restaurar Copia de Seguridad (.zip)")
         btn_import.clicked.connect(self.import_database)
 
+        btn_archive = QPushButton("🗄️ Archivar Ventas Antiguas")
+        btn_archive.clicked.connect(self.archive_old_sales)
+
+        btn_compact = QPushButton("🧽 Compactar Catálogo (borrar productos dados de baja)")
+        btn_compact.clicked.connect(self.compact_catalog)
+
         layout_db.addWidget(QLabel("Operaciones de respaldo:"))
         layout_db.addWidget(btn_export)
         layout_db.addWidget(btn_import)
+        layout_db.addWidget(btn_archive)
+        layout_db.addWidget(btn_compact)
         layout_db.addWidget(lbl_info_db)
         gb_db.setLayout(layout_db)
         layout.addWidget(gb_db)
@@ -141,12 +166,36 @@ class AdvancedView(QWidget):
         btn_low_stock.setStyleSheet("background-color: #e67e22; color: white; font-weight: bold;")
         btn_low_stock.clicked.connect(self.export_order_report)
 
+        btn_abc = QPushButton("🏆 Productos Más Vendidos (ABC)")
+        btn_abc.setStyleSheet("background-color: #8e44ad; color: white; font-weight: bold;")
+        btn_abc.clicked.connect(self.open_abc_report)
+
         layout_rep.addWidget(QLabel("Generar archivos de datos:"))
         layout_rep.addWidget(btn_json_sales)
         layout_rep.addWidget(btn_low_stock)
+        layout_rep.addWidget(btn_abc)
         gb_reports.setLayout(layout_rep)
         layout.addWidget(gb_reports)
 
+        # VALORIZACIÓN DE INVENTARIO
+        gb_val = QGroupBox("Valorización de Inventario")
+        layout_val = QVBoxLayout()
+
+        self.lbl_valuation = QLabel("")
+        self.lbl_valuation.setStyleSheet("font-size: 13px; color: #34495e;")
+
+        btn_val_detail = QPushButton("📊 Ver por Proveedor / Ubicación")
+        btn_val_detail.clicked.connect(self.open_valuation_detail)
+
+        btn_val_verify = QPushButton("Verificar totales")
+        btn_val_verify.clicked.connect(self.verify_valuation)
+
+        layout_val.addWidget(self.lbl_valuation)
+        layout_val.addWidget(btn_val_detail)
+        layout_val.addWidget(btn_val_verify)
+        gb_val.setLayout(layout_val)
+        layout.addWidget(gb_val)
+
         # LOG DE ERRORES
         gb_log = QGroupBox("Diagnóstico del Sistema")
         layout_log = QVBoxLayout()
@@ -162,10 +211,32 @@ class AdvancedView(QWidget):
         btn_export_log = QPushButton("Guardar archivo de log")
         btn_export_log.clicked.connect(self.export_error_log)
 
+        # Mantenimiento automático (ver maintenance.py)
+        self.lbl_maintenance = QLabel("")
+        self.lbl_maintenance.setStyleSheet("color: #555; font-size: 11px; font-weight: normal;")
+        self.lbl_maintenance.setWordWrap(True)
+
+        self.btn_maintenance = QPushButton("🧹 Ejecutar mantenimiento ahora")
+        self.btn_maintenance.clicked.connect(self.run_maintenance_now)
+
+        # La conversión reescribe la base entera: solo a pedido (ver maintenance.convert_auto_vacuum)
+        self.btn_convert_vacuum = QPushButton("🗜️ Activar vacuum incremental (una sola vez)")
+        self.btn_convert_vacuum.clicked.connect(self.convert_auto_vacuum)
+        self.btn_convert_vacuum.setVisible(False)
+
+        scheduler = maintenance.get_scheduler()
+        if scheduler:
+            scheduler.finished.connect(self.on_maintenance_finished)
+        else:
+            self.btn_maintenance.setEnabled(False)
+
         layout_log.addWidget(QLabel("Registro de fallos:"))
         layout_log.addWidget(btn_refresh_log)
         layout_log.addWidget(self.txt_log_preview)
         layout_log.addWidget(btn_export_log)
+        layout_log.addWidget(self.lbl_maintenance)
+        layout_log.addWidget(self.btn_maintenance)
+        layout_log.addWidget(self.btn_convert_vacuum)
         
         gb_log.setLayout(layout_log)
         layout.addWidget(gb_log)
@@ -212,13 +283,8 @@ class AdvancedView(QWidget):
         if not filename:
             return
 
-        conn = None
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-            rows_inserted = 0
-            providers_created = 0 
+            rows = []
             errors = []
 
             with open(filename, 'r', encoding='utf-8-sig', errors='replace') as f:
@@ -232,6 +298,16 @@ class AdvancedView(QWidget):
                 if not header:
                     raise ValueError("El archivo está vacío")
 
+                # Helpers numéricos
+                def p_float(v):
+                    if not v: return 0.0
+                    return float(v.replace(',', '.').replace('$', '').strip())
+                
+                def p_int(v, d=0):
+                    if not v: return d
+                    try: return int(float(v))
+                    except: return d
+
                 for row_idx, row in enumerate(reader, start=2):
                     if len(row) < 2: continue
                     
@@ -239,84 +315,31 @@ class AdvancedView(QWidget):
                         sku = row[0].strip()
                         if not sku: continue
                         
-                        name = row[1].strip()
-                        provider_name = row[2].strip() if len(row) > 2 else ""
-                        provider_phone = row[3].strip() if len(row) > 3 else "" 
-                        location = row[4].strip() if len(row) > 4 else ""
-                        desc = row[5].strip() if len(row) > 5 else ""
-                        
-                        # Helpers numéricos
-                        def p_float(v):
-                            if not v: return 0.0
-                            return float(v.replace(',', '.').replace('$', '').strip())
-                        
-                        def p_int(v, d=0):
-                            if not v: return d
-                            try: return int(float(v))
-                            except: return d
-
-                        price_pub = p_float(row[6]) if len(row) > 6 else 0.0
-                        price_may = p_float(row[7]) if len(row) > 7 else 0.0  # price_c1
-                        price_dis = p_float(row[8]) if len(row) > 8 else 0.0  # price_c2
-                        
-                        stock = p_int(row[9] if len(row) > 9 else "0")
-                        min_s = p_int(row[10] if len(row) > 10 else "1", 1)
-                        max_s = p_int(row[11] if len(row) > 11 else "100", 100)
-
-                        #  LÓGICA DE PROVEEDOR 
-                        final_provider_id = None
-                        
-                        if provider_name:
-                            #  Buscamos ID
-                            cursor.execute("SELECT id FROM providers WHERE name = ?", (provider_name,))
-                            row_prov = cursor.fetchone()
-                            
-                            if row_prov:
-                                final_provider_id = row_prov[0]
-                            else:
-                                #  Crear si no existe
-                                now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                                cursor.execute("""
-                                    INSERT INTO providers (name, phone, created_at, active) 
-                                    VALUES (?, ?, ?, 1)
-                                """, (provider_name, provider_phone, now_str))
-                                final_provider_id = cursor.lastrowid
-                                providers_created += 1
-
-                        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-                        # INSERTAR EN TABLA 'ITEMS'
-                        query = """
-                            INSERT INTO items (
-                                sku, name, provider_id, location, description, 
-                                price, price_c1, price_c2, 
-                                stock, min_stock, max_stock, created_at, active
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
-                            ON CONFLICT(sku) DO UPDATE SET
-                                name=excluded.name,
-                                provider_id=excluded.provider_id,
-                                price=excluded.price,
-                                price_c1=excluded.price_c1,
-                                price_c2=excluded.price_c2,
-                                stock=stock + excluded.stock 
-                        """
-                        
-                        cursor.execute(query, (
-                            sku, name, final_provider_id, location, desc, 
-                            price_pub, price_may, price_dis, 
-                            stock, min_s, max_s, created_at
-                        ))
-                        rows_inserted += 1
-
+                        rows.append({
+                            'row': row_idx,
+                            'sku': sku,
+                            'name': row[1].strip(),
+                            'provider_name': row[2].strip() if len(row) > 2 else "",
+                            'provider_phone': row[3].strip() if len(row) > 3 else "",
+                            'location': row[4].strip() if len(row) > 4 else "",
+                            'description': row[5].strip() if len(row) > 5 else "",
+                            'price': p_float(row[6]) if len(row) > 6 else 0.0,
+                            'price_c1': p_float(row[7]) if len(row) > 7 else 0.0,  # Mayorista
+                            'price_c2': p_float(row[8]) if len(row) > 8 else 0.0,  # Distribuidor
+                            'stock': p_int(row[9] if len(row) > 9 else "0"),
+                            'min_stock': p_int(row[10] if len(row) > 10 else "1", 1),
+                            'max_stock': p_int(row[11] if len(row) > 11 else "100", 100),
+                        })
                     except Exception as row_e:
                         errors.append(f"Fila {row_idx}: {str(row_e)}")
 
-            conn.commit()
-            conn.close()
+            # Toda la escritura (proveedores, ítems, movimientos) en una transacción
+            result = db.import_items(rows)
+            errors.extend(result['errors'])
 
             msg = f"Importación finalizada.\n\n" \
-                  f"📦 Productos procesados: {rows_inserted}\n" \
-                  f"🏢 Nuevos proveedores creados: {providers_created}"
+                  f"📦 Productos procesados: {result['processed']}\n" \
+                  f"🏢 Nuevos proveedores creados: {result['providers_created']}"
             
             if errors:
                 msg += f"\n\nErrores ({len(errors)}):\n" + "\n".join(errors[:5])
@@ -324,7 +347,6 @@ class AdvancedView(QWidget):
             QMessageBox.information(self, "Importación Completa", msg)
 
         except Exception as e:
-            if conn: conn.close()
             with open(LOG_FILE, 'a') as f:
                 f.write(f"\n[IMPORT CSV ERROR] {str(e)}\n{traceback.format_exc()}")
             QMessageBox.critical(self, "Error Fatal", f"No se pudo importar: {e}")
@@ -341,62 +363,64 @@ class AdvancedView(QWidget):
         if not filename:
             return
 
-        conn = None
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-            query = """
-                SELECT 
-                    p.name,             
-                    p.phone,            
-                    i.sku,              
-                    i.name,             
-                    i.stock,            
-                    i.min_stock,        
-                    i.max_stock,        
-                    (i.max_stock - i.stock) as qty_needed 
-                FROM items i
-                LEFT JOIN providers p ON i.provider_id = p.id
-                WHERE i.stock <= i.min_stock
-                ORDER BY p.name ASC, i.name ASC
-            """
-            
-            cursor.execute(query)
-            rows = cursor.fetchall()
+            # Cantidades sugeridas según la velocidad de venta (ver reorder.py),
+            # con ítems y ventas leídos de la misma foto de la base
+            with db.read_snapshot():
+                to_order = reorder.get_reorder_plan().to_order()
+                rows = [r for r in db.get_order_report_rows() if r['id'] in to_order] if to_order else []
 
             if not rows:
                 QMessageBox.information(self, "Todo en orden", "No hay productos con stock bajo en este momento.")
-                conn.close()
                 return
 
             with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
                 writer = csv.writer(f, delimiter=';')
-                headers = [
-                    "Proveedor", "Teléfono Contacto", "SKU", "Producto", 
-                    "Stock Actual", "Stock Mínimo", "Stock Máximo", 
-                    "CANTIDAD A PEDIR (Sugerida)"
-                ]
-                writer.writerow(headers)
-
+                writer.writerow(reorder.ORDER_REPORT_HEADERS)
                 for row in rows:
-                    prov_name = row[0] if row[0] else "--- Sin Asignar ---"
-                    prov_phone = row[1] if row[1] else ""
-                    qty_needed = row[7]
-                    if qty_needed < 0: qty_needed = 0
+                    writer.writerow(reorder.order_report_line(row, to_order[row['id']]))
 
-                    writer.writerow([
-                        prov_name, prov_phone, row[2], row[3], 
-                        row[4], row[5], row[6], qty_needed
-                    ])
-
-            conn.close()
             QMessageBox.information(self, "Reporte Generado", f"Se ha generado la lista de pedidos con {len(rows)} productos.")
 
         except Exception as e:
-            if conn: conn.close()
             QMessageBox.critical(self, "Error", f"No se pudo generar el reporte: {e}")
 
+    def open_abc_report(self):
+        AbcReportDialog(self).exec_()
+
+    # VALORIZACIÓN (totales mantenidos por triggers, ver db.py)
+    def load_valuation(self):
+        try:
+            t = db.get_valuation_totals()
+            self.lbl_valuation.setText(
+                f"<b>{t['item_count']}</b> productos activos, <b>{t['units']}</b> unidades en stock<br>"
+                f"Valor público: <b>$ {t['value']:,.2f}</b>   |   "
+                f"Mayorista: $ {t['value_c1']:,.2f}   |   Distribuidor: $ {t['value_c2']:,.2f}"
+            )
+        except Exception as e:
+            self.lbl_valuation.setText(f"No se pudo leer la valorización: {e}")
+
+    def open_valuation_detail(self):
+        ValuationDialog(self).exec_()
+
+    def verify_valuation(self):
+        try:
+            mismatches = db.verify_valuation()
+            if not mismatches:
+                QMessageBox.information(self, "Valorización", "Los totales coinciden con el catálogo.")
+                return
+            confirm = QMessageBox.question(
+                self, "Valorización",
+                f"Se encontraron {len(mismatches)} grupos con diferencias.\n¿Recalcular los totales desde el catálogo?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if confirm == QMessageBox.Yes:
+                db.rebuild_valuation()
+                self.load_valuation()
+                QMessageBox.information(self, "Valorización", "Totales recalculados.")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"No se pudo verificar la valorización: {e}")
+
     # LÓGICA DE EXPORTACIÓN JSON
     def export_sales_json(self):
         dlg = DateRangeDialog(self)
@@ -414,41 +438,8 @@ class AdvancedView(QWidget):
                 return
 
             try:   
-                conn = sqlite3.connect(DB_PATH)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                query_sales = """
-                    SELECT * FROM sales 
-                    WHERE date(created_at) BETWEEN ? AND ?
-                """
-                cursor.execute(query_sales, (start_date, end_date))
-                sales_rows = cursor.fetchall()
-                
-                full_sales_data = []
-
-                for sale_row in sales_rows:
-                    sale_dict = dict(sale_row)
-                    sale_id = sale_dict['id']
-
-                    query_items = """
-                        SELECT item_name, qty, unit_price 
-                        FROM sale_items 
-                        WHERE sale_id = ?
-                    """
-                    cursor.execute(query_items, (sale_id,))
-                    items_rows = cursor.fetchall()
-
-                    items_list = []
-                    for item_row in items_rows:
-                        d_item = dict(item_row)
-                        d_item['subtotal'] = d_item['qty'] * d_item['unit_price']
-                        items_list.append(d_item)
-
-                    sale_dict['items_sold'] = items_list
-                    full_sales_data.append(sale_dict)
-
-                conn.close()
+                with db.read_snapshot():
+                    full_sales_data = db.get_sales_with_details(start_date, end_date)
 
                 with open(filename, 'w', encoding='utf-8') as f:
                     json.dump(full_sales_data, f, indent=4, ensure_ascii=False)
@@ -468,7 +459,17 @@ class AdvancedView(QWidget):
                 QMessageBox.critical(self, "Error", f"Fallo al exportar: {e}\n(Revisa 'Diagnóstico del Sistema')")
 
     # LÓGICA DE EXPORTACIÓN BD (BACKUP ZIP)
+    def _require_local_db(self):
+        # En modo terminal el archivo está en el equipo servidor
+        if db.REMOTE_SERVER:
+            QMessageBox.information(self, "Modo terminal", 
+                                    f"Esta operación se hace en el equipo servidor ({db.REMOTE_SERVER}).")
+            return False
+        return True
+
     def export_database(self):
+        if not self._require_local_db():
+            return
         temp_backup_db = os.path.join(USER_DATA_DIR, "temp_backup.db")
         
         filename, _ = QFileDialog.getSaveFileName(
@@ -482,11 +483,11 @@ class AdvancedView(QWidget):
             return
 
         try:
-            conn_src = sqlite3.connect(DB_PATH)
+            # Copia de una foto consistente; las ventas siguen mientras tanto
             conn_dest = sqlite3.connect(temp_backup_db)
-            conn_src.backup(conn_dest)
+            with db.read_snapshot() as conn_src:
+                conn_src.backup(conn_dest)
             conn_dest.close()
-            conn_src.close()
 
             with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as zf:
                 zf.write(temp_backup_db, arcname="inventory.db")
@@ -503,8 +504,77 @@ class AdvancedView(QWidget):
                 except: pass
             QMessageBox.critical(self, "Error", f"No se pudo crear el respaldo: {str(e)}")
 
+    # ARCHIVO DE VENTAS ANTIGUAS (ver db.archive_sales)
+    def archive_old_sales(self):
+        if not self._require_local_db():
+            return
+        years, ok = QInputDialog.getInt(
+            self, "Archivar Ventas Antiguas",
+            "Mover al archivo (archive.db) las ventas de hace más de (años):", 2, 1, 50
+        )
+        if not ok:
+            return
+
+        today = date.today()
+        before = date(today.year - years, today.month, 1).isoformat()
+        confirm = QMessageBox.question(
+            self, "Archivar Ventas Antiguas",
+            f"Las ventas anteriores al {before} pasarán a:\n{db.get_archive_path()}\n\n"
+            "Los reportes por período no cambian y el historial las sigue mostrando.\n"
+            "Respalda también ese archivo. ¿Continuar?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if confirm != QMessageBox.Yes:
+            return
+
+        try:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                result = db.archive_sales(before)
+            finally:
+                QApplication.restoreOverrideCursor()
+            QMessageBox.information(self, "Archivo", 
+                                    f"Se archivaron {result['sales']} ventas ({result['lines']} líneas de detalle).")
+        except Exception as e:
+            with open(LOG_FILE, 'a', encoding='utf-8') as f:
+                f.write(f"\n[ARCHIVE SALES ERROR] {str(e)}\n{traceback.format_exc()}")
+            QMessageBox.critical(self, "Error", f"No se pudo archivar: {e}")
+
+    # COMPACTACIÓN (ver db.compact_catalog)
+    def compact_catalog(self):
+        if not self._require_local_db():
+            return
+        confirm = QMessageBox.question(
+            self, "Compactar Catálogo",
+            "Se borrarán definitivamente los productos dados de baja que no tienen ventas\n"
+            "y los proveedores dados de baja sin productos. El historial de stock se conserva.\n\n"
+            "¿Continuar?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if confirm != QMessageBox.Yes:
+            return
+
+        try:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                result = db.compact_catalog()
+            finally:
+                QApplication.restoreOverrideCursor()
+            msg = (f"🗑️ Productos borrados: {result['items']}\n"
+                   f"🏢 Proveedores borrados: {result['providers']}\n"
+                   f"💾 Espacio liberado: {result['reclaimed_bytes'] / 1024:,.0f} KB")
+            if result['free_pages']:
+                msg += f"\n({result['free_pages']} páginas libres se reutilizarán dentro del archivo)"
+            QMessageBox.information(self, "Compactación Completa", msg)
+        except Exception as e:
+            with open(LOG_FILE, 'a', encoding='utf-8') as f:
+                f.write(f"\n[COMPACT CATALOG ERROR] {str(e)}\n{traceback.format_exc()}")
+            QMessageBox.critical(self, "Error", f"No se pudo compactar: {e}")
+
     # LÓGICA DE IMPORTACIÓN BD
     def import_database(self):
+        if not self._require_local_db():
+            return
         confirm = QMessageBox.warning(self, "Peligro", 
                                       "Esta acción REEMPLAZARÁ toda tu base de datos actual.\n"
                                       "Se perderán los datos actuales irremediablemente.\n\n"
@@ -538,23 +608,26 @@ class AdvancedView(QWidget):
                     f_out.write(zf.read(db_name_in_zip))
 
             #  CERRAR CONEXIONES
-            db = QSqlDatabase.database()
-            connection_name = db.connectionName() 
-            if db.isOpen():
-                db.close()
-            del db 
+            qt_db = QSqlDatabase.database()
+            connection_name = qt_db.connectionName() 
+            if qt_db.isOpen():
+                qt_db.close()
+            del qt_db 
             QSqlDatabase.removeDatabase(connection_name)
             gc.collect()
 
-            # SWAP
+            # También las de db y el mantenimiento automático; el checkpoint deja el -wal vacío
+            scheduler = maintenance.get_scheduler()
+            if scheduler:
+                scheduler.stop()
+            if not db.close_connections():
+                raise RuntimeError("Otra caja o proceso está usando la base de datos. "
+                                   "Ciérralo e intenta de nuevo.")
+
+            # SWAP: la base viaja con su -wal y su -shm; si quedaran junto a la
+            # copia restaurada, SQLite los aplicaría sobre ella
             if os.path.exists(DB_PATH):
-                if os.path.exists(backup_current_path):
-                    try: os.remove(backup_current_path)
-                    except: pass 
-                try:
-                    os.rename(DB_PATH, backup_current_path)
-                except OSError:
-                    shutil.move(DB_PATH, backup_current_path)
+                _move_db_files(DB_PATH, backup_current_path)
 
             shutil.move(temp_extract_path, DB_PATH)
             
@@ -565,7 +638,7 @@ class AdvancedView(QWidget):
 
         except PermissionError:
             if os.path.exists(backup_current_path) and not os.path.exists(DB_PATH):
-                try: os.rename(backup_current_path, DB_PATH)
+                try: _move_db_files(backup_current_path, DB_PATH)
                 except: pass
             QMessageBox.critical(self, "Error de Permisos", 
                                  "Windows tiene bloqueado el archivo. Reinicia la PC e intenta de nuevo.")
@@ -575,13 +648,72 @@ class AdvancedView(QWidget):
                 try: os.remove(temp_extract_path)
                 except: pass
             if os.path.exists(backup_current_path) and not os.path.exists(DB_PATH):
-                try: os.rename(backup_current_path, DB_PATH)
+                try: _move_db_files(backup_current_path, DB_PATH)
                 except: pass
             
             with open(LOG_FILE, 'a') as f:
                 f.write(f"\n[ERROR IMPORT] {str(e)}\n{traceback.format_exc()}")
             QMessageBox.critical(self, "Error Fatal", f"Fallo al restaurar: {str(e)}")
 
+    def load_maintenance_status(self):
+        if db.REMOTE_SERVER:
+            self.lbl_maintenance.setText("Mantenimiento de la base: lo hace el equipo servidor.")
+            return
+        try:
+            last = maintenance.get_last_maintenance()
+            self.btn_convert_vacuum.setVisible(not maintenance.is_incremental())
+        except Exception:
+            last = None
+        if last:
+            self.lbl_maintenance.setText(f"Último mantenimiento ({last['started_at']}): {maintenance.describe(last)}")
+        else:
+            self.lbl_maintenance.setText("Mantenimiento de la base: se ejecuta solo cuando la app está inactiva.")
+
+    def run_maintenance_now(self):
+        scheduler = maintenance.get_scheduler()
+        if scheduler and scheduler.start():
+            self.btn_maintenance.setEnabled(False)
+            self.lbl_maintenance.setText("Mantenimiento en curso...")
+
+    def convert_auto_vacuum(self):
+        scheduler = maintenance.get_scheduler()
+        if scheduler and scheduler.running:
+            QMessageBox.information(self, "Mantenimiento", "Espera a que termine el mantenimiento en curso.")
+            return
+        confirm = QMessageBox.question(
+            self, "Vacuum Incremental",
+            "La base se reescribe completa una sola vez para poder devolver espacio al disco\n"
+            "en cada mantenimiento. Mientras dura, ninguna otra caja puede vender.\n\n"
+            "Cierra la app en las otras cajas antes de continuar. ¿Continuar?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if confirm != QMessageBox.Yes:
+            return
+
+        try:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                result = maintenance.convert_auto_vacuum()
+            finally:
+                QApplication.restoreOverrideCursor()
+            QMessageBox.information(self, "Vacuum Incremental",
+                f"Base convertida en {result['duration']:.1f} s.\n"
+                f"💾 Espacio liberado: {result['reclaimed_bytes'] / 1024:,.0f} KB")
+        except Exception as e:
+            with open(LOG_FILE, 'a', encoding='utf-8') as f:
+                f.write(f"\n[CONVERT VACUUM ERROR] {str(e)}\n{traceback.format_exc()}")
+            QMessageBox.critical(self, "Error", f"No se pudo convertir la base: {e}")
+        self.load_maintenance_status()
+        self.load_log_preview()
+
+    def on_maintenance_finished(self, result):
+        self.btn_maintenance.setEnabled(True)
+        if 'error' in result:
+            self.lbl_maintenance.setText(f"Mantenimiento: {maintenance.describe(result)}")
+        else:
+            self.load_maintenance_status()
+        self.load_log_preview()
+
     def load_log_preview(self):
         if os.path.exists(LOG_FILE):
             try:
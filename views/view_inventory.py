@@ -6,10 +6,13 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor, QFont
 import db
-from dialogs.dlg_add_item import AddItemDialog
-from dialogs.dlg_edit_item import EditItemDialog 
+import events
+from dialogs import dialog_pool
 from dialogs.dlg_item_detail import ItemDetailDialog
 
+# Más filas cambiadas que esto (ej. una importación) y sale más barato recargar
+PATCH_MAX_ROWS = 200
+
 class InventoryView(QWidget):
     #Estilos
     STYLE_TITLE = "font-size: 22px; font-weight: bold; color: #2c3e50;"
@@ -30,8 +33,10 @@ class InventoryView(QWidget):
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._row_ids = []  # id de cada fila, en el orden de la tabla (id descendente)
         self.setup_ui()
         self.load_items()
+        events.subscribe("items", self.on_items_changed)
 
     def setup_ui(self):
         main_layout = QVBoxLayout(self)
@@ -142,78 +147,118 @@ class InventoryView(QWidget):
             print(f"DB Error: {e}")
 
     def on_search_changed(self):
-        text = self.search_input.text().strip().lower()
-        items = db.get_items(500)
+        text = self.search_input.text().strip()
         
         if not text:
-            self._populate_table(items)
-            self.status_label.setText(f"Mostrando {len(items)} productos")
+            self.load_items()
             return
 
-        filtered = [
-            it for it in items 
-            if text in (it.get("name") or "").lower() 
-            or text in (it.get("sku") or "").lower()
-            or text in (it.get("location") or "").lower()
-        ]
+        # Tildes y mayúsculas ya vienen normalizadas en items.search_key
+        filtered = db.search_items(text, 500)
         self._populate_table(filtered)
         self.status_label.setText(f"{len(filtered)} resultados encontrados")
 
     def _populate_table(self, items):
         self.table.setRowCount(0)
+        self._row_ids = []
         for it in items:
             row = self.table.rowCount()
             self.table.insertRow(row)
-            
-            price_val = it.get("price", 0.0)
-            price_c1 = it.get("price_c1", 0.0)
-            price_c2 = it.get("price_c2", 0.0)
-            stock_val = it.get("stock", 0)
-            location_val = it.get("location", "")
-            
-            id_item = QTableWidgetItem(str(it["id"]))
-            sku_item = QTableWidgetItem(str(it.get("sku") or "S/N"))
-            name_item = QTableWidgetItem(str(it.get("name") or ""))
-            price_item = QTableWidgetItem(f"$ {price_val:,.2f}")
-            p_c1_item = QTableWidgetItem(f"$ {price_c1:,.2f}")
-            p_c2_item = QTableWidgetItem(f"$ {price_c2:,.2f}")
-            stock_item = QTableWidgetItem(str(stock_val))
-            loc_item = QTableWidgetItem(str(location_val))
-            # Nombre de proveedor (si viene del JOIN) o el ID
-            prov_name = it.get("provider_name") if it.get("provider_name") else str(it.get("provider_id") or "General")
-            prov_item = QTableWidgetItem(prov_name)
-
-            id_item.setTextAlignment(Qt.AlignCenter)
-            sku_item.setTextAlignment(Qt.AlignCenter)
-            price_item.setTextAlignment(Qt.AlignCenter)
-            p_c1_item.setTextAlignment(Qt.AlignCenter)
-            p_c2_item.setTextAlignment(Qt.AlignCenter)
-            stock_item.setTextAlignment(Qt.AlignCenter)
-            loc_item.setTextAlignment(Qt.AlignCenter)
-
-            min_alert = it.get("min_stock", 3)
-            if min_alert == 0: min_alert = 3 
-
-            if stock_val <= min_alert:
-                stock_item.setForeground(QColor("#e67e22"))
-                stock_item.setFont(QFont("Arial", weight=QFont.Bold))
-            if stock_val <= 0:
-                stock_item.setForeground(QColor("#c0392b"))
-
-            self.table.setItem(row, 0, id_item)
-            self.table.setItem(row, 1, sku_item)
-            self.table.setItem(row, 2, name_item)
-            self.table.setItem(row, 3, price_item)
-            self.table.setItem(row, 4, p_c1_item)
-            self.table.setItem(row, 5, p_c2_item)
-            self.table.setItem(row, 6, stock_item)
-            self.table.setItem(row, 7, loc_item)
-            self.table.setItem(row, 8, prov_item)
+            self._row_ids.append(it["id"])
+            self._fill_row(row, it)
+
+    # Cambios hechos desde esta app: se tocan solo las filas afectadas
+    def on_items_changed(self, event):
+        if event.ids is None or len(event.ids) > PATCH_MAX_ROWS:
+            self.on_search_changed()
+            return
+
+        if event.action == events.DELETE:
+            for item_id in event.ids:
+                self._remove_row(item_id)
+        else:
+            shown = set(self._row_ids)
+            # Una edición o una venta solo importa si el producto está en pantalla
+            wanted = list(event.ids) if event.action == events.INSERT else [i for i in event.ids if i in shown]
+            fresh = {it["id"]: it for it in db.get_items_by_ids(wanted)} if wanted else {}
+            key = db.normalize_text(self.search_input.text().strip())
+            for item_id in wanted:
+                it = fresh.get(item_id)
+                if it is None or (key and key not in (it.get("search_key") or "")):
+                    self._remove_row(item_id)
+                else:
+                    self._upsert_row(it)
+
+        if self.search_input.text().strip():
+            self.status_label.setText(f"{len(self._row_ids)} resultados encontrados")
+        else:
+            self.status_label.setText(f"Mostrando {len(self._row_ids)} productos")
+
+    def _upsert_row(self, it):
+        if it["id"] in self._row_ids:
+            self._fill_row(self._row_ids.index(it["id"]), it)
+            return
+        row = next((r for r, item_id in enumerate(self._row_ids) if item_id < it["id"]), len(self._row_ids))
+        self.table.insertRow(row)
+        self._row_ids.insert(row, it["id"])
+        self._fill_row(row, it)
+
+    def _remove_row(self, item_id):
+        if item_id in self._row_ids:
+            row = self._row_ids.index(item_id)
+            self.table.removeRow(row)
+            del self._row_ids[row]
+
+    def _fill_row(self, row, it):
+        price_val = it.get("price", 0.0)
+        price_c1 = it.get("price_c1", 0.0)
+        price_c2 = it.get("price_c2", 0.0)
+        stock_val = it.get("stock", 0)
+        location_val = it.get("location", "")
+        
+        id_item = QTableWidgetItem(str(it["id"]))
+        sku_item = QTableWidgetItem(str(it.get("sku") or "S/N"))
+        name_item = QTableWidgetItem(str(it.get("name") or ""))
+        price_item = QTableWidgetItem(f"$ {price_val:,.2f}")
+        p_c1_item = QTableWidgetItem(f"$ {price_c1:,.2f}")
+        p_c2_item = QTableWidgetItem(f"$ {price_c2:,.2f}")
+        stock_item = QTableWidgetItem(str(stock_val))
+        loc_item = QTableWidgetItem(str(location_val))
+        # Nombre de proveedor (si viene del JOIN) o el ID
+        prov_name = it.get("provider_name") if it.get("provider_name") else str(it.get("provider_id") or "General")
+        prov_item = QTableWidgetItem(prov_name)
+
+        id_item.setTextAlignment(Qt.AlignCenter)
+        sku_item.setTextAlignment(Qt.AlignCenter)
+        price_item.setTextAlignment(Qt.AlignCenter)
+        p_c1_item.setTextAlignment(Qt.AlignCenter)
+        p_c2_item.setTextAlignment(Qt.AlignCenter)
+        stock_item.setTextAlignment(Qt.AlignCenter)
+        loc_item.setTextAlignment(Qt.AlignCenter)
+
+        min_alert = it.get("min_stock", 3)
+        if min_alert == 0: min_alert = 3 
+
+        if stock_val <= min_alert:
+            stock_item.setForeground(QColor("#e67e22"))
+            stock_item.setFont(QFont("Arial", weight=QFont.Bold))
+        if stock_val <= 0:
+            stock_item.setForeground(QColor("#c0392b"))
+
+        self.table.setItem(row, 0, id_item)
+        self.table.setItem(row, 1, sku_item)
+        self.table.setItem(row, 2, name_item)
+        self.table.setItem(row, 3, price_item)
+        self.table.setItem(row, 4, p_c1_item)
+        self.table.setItem(row, 5, p_c2_item)
+        self.table.setItem(row, 6, stock_item)
+        self.table.setItem(row, 7, loc_item)
+        self.table.setItem(row, 8, prov_item)
 
     #ACCIONES
 
     def handle_add_item(self):
-        dialog = AddItemDialog(self)
+        dialog = dialog_pool.add_item_dialog(self)
         if dialog.exec_():
             try:
                 data = dialog.get_data()
@@ -234,7 +279,6 @@ class InventoryView(QWidget):
                     max_stock=int(data.get("max_stock") or 0),
                     location=data.get("location", "")
                 )
-                self.load_items()
                 QMessageBox.information(self, "Éxito", "Producto guardado correctamente.")
 
             except ValueError as ve:
@@ -256,7 +300,7 @@ class InventoryView(QWidget):
         item_data = db.get_item_by_id(item_id)
         
         if item_data:
-            dialog = EditItemDialog(item_data, parent=self)
+            dialog = dialog_pool.edit_item_dialog(item_data, parent=self)
             if dialog.exec_():
                 try:
                     # Obtenemos datos modificados
@@ -280,7 +324,6 @@ class InventoryView(QWidget):
                         location=new_data['location']
                     )
                     
-                    self.load_items()
                     QMessageBox.information(self, "Actualizado", "Producto actualizado correctamente.")
 
                 except Exception as e:
@@ -305,7 +348,6 @@ class InventoryView(QWidget):
         if confirm == QMessageBox.Yes:
             if db.delete_item_by_sku(sku):
                 QMessageBox.information(self, "Éxito", "Producto eliminado.")
-                self.load_items()
             else:
                 QMessageBox.warning(self, "Error", "No se pudo eliminar.")
 
@@ -7,6 +7,7 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor, QFont
 import db
+import reorder
 
 class ProviderView(QWidget):
     def __init__(self):
@@ -44,6 +45,12 @@ class ProviderView(QWidget):
         gb_add.setLayout(form_layout)
         left_layout.addWidget(gb_add)
 
+        # Buscador (sin importar tildes ni mayúsculas)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("🔍 Buscar distribuidor...")
+        self.search_input.textChanged.connect(self.load_provider_list)
+        left_layout.addWidget(self.search_input)
+
         # Lista de Proveedores
         self.list_provider = QListWidget() 
         self.list_provider.itemClicked.connect(self.on_provider_selected)
@@ -66,8 +73,12 @@ class ProviderView(QWidget):
         self.lbl_phone = QLabel("")
         self.lbl_phone.setStyleSheet("color: #7f8c8d; font-size: 14px;")
 
+        self.lbl_summary = QLabel("")
+        self.lbl_summary.setStyleSheet("color: #34495e; font-size: 13px;")
+
         right_layout.addWidget(self.lbl_provider_name)
         right_layout.addWidget(self.lbl_phone)
+        right_layout.addWidget(self.lbl_summary)
         right_layout.addSpacing(10)
 
         # Tabla de Reporte
@@ -75,8 +86,8 @@ class ProviderView(QWidget):
         lbl_report.setStyleSheet("font-weight: bold;")
         right_layout.addWidget(lbl_report)
 
-        self.table = QTableWidget(0, 5)
-        columns = ["SKU", "Producto", "Stock Actual", "Stock Máximo", "A PEDIR"]
+        self.table = QTableWidget(0, 6)
+        columns = ["SKU", "Producto", "Stock Actual", "Stock Máximo", "Venta/Día", "A PEDIR"]
         self.table.setHorizontalHeaderLabels(columns)
 
         #estilos de la tabla
@@ -109,11 +120,20 @@ class ProviderView(QWidget):
 
     def load_provider_list(self):
         self.list_provider.clear()
-        providers = db.get_providers() 
+        # Nombre + resumen de reabastecimiento en una sola consulta
+        providers = db.get_provider_dashboard(self.search_input.text())
+        # Unidades a pedir según la velocidad de venta (en caché hasta la próxima venta)
+        totals = reorder.get_reorder_plan().provider_totals()
         
         for p in providers:
-            item = QListWidgetItem(f"{p['name']}")
+            p['units_to_reorder'], p['reorder_value'] = totals.get(p['id'], (0, 0.0))
+            text = f"{p['name']}\n   {p['item_count']} productos"
+            if p['low_stock_count']:
+                text += f"  |  ⚠️ {p['low_stock_count']} en mínimo"
+            item = QListWidgetItem(text)
             item.setData(Qt.UserRole, p)
+            if p['low_stock_count']:
+                item.setForeground(QColor("#c0392b"))
             self.list_provider.addItem(item)
 
     def handle_add_provider(self):
@@ -145,6 +165,8 @@ class ProviderView(QWidget):
             self.load_provider_list()
             self.table.setRowCount(0)
             self.lbl_provider_name.setText("Selecciona un proveedor")
+            self.lbl_phone.setText("")
+            self.lbl_summary.setText("")
 
     def on_provider_selected(self, item):
         data = item.data(Qt.UserRole)
@@ -153,12 +175,17 @@ class ProviderView(QWidget):
         # Actualizar cabecera
         self.lbl_provider_name.setText(data['name'])
         self.lbl_phone.setText(f"📞 Contacto: {data['phone']}" if data['phone'] else "Sin teléfono")
+        self.lbl_summary.setText(
+            f"Productos: {data['item_count']}  |  En mínimo: {data['low_stock_count']}  |  "
+            f"Unidades a pedir: {data['units_to_reorder']}  |  Valor estimado: $ {data['reorder_value']:,.2f}"
+        )
         
         # Cargar tabla de reporte
         self.load_report_table(data['id'])
 
     def load_report_table(self, provider_id):
         items = db.get_items_by_provider(provider_id)
+        plan = reorder.get_reorder_plan()
         
         self.table.setRowCount(0)
         for it in items:
@@ -170,13 +197,16 @@ class ProviderView(QWidget):
             stock_item = QTableWidgetItem(str(it['stock']))
             max_item = QTableWidgetItem(str(it['max_stock']))
             
-            qty_needed = it['restock_qty']
+            suggestion = plan.get(it['id']) or {'velocity': 0, 'order_qty': 0}
+            velocity_item = QTableWidgetItem(f"{suggestion['velocity']:.2f}")
+            qty_needed = suggestion['order_qty']
             needed_item = QTableWidgetItem(str(qty_needed))
             
             sku_item.setTextAlignment(Qt.AlignCenter)
             name_item.setTextAlignment(Qt.AlignCenter)
             stock_item.setTextAlignment(Qt.AlignCenter)
             max_item.setTextAlignment(Qt.AlignCenter)
+            velocity_item.setTextAlignment(Qt.AlignCenter)
             needed_item.setTextAlignment(Qt.AlignCenter)
             
             if qty_needed > 0:
@@ -192,4 +222,5 @@ class ProviderView(QWidget):
             self.table.setItem(row, 1, name_item)
             self.table.setItem(row, 2, stock_item)
             self.table.setItem(row, 3, max_item)
-            self.table.setItem(row, 4, needed_item)
\ No newline at end of file
+            self.table.setItem(row, 4, velocity_item)
+            self.table.setItem(row, 5, needed_item)
\ No newline at end of file
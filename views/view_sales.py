@@ -6,18 +6,26 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QColor, QFont, QTextCharFormat, QBrush
 import db
+import events
 
 # importar diálogos
 try:
-    from dialogs.dlg_sale import SaleDialog 
+    from dialogs import dialog_pool
 except ImportError:
-    SaleDialog = None
+    dialog_pool = None
 
 try:
     from dialogs.dlg_sale_detail import SaleDetailDialog
 except ImportError:
     SaleDetailDialog = None
 
+try:
+    from dialogs.dlg_cash_close import CashCloseDialog
+except ImportError:
+    CashCloseDialog = None
+
+SALES_LIMIT = 1000  # ventas más recientes que se cargan en la tabla
+
 class SalesView(QWidget):
     # ESTILOS
     STYLE_TITLE = "font-size: 22px; font-weight: bold; color: #2c3e50;"
@@ -30,18 +38,21 @@ class SalesView(QWidget):
         QPushButton:hover { background-color: #2c3e50; }
     """
     STYLE_LABEL_STATUS = "color: #7f8c8d; font-style: italic;"
+    STYLE_LABEL_PERIOD = "color: #27ae60; font-weight: bold;"
     STYLE_INPUT = "padding-left: 10px; border-radius: 5px; border: 1px solid #bdc3c7; height: 30px;"
 
     def __init__(self):
         super().__init__()
         self.all_sales = []
         self.filtered_sales = []
+        self.screen_total = 0.0
         
         self.date_start = None
         self.date_end = None
         
         self.setup_ui()
         self.load_sales()
+        events.subscribe("sales", self.on_sales_changed)
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -63,9 +74,15 @@ class SalesView(QWidget):
         layout.addWidget(self.table)
 
         # Pie de página
+        footer = QHBoxLayout()
         self.status_label = QLabel("Listo")
         self.status_label.setStyleSheet(self.STYLE_LABEL_STATUS)
-        layout.addWidget(self.status_label)
+        self.period_label = QLabel("")
+        self.period_label.setStyleSheet(self.STYLE_LABEL_PERIOD)
+        footer.addWidget(self.status_label)
+        footer.addStretch()
+        footer.addWidget(self.period_label)
+        layout.addLayout(footer)
 
     def _create_header(self):
         h_layout = QHBoxLayout()
@@ -82,6 +99,11 @@ class SalesView(QWidget):
         btn_reset.setFixedWidth(60)
         btn_reset.clicked.connect(self.reset_filters)
 
+        btn_cash = QPushButton("🧾 Corte de Caja")
+        btn_cash.setStyleSheet(self.STYLE_BTN_FILTER)
+        btn_cash.setCursor(Qt.PointingHandCursor)
+        btn_cash.clicked.connect(self.open_cash_close_dialog)
+
         btn_new = QPushButton("➕ Nueva Venta")
         btn_new.setStyleSheet(self.STYLE_BTN_NEW)
         btn_new.setCursor(Qt.PointingHandCursor)
@@ -92,6 +114,7 @@ class SalesView(QWidget):
         h_layout.addWidget(self.btn_filter)
         h_layout.addWidget(btn_reset)
         h_layout.addSpacing(10)
+        h_layout.addWidget(btn_cash)
         h_layout.addWidget(btn_new)
         return h_layout
 
@@ -128,18 +151,39 @@ class SalesView(QWidget):
 
     def load_sales(self):
         try:
-            self.all_sales = db.get_all_sales(limit=1000)
+            self.all_sales = db.get_all_sales(limit=SALES_LIMIT)
             self.apply_filters()
+            self.update_period_total()
         except Exception as e:
             print(f"Error cargando ventas: {e}")
             self.status_label.setText("Error de conexión con base de datos.")
 
+    # Venta nueva desde esta app: se agrega su fila arriba en lugar de recargar todo
+    def on_sales_changed(self, event):
+        if event.action != events.INSERT or event.ids is None:
+            self.load_sales()
+            return
+
+        text = self.search_input.text().lower().strip()
+        # get_sales_by_ids viene de la más nueva a la más vieja: se insertan al revés
+        for sale in reversed(db.get_sales_by_ids(list(event.ids))):
+            self.all_sales.insert(0, sale)
+            if self._matches(sale, text):
+                self.filtered_sales.insert(0, sale)
+                self.table.insertRow(0)
+                self._fill_row(0, sale)
+                self.screen_total += sale.get('total', 0)
+        del self.all_sales[SALES_LIMIT:]
+        self._update_status()
+        self.update_period_total()
+
     def reset_filters(self):
         self.date_start = None
         self.date_end = None
         self.search_input.clear()
         self.btn_filter.setText("📅 Filtrar Fechas")
         self.apply_filters()
+        self.update_period_total()
 
     def open_calendar_filter(self):
         dialog = CalendarRangeDialog(self.date_start, self.date_end, self)
@@ -156,88 +200,119 @@ class SalesView(QWidget):
                 self.btn_filter.setText("📅 Filtrar Fechas")
                 
             self.apply_filters()
+            self.update_period_total()
+
+    def update_period_total(self):
+        # Total real del período (no solo las ventas cargadas en la tabla), leído de los resúmenes diarios
+        try:
+            if self.date_start and self.date_end:
+                start = self.date_start.toString("yyyy-MM-dd")
+                end = self.date_end.toString("yyyy-MM-dd")
+                label = "Total del período"
+            else:
+                start = end = QDate.currentDate().toString("yyyy-MM-dd")
+                label = "Total de hoy"
+            summary = db.get_sales_summary(start, end)
+            self.period_label.setText(
+                f"{label}: $ {summary['revenue']:,.2f}  ({summary['sale_count']} ventas, {summary['units']} unidades)"
+            )
+        except Exception as e:
+            print(f"Error cargando resumen de ventas: {e}")
+            self.period_label.setText("")
 
     def apply_filters(self):
         text = self.search_input.text().lower().strip()
         self.filtered_sales = []
         
         for sale in self.all_sales:
-            # Filtro Fecha
-            if self.date_start and self.date_end:
-                sale_date_str = str(sale['created_at'])[:10]
-                s_date = QDate.fromString(sale_date_str, "yyyy-MM-dd")
-                if not s_date.isValid() or not (self.date_start <= s_date <= self.date_end):
-                    continue
-
-            # Filtro Texto
-            if text:
-                match = (
-                    text in str(sale['id']) or 
-                    text in str(sale.get('payment_method') or "").lower() or
-                    text in str(sale.get('title') or "").lower() # <-- Busca en título
-                )
-                if not match:
-                    continue
-            
-            self.filtered_sales.append(sale)
+            if self._matches(sale, text):
+                self.filtered_sales.append(sale)
             
         self._populate_table(self.filtered_sales)
 
+    def _matches(self, sale, text):
+        # Filtro Fecha
+        if self.date_start and self.date_end:
+            sale_date_str = str(sale['created_at'])[:10]
+            s_date = QDate.fromString(sale_date_str, "yyyy-MM-dd")
+            if not s_date.isValid() or not (self.date_start <= s_date <= self.date_end):
+                return False
+
+        # Filtro Texto
+        if text:
+            return (
+                text in str(sale['id']) or 
+                text in str(sale.get('payment_method') or "").lower() or
+                text in str(sale.get('title') or "").lower() # <-- Busca en título
+            )
+        return True
+
     def _populate_table(self, sales_list):
         self.table.setRowCount(0)
-        total_p = 0.0
+        self.screen_total = 0.0
         
         for i, sale in enumerate(sales_list):
             self.table.insertRow(i)
-            total_p += sale.get('total', 0)
-            
-            # ID
-            id_item = QTableWidgetItem(str(sale['id']))
-            id_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(i, 0, id_item)
-
-            # Fecha
-            date_item = QTableWidgetItem(str(sale['created_at'])[:16])
-            date_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(i, 1, date_item)
-            
+            self.screen_total += sale.get('total', 0)
+            self._fill_row(i, sale)
 
-            raw_title = sale.get('title')
-            title_text = raw_title if raw_title and raw_title.strip() else "Venta General"
-            
-            title_item = QTableWidgetItem(title_text)
-            title_item.setTextAlignment(Qt.AlignCenter)
+        self._update_status()
 
-            if title_text == "Venta General":
-                 title_item.setForeground(QColor("#7f8c8d"))
-                 title_item.setFont(QFont("Arial", italic=True))
-            else:
-                 title_item.setFont(QFont("Arial", weight=QFont.Bold))
+    def _update_status(self):
+        msg = f"Viendo {len(self.filtered_sales)} ventas | Total en pantalla: $ {self.screen_total:,.2f}"
+        self.status_label.setText(msg)
 
-            self.table.setItem(i, 2, title_item)
+    def _fill_row(self, i, sale):
+        # ID
+        id_item = QTableWidgetItem(str(sale['id']))
+        id_item.setTextAlignment(Qt.AlignCenter)
+        self.table.setItem(i, 0, id_item)
 
-            # 3. Método
-            method_item = QTableWidgetItem(sale.get('payment_method', '-'))
-            method_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(i, 3, method_item)
-            
-            # 4. Total
-            item_total = QTableWidgetItem(f"$ {sale.get('total', 0):,.2f}")
-            item_total.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            item_total.setForeground(QColor("#27ae60"))
-            item_total.setFont(QFont("Arial", weight=QFont.Bold))
-            self.table.setItem(i, 4, item_total)
-
-        msg = f"Viendo {len(sales_list)} ventas | Total en pantalla: $ {total_p:,.2f}"
-        self.status_label.setText(msg)
+        # Fecha
+        date_item = QTableWidgetItem(str(sale['created_at'])[:16])
+        date_item.setTextAlignment(Qt.AlignCenter)
+        self.table.setItem(i, 1, date_item)
+        
+
+        raw_title = sale.get('title')
+        title_text = raw_title if raw_title and raw_title.strip() else "Venta General"
+        
+        title_item = QTableWidgetItem(title_text)
+        title_item.setTextAlignment(Qt.AlignCenter)
+
+        if title_text == "Venta General":
+             title_item.setForeground(QColor("#7f8c8d"))
+             title_item.setFont(QFont("Arial", italic=True))
+        else:
+             title_item.setFont(QFont("Arial", weight=QFont.Bold))
+
+        self.table.setItem(i, 2, title_item)
+
+        # 3. Método
+        method_item = QTableWidgetItem(sale.get('payment_method', '-'))
+        method_item.setTextAlignment(Qt.AlignCenter)
+        self.table.setItem(i, 3, method_item)
+        
+        # 4. Total
+        item_total = QTableWidgetItem(f"$ {sale.get('total', 0):,.2f}")
+        item_total.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        item_total.setForeground(QColor("#27ae60"))
+        item_total.setFont(QFont("Arial", weight=QFont.Bold))
+        self.table.setItem(i, 4, item_total)
 
     def open_new_sale_dialog(self):
-        if SaleDialog:
-            if SaleDialog(self).exec_(): 
-                self.load_sales()
+        if dialog_pool:
+            # La fila nueva la agrega on_sales_changed
+            dialog_pool.sale_dialog(self).exec_()
         else:
             print("Error: SaleDialog no importado")
 
+    def open_cash_close_dialog(self):
+        if CashCloseDialog:
+            CashCloseDialog(self).exec_()
+        else:
+            print("Error: CashCloseDialog no importado")
+
     def handle_table_double_click(self, row, col):
         try:
             sid_item = self.table.item(row, 0)
@@ -0,0 +1,144 @@
+"""
+Cola de escritura con commit agrupado.
+
+Cada COMMIT de SQLite espera a que el disco confirme (fsync). Con varias cajas
+vendiendo a la vez ese tiempo domina: cien ventas son cien fsync. La cola recibe
+escrituras desde cualquier hilo y un único hilo escritor las aplica juntando las
+que llegan dentro de una ventana corta (BATCH_MAX_WAIT) o hasta BATCH_MAX_OPS
+operaciones en UNA transacción: cien ventas, un fsync. Cuanta más carga, más
+grandes los lotes.
+
+Cada operación corre dentro de su propio SAVEPOINT: si falla (ej. SKU duplicado)
+se revierte solo esa operación y su Future recibe la excepción; el resto del lote
+se confirma igual. Los Future se resuelven recién después del COMMIT, así nadie
+recibe un resultado que todavía no está en disco. Lo que la operación registró
+con db.after_commit() (invalidar cachés, publicar eventos) queda en
+`future.effects`: db.run_write lo ejecuta en el hilo que pidió la escritura.
+
+Uso (lo hace server.py):
+    queue = WriteQueue()
+    db.set_write_queue(queue)   # db.register_sale(...), db.add_item(...) pasan por la cola
+    ...
+    db.set_write_queue(None)
+    queue.close()
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+
+import db
+
+BATCH_MAX_OPS = 64
+BATCH_MAX_WAIT = 0.003  # segundos que se esperan más operaciones después de la primera
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Aplica las funciones `tx(cur, ...)` de db en lotes, desde un solo hilo."""
+
+    def __init__(self, max_ops: int = BATCH_MAX_OPS, max_wait: float = BATCH_MAX_WAIT):
+        self.max_ops = max_ops
+        self.max_wait = max_wait
+        self.batches = 0      # transacciones confirmadas
+        self.operations = 0   # operaciones aplicadas en ellas
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="easyinv-write-queue", daemon=True)
+        self._thread.start()
+
+    def submit(self, tx: Callable, *args, **kwargs) -> Future:
+        """Encola `tx(cur, *args, **kwargs)`. El Future trae su resultado o su excepción."""
+        future = Future()
+        future.effects = []
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("La cola de escritura está cerrada.")
+            self._queue.put((tx, args, kwargs, future))
+        return future
+
+    def close(self, timeout: float = None):
+        """Deja de aceptar operaciones y espera a que se confirmen las pendientes."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    # --- Hilo escritor ---
+
+    def _run(self):
+        conn = db.get_db_connection()
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    self._apply(conn, batch)
+                if stop:
+                    break
+        finally:
+            conn.close()
+
+    def _next_batch(self) -> Tuple[List[Tuple], bool]:
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_ops:
+            remaining = deadline - time.monotonic()
+            try:
+                # Vencida la ventana solo se toma lo que ya está esperando
+                op = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if op is _STOP:
+                return batch, True
+            batch.append(op)
+        return batch, False
+
+    def _apply(self, conn, batch: List[Tuple]):
+        cur = conn.cursor()
+        done = []  # (future, ok, resultado o excepción, efectos post-commit)
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            for tx, args, kwargs, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                cur.execute("SAVEPOINT write_op")
+                try:
+                    with db.collecting_effects() as effects:
+                        result = tx(cur, *args, **kwargs)
+                except Exception as e:
+                    cur.execute("ROLLBACK TO write_op")
+                    cur.execute("RELEASE write_op")
+                    done.append((future, False, e, None))
+                else:
+                    cur.execute("RELEASE write_op")
+                    done.append((future, True, result, effects))
+            conn.commit()
+        except Exception as e:
+            # Falló el BEGIN, un SAVEPOINT o el COMMIT (base bloqueada, disco lleno...):
+            # no quedó nada guardado, así que todo el lote recibe el error.
+            conn.rollback()
+            for future, ok, value, _ in done:
+                if not ok:
+                    future.set_exception(value)
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.operations += len(done)
+        for future, ok, value, effects in done:
+            if ok:
+                future.effects = effects
+                future.set_result(value)
+            else:
+                future.set_exception(value)